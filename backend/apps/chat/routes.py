@@ -1,20 +1,28 @@
 import logging
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, conint
 
 from services.chat_service import ChatService
 from services.question_service import QuestionService
 from services.response_service import ResponseService
 from utils.agent_manager import AgentManager
+from utils.agent_scheduler import AgentScheduler
+from utils.answer_cache import AnswerCache
 from utils.auth_manager import AuthManager
 from utils.base_schema import BaseResponse
+from utils.result_encoder import ColumnarResult, ResultEncoder
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How often a streamed question that waits for an agent slot reports its place in line
+QUEUE_POSITION_SECONDS = 1.0
+
 router = APIRouter()
 agent = AgentManager()
 
@@ -60,6 +68,27 @@ def create_chat(
         return BaseResponse(success=False, message=f"Failed to create chat: {str(e)}")
 
 
+@router.get("/answer-cache/stats")
+def get_answer_cache_stats(current_user: int = Depends(AuthManager.get_current_user)):
+    """
+    Returns the size and the hit, miss, invalidation and eviction counts of the
+    agent's answer cache since the process started.
+    """
+    return BaseResponse(success=True, response=AnswerCache.stats())
+
+
+@router.get("/queue")
+def get_agent_queue(current_user: int = Depends(AuthManager.get_current_user)):
+    """
+    Returns how many agent runs are running and waiting, and the place in line of
+    each waiting question of the current user.
+    """
+    return BaseResponse(
+        success=True,
+        response={**AgentScheduler.stats(), "positions": AgentScheduler.queue_positions(current_user)}
+    )
+
+
 @router.get("/{chat_id}")
 def get_chat_messages(chat_id: int, current_user: int = Depends(AuthManager.get_current_user)):
     try:
@@ -85,33 +114,120 @@ class ResultData(BaseModel):
 
 
 @router.post("/{chat_id}")
-def ask_chat(
+async def ask_chat(
     chat_id: int,
     request: ChatQuestionRequest,
+    http_request: Request,
     current_user: int = Depends(AuthManager.get_current_user)
 ):
+    await run_in_threadpool(get_authorized_chat, chat_id, current_user)
 
-    get_authorized_chat(chat_id, current_user)
-
-    agent_response = agent.query_nlp(request.question, chat_id)
+    # Waits for a free agent slot; a full queue answers 429 and a disconnect cancels the run
+    agent_response = await AgentScheduler.run(
+        current_user,
+        lambda: agent.aquery_nlp(request.question, chat_id),
+        http_request.is_disconnected
+    )
     content = agent_response.get("content", "")
     query_result = agent_response.get("query_result", {})
 
-    new_question = QuestionService.create_question(chat_id, request.question)
-    response = ResponseService.create_response(
+    new_question = await run_in_threadpool(QuestionService.create_question, chat_id, request.question)
+    response = await run_in_threadpool(
+        ResponseService.create_response,
         chat_id=chat_id,
         question_id=new_question.id,
         content=content,
         query_result=query_result
     )
 
-    return BaseResponse(
-        success=True,
-        response={
-            "content": content,
-            "query_result": query_result,
-            "response_id": response.id  # <- esto es CLAVE
-        }
+    # Large query results are serialized with orjson instead of the pydantic encoder
+    return ResultEncoder.json_response(
+        BaseResponse(
+            success=True,
+            response={
+                "content": content,
+                "query_result": query_result,
+                "total_rows": agent_response.get("total_rows"),
+                "truncated": agent_response.get("truncated"),
+                "response_id": response.id  # <- esto es CLAVE
+            }
+        ).model_dump()
+    )
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + ResultEncoder.dumps(data) + b"\n\n"
+
+
+@router.post("/{chat_id}/stream")
+async def ask_chat_stream(
+    chat_id: int,
+    request: ChatQuestionRequest,
+    current_user: int = Depends(AuthManager.get_current_user)
+):
+    """
+    Answers a question as server-sent events, sent as they happen:
+
+    * ``queued``: the question's place in line, whenever it changes while waiting
+    * ``start``: the agent starts working on the question
+    * ``step``: a tool call of the agent, with the SQL for queries
+    * ``result``: the columns of each SQL result, as soon as the query ran
+    * ``token``: the next piece of the answer text
+    * ``done``: the whole answer once it is stored, with its ``response_id``
+    * ``error``: the question could not be answered
+
+    A full queue is refused with 429 before the stream starts. Closing the
+    connection cancels the agent run, and nothing is stored.
+    """
+    await run_in_threadpool(get_authorized_chat, chat_id, current_user)
+    AgentScheduler.ensure_room(current_user)
+
+    async def events():
+        try:
+            waiter = AgentScheduler.enqueue(current_user)
+        except HTTPException as he:
+            yield _sse("error", {"status_code": he.status_code, "detail": he.detail})
+            return
+        try:
+            reported = 0
+            while True:
+                position = AgentScheduler.position(waiter)
+                if position and position != reported:
+                    reported = position
+                    yield _sse("queued", {"position": position})
+                if await AgentScheduler.wait(waiter, timeout=QUEUE_POSITION_SECONDS):
+                    break
+
+            yield _sse("start", {})
+            answer = {}
+            async for event, data in agent.astream_nlp(request.question, chat_id):
+                if event == "answer":
+                    answer = data
+                else:
+                    yield _sse(event, data)
+
+            new_question = await run_in_threadpool(QuestionService.create_question, chat_id, request.question)
+            response = await run_in_threadpool(
+                ResponseService.create_response,
+                chat_id=chat_id,
+                question_id=new_question.id,
+                content=answer.get("content", ""),
+                query_result=answer.get("query_result", {})
+            )
+            yield _sse("done", {**answer, "response_id": response.id})
+        except HTTPException as he:
+            yield _sse("error", {"status_code": he.status_code, "detail": he.detail})
+        except Exception as e:
+            logger.error(f"Error in ask_chat_stream: {str(e)}")
+            yield _sse("error", {"status_code": 500, "detail": str(e)})
+        finally:
+            AgentScheduler.leave(waiter)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies must pass every event through as soon as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -178,3 +294,24 @@ def rate_response(
     except Exception as e:
         logger.error(f"Unexpected error rating response: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/responses/{response_id}/result")
+def get_response_result(
+    response_id: int,
+    accept: Optional[str] = Header(None),
+    current_user: int = Depends(AuthManager.get_current_user)
+):
+    """
+    Returns the query result of a response as Arrow IPC or column-oriented JSON,
+    depending on the Accept header.
+    """
+    response = ResponseService.get_response(response_id)
+    if not response:
+        raise HTTPException(status_code=404, detail="Response not found")
+    get_authorized_chat(response.chat_id, current_user)
+
+    query_result = response.query_result or {}
+    if "error" in query_result:
+        raise HTTPException(status_code=422, detail=query_result["error"])
+    return ResultEncoder.response(ColumnarResult.from_dict(query_result), accept, {"response_id": response_id})
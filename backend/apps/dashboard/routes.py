@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 
 from apps.dashboard.service import DashboardService
 from utils.i18n import _
+from utils.result_encoder import ResultEncoder
 
 router = APIRouter()
 
@@ -12,10 +15,14 @@ class DashboardSchemaRequest(BaseModel):
 
 
 @router.get("/")
-def get_schema():
+def get_schema(table_name: Optional[str] = Query(None, description="Table to describe instead of the latest file")):
     """Retrieve the dashboard schema."""
     try:
+        if table_name:
+            return DashboardService.get_table_schema(table_name)
         return DashboardService.get_schema()
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=_("error_schema") + f" {str(e)}"
@@ -23,10 +30,65 @@ def get_schema():
 
 
 @router.get("/analysis")
-def get_analysis():
+def get_analysis(table_name: Optional[str] = Query(None, description="Table to analyze instead of the latest file")):
     """Retrieve analysis data for the dashboard."""
     try:
+        if table_name:
+            return DashboardService.calculate_table_analysis(table_name)
         return DashboardService.calculate_some_analysis()
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=_("error_analysis") + f" {str(e)}"
+        )
+
+
+@router.get("/histogram")
+def get_histogram(
+    table_name: str = Query(..., description="Table the column belongs to"),
+    column: str = Query(..., description="Numeric column to bin"),
+    bins: Optional[int] = Query(None, ge=1, description="Maximum number of bins to return")
+):
+    """Retrieve the histogram of a numeric column, served from its stored sketch."""
+    try:
+        return DashboardService.get_table_histogram(table_name, column, bins)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=_("error_analysis") + f" {str(e)}"
+        )
+
+
+@router.get("/distinct")
+def get_distinct_counts(table_name: str = Query(..., description="Table whose columns are counted")):
+    """Retrieve estimated distinct-value counts of every column of a table."""
+    try:
+        return DashboardService.get_distinct_counts(table_name)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=_("error_analysis") + f" {str(e)}"
+        )
+
+
+@router.get("/summary")
+def get_summary(
+    table_name: Optional[str] = Query(None, description="Table to summarize instead of the latest file"),
+    top_k: int = Query(5, ge=1, le=50, description="Number of most frequent values per column"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Retrieve schema, statistics, null ratios and top values in one response, revalidated by ETag."""
+    try:
+        etag = DashboardService.get_summary_etag(table_name, top_k)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if DashboardService.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return ResultEncoder.json_response(DashboardService.get_summary(table_name, top_k, etag), headers=headers)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=_("error_analysis") + f" {str(e)}"
@@ -1,9 +1,25 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
 import numpy as np
+import pandas as pd
+from fastapi import HTTPException
 
 from utils.db_manager import DBManager
+from utils.env_manager import EnvManager
+from utils.table_stats_manager import TableStatsManager
+
+# Part of every summary ETag, so clients revalidate when the payload layout changes
+SUMMARY_FORMAT_VERSION = 1
 
 
 class DashboardService:
+    # Summaries of dataset files by ETag; tables read theirs from the column statistics store
+    _summary_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    _summary_lock = threading.Lock()
 
     @staticmethod
     def get_schema():
@@ -24,6 +40,13 @@ class DashboardService:
         db_manager = DBManager()
         df, file_name = db_manager.get_dataframe()
 
+        return {
+            "file_name": file_name,
+            "descriptive_statistics": DashboardService._describe_frame(df)
+        }
+
+    @staticmethod
+    def _describe_frame(df: pd.DataFrame):
         numeric_df = df.select_dtypes(include=["number"])
 
         # Reemplazar inf, -inf por NaN
@@ -40,7 +63,120 @@ class DashboardService:
                 str(key): (value if value is not None else 0) for key, value in stats.items()
             }
 
+        return descriptive_stats
+
+    @staticmethod
+    def get_table_schema(table_name: str):
+        metadata = DBManager().get_table_metadata(table_name)
+        if metadata is None:
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist")
+
+        return {
+            "table_name": table_name,
+            "row_count": metadata["row_count"],
+            "columns": [{"name": col["column_name"], "type": col["data_type"]} for col in metadata["columns"]]
+        }
+
+    @staticmethod
+    def calculate_table_analysis(table_name: str):
+        """
+        Computes the descriptive statistics of a table with aggregate queries in
+        SQLite instead of loading it into pandas (see TableStatsManager).
+        """
+        analysis = TableStatsManager.describe(DBManager(), table_name)
+        if analysis is None:
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist")
+        return analysis
+
+    @staticmethod
+    def get_table_histogram(table_name: str, column: str, bins: Optional[int] = None):
+        try:
+            histogram = TableStatsManager.histogram(DBManager(), table_name, column, bins)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if histogram is None:
+            raise HTTPException(status_code=404, detail=f"Column '{column}' of table '{table_name}' does not exist")
+        return histogram
+
+    @staticmethod
+    def get_distinct_counts(table_name: str):
+        distinct_counts = TableStatsManager.distinct_counts(DBManager(), table_name)
+        if distinct_counts is None:
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist")
+        return distinct_counts
+
+    @staticmethod
+    def get_summary_etag(table_name: Optional[str], top_k: int) -> str:
+        """
+        Strong ETag of a summary, derived from the table fingerprint or the dataset
+        file's identity only, so revalidating never reads the data. The fingerprint
+        rather than the version alone also catches writes made outside the ingest
+        pipeline, which leave the version untouched.
+        """
+        db_manager = DBManager()
+        if table_name:
+            version = (db_manager.engine.url.database, table_name, db_manager.get_table_fingerprint(table_name))
+        else:
+            version = db_manager.get_dataset_version()
+        digest = hashlib.sha256(repr((SUMMARY_FORMAT_VERSION, top_k, version)).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match compares weakly, so a W/ prefix added by a proxy still matches
+        return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+    @staticmethod
+    def get_summary(table_name: Optional[str], top_k: int, etag: Optional[str] = None):
+        """
+        Returns schema, descriptive statistics, null ratios and top values in one
+        payload: a table's come from its stored statistics, the latest file's from
+        one read of its cached DataFrame. File summaries are kept by ``etag``,
+        which must have been taken before the file was read.
+        """
+        if table_name:
+            summary = TableStatsManager.summarize(DBManager(), table_name, top_k)
+            if summary is None:
+                raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist")
+            return summary
+
+        with DashboardService._summary_lock:
+            summary = DashboardService._summary_cache.get(etag)
+            if summary is not None:
+                DashboardService._summary_cache.move_to_end(etag)
+                return copy.deepcopy(summary)
+
+        summary = DashboardService._summarize_latest_file(top_k)
+        if etag is not None:
+            with DashboardService._summary_lock:
+                DashboardService._summary_cache[etag] = summary
+                while len(DashboardService._summary_cache) > EnvManager.get_dataset_cache_size():
+                    DashboardService._summary_cache.popitem(last=False)
+        return copy.deepcopy(summary)
+
+    @staticmethod
+    def _summarize_latest_file(top_k: int) -> Dict[str, Any]:
+        df, file_name = DBManager().get_dataframe()
+        null_ratios = df.isna().mean() if len(df) else pd.Series(0.0, index=df.columns)
         return {
             "file_name": file_name,
-            "descriptive_statistics": descriptive_stats
+            "row_count": len(df),
+            "columns": [{"name": column, "type": str(dtype)} for column, dtype in df.dtypes.items()],
+            "descriptive_statistics": DashboardService._describe_frame(df),
+            "null_ratios": {column: float(ratio) for column, ratio in null_ratios.items()},
+            "top_values": {
+                column: [
+                    {"value": value, "count": int(count)} for value, count in df[column].value_counts().head(top_k).items()
+                ]
+                for column in df.columns
+            },
         }
+
+    @staticmethod
+    def clear_summary_cache() -> None:
+        with DashboardService._summary_lock:
+            DashboardService._summary_cache.clear()
@@ -1,51 +1,153 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import (APIRouter, Depends, File, Form, HTTPException, Path,
-                     UploadFile)
+from fastapi import (APIRouter, Depends, File, Form, Header, HTTPException,
+                     Path, Query, Response, UploadFile)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from services.file_manager_service import FileManagerService
+from utils.engine_registry import EngineRegistry
 from utils.file_manager import FileManager
+from utils.job_manager import JobManager
+from utils.result_encoder import ResultEncoder
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
 
 def get_file_manager_service():
     return FileManagerService()
 
 
-@router.post("/upload/csv/")
+def get_job_manager():
+    return JobManager()
+
+
+def _queued_response(job: dict, file_name: str) -> dict:
+    return {
+        "success": True,
+        "message": f"File '{file_name}' saved, ingestion into table '{job['table_name']}' queued",
+        "job_id": job["job_id"],
+        "phase": job["phase"],
+        "table_name": job["table_name"]
+    }
+
+
+async def _submit_upload(
+    response: Response,
+    file: UploadFile,
+    table_name: str,
+    file_format: str,
+    deduplicate: bool,
+    job_manager: JobManager,
+    file_manager_service: FileManagerService,
+) -> dict:
+    """
+    Saves an uploaded file and queues its ingestion as ``file_format``. With
+    ``deduplicate``, a file the table already holds is answered from the previous
+    upload with a 200 instead of being ingested again.
+    """
+    stored_file = await run_in_threadpool(FileManager.save_upload_file, file, table_name)
+    if deduplicate:
+        cached = await run_in_threadpool(file_manager_service.find_cached_upload, table_name, stored_file["sha256"])
+        if cached:
+            response.status_code = 200
+            return cached
+
+    job = await run_in_threadpool(
+        job_manager.submit, table_name, stored_file["path"], file_format,
+        content_hash=stored_file["sha256"], file_size=stored_file["size"]
+    )
+
+    return _queued_response(job, file.filename)
+
+
+@router.post("/upload/csv/", status_code=202)
 async def upload_csv(
+    response: Response,
     file: UploadFile = File(...),
     table_name: str = Form("default_table"),
+    force: bool = Form(False),
+    job_manager: JobManager = Depends(get_job_manager),
     file_manager_service: FileManagerService = Depends(get_file_manager_service),
 ):
-    file_location = FileManager.save_upload_file(file, table_name)
-    response = file_manager_service.upload_csv(file, file_location, table_name)
+    return await _submit_upload(response, file, table_name, "csv", not force, job_manager, file_manager_service)
 
-    return response
 
-
-@router.post("/upload/excel/")
+@router.post("/upload/excel/", status_code=202)
 async def upload_excel(
+    response: Response,
     table_name: str = Form(...),
     file: UploadFile = File(...),
+    force: bool = Form(False),
+    all_sheets: bool = Form(False),
+    job_manager: JobManager = Depends(get_job_manager),
     file_manager_service: FileManagerService = Depends(get_file_manager_service),
 ):
-    file_location = FileManager.save_upload_file(file, table_name)
-    response = file_manager_service.upload_excel(file, file_location, table_name)
+    file_format = "excel_workbook" if all_sheets else "excel"
+    return await _submit_upload(
+        response, file, table_name, file_format, not force and not all_sheets, job_manager, file_manager_service
+    )
+
 
-    return response
+@router.post("/upload/parquet/", status_code=202)
+async def upload_parquet(
+    response: Response,
+    table_name: str = Form(...),
+    file: UploadFile = File(...),
+    force: bool = Form(False),
+    job_manager: JobManager = Depends(get_job_manager),
+    file_manager_service: FileManagerService = Depends(get_file_manager_service),
+):
+    return await _submit_upload(response, file, table_name, "parquet", not force, job_manager, file_manager_service)
 
 
-@router.post("/upload/google-sheet")
+@router.post("/upload/arrow/", status_code=202)
+async def upload_arrow(
+    response: Response,
+    table_name: str = Form(...),
+    file: UploadFile = File(...),
+    force: bool = Form(False),
+    job_manager: JobManager = Depends(get_job_manager),
+    file_manager_service: FileManagerService = Depends(get_file_manager_service),
+):
+    return await _submit_upload(response, file, table_name, "arrow", not force, job_manager, file_manager_service)
+
+
+@router.post("/upload/google-sheet", status_code=202)
 async def upload_google_sheet(
     table_name: str = Form(...),
     url: str = Form(...),
-    file_manager_service: FileManagerService = Depends(get_file_manager_service)
+    job_manager: JobManager = Depends(get_job_manager),
 ):
-    response = file_manager_service.upload_google_sheet(table_name, url)
+    job = await run_in_threadpool(job_manager.submit, table_name, url, "google_sheet")
+
+    return {
+        "success": True,
+        "message": f"Google Sheet import into table '{table_name}' queued",
+        "job_id": job["job_id"],
+        "phase": job["phase"],
+        "table_name": table_name
+    }
+
 
-    return response
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: int = Path(..., description="ID of the ingestion job"),
+    job_manager: JobManager = Depends(get_job_manager),
+):
+    job = await run_in_threadpool(job_manager.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return job
+
+
+@router.get("/engine/stats")
+async def get_engine_stats():
+    return {"engines": EngineRegistry().pool_stats()}
 
 
 @router.get("/tables/", response_model=List[str])
@@ -55,19 +157,47 @@ async def get_tables(
     return file_manager_service.get_tables()
 
 
+@router.get("/tables/metadata")
+async def get_tables_metadata(
+    file_manager_service: FileManagerService = Depends(get_file_manager_service),
+):
+    return await run_in_threadpool(file_manager_service.get_tables_metadata)
+
+
 @router.get("/tables/{table_name}/data")
-async def get_all_table_data(
+async def get_table_data(
     table_name: str = Path(..., description="Name of the table to get data for"),
+    after: Optional[int] = Query(None, description="Return rows after this cursor (the previous page's next_after)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    filter: List[str] = Query([], description="Filters as column:operator:value, e.g. age:gt:30"),
+    accept: Optional[str] = Header(None),
     file_manager_service: FileManagerService = Depends(get_file_manager_service),
 ):
-    data = file_manager_service.get_all_data(table_name)
-    if not data:
-        raise HTTPException(status_code=404, detail=f"Table {table_name} not found or empty")
+    result, metadata = await run_in_threadpool(
+        file_manager_service.get_table_data, table_name, after, limit, columns, filter
+    )
+    # Arrow IPC for clients that ask for it, column-oriented JSON otherwise
+    return await run_in_threadpool(ResultEncoder.response, result, accept, metadata)
 
-    return {
-        "table_name": table_name,
-        "data": data
-    }
+
+@router.get("/tables/{table_name}/export")
+async def export_table_data(
+    table_name: str = Path(..., description="Name of the table to export"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    filter: List[str] = Query([], description="Filters as column:operator:value, e.g. age:gt:30"),
+    file_manager_service: FileManagerService = Depends(get_file_manager_service),
+):
+    content, media_type = await run_in_threadpool(
+        file_manager_service.export_table, table_name, format, columns, filter
+    )
+    extension = "csv" if format == "csv" else "ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{extension}"'}
+    )
 
 
 @router.delete("/tables/{table_name}")
@@ -97,23 +227,30 @@ async def delete_table(
         )
 
 
-@router.put("/tables/{table_name}")
+@router.put("/tables/{table_name}", status_code=202)
 async def update_table(
     table_name: str = Path(..., description="Name of the table to update"),
     file: UploadFile = File(...),
     replace: bool = Form(False),
-    file_manager_service: FileManagerService = Depends(get_file_manager_service),
+    job_manager: JobManager = Depends(get_job_manager),
 ):
-    file_location = FileManager.save_upload_file(file, table_name)
-
     if file.filename.endswith(".csv"):
-        response = file_manager_service.update_table_from_csv(table_name, file_location, replace)
+        file_format = "csv"
     elif file.filename.endswith((".xlsx", ".xls")):
-        response = file_manager_service.update_table_from_excel(table_name, file_location, replace)
+        file_format = "excel"
+    elif file.filename.endswith(".parquet"):
+        file_format = "parquet"
+    elif file.filename.endswith((".arrow", ".feather", ".ipc")):
+        file_format = "arrow"
     else:
         raise HTTPException(status_code=400, detail="Unsupported file format")
 
-    return {"message": "Successfully updated table"}
+    stored_file = await run_in_threadpool(FileManager.save_upload_file, file, table_name)
+    job = await run_in_threadpool(
+        job_manager.submit, table_name, stored_file["path"], file_format, operation="update", replace=replace
+    )
+
+    return _queued_response(job, file.filename)
 
 
 @router.get("/tables/{table_name}/info")
@@ -133,7 +270,7 @@ async def update_google_sheets(
     file_manager_service: FileManagerService = Depends(get_file_manager_service),
 ):
     try:
-        file_manager_service.fetch_and_update_google_sheets()
-        return {"message": "Google Sheets updated successfully"}
+        result = await run_in_threadpool(file_manager_service.fetch_and_update_google_sheets)
+        return {"message": "Google Sheets updated successfully", **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating Google Sheets: {str(e)}")
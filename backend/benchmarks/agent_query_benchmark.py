@@ -0,0 +1,126 @@
+"""
+Benchmark for answering a chat question with the SQL agent on a large table.
+
+The LLM is a local stand-in that replays a fixed script (call sql_db_query with
+the question's SQL, then answer), so the figures only contain the agent loop,
+SQLite and building the result, never a network round-trip. Per row count and
+question it reports the median milliseconds of one answer with:
+
+* reexecute:  the stock sql_db_query tool, after which the first query of the
+              intermediate steps is executed again to build the columnar result,
+              as query_nlp used to
+* capture:    AgentManager.query_nlp, whose query tool keeps the result it
+              already computed for the LLM
+
+The answer cache is disabled (ANSWER_CACHE_SIZE=0) so every answer runs the
+agent.
+
+Usage (from the backend directory):
+    python benchmarks/agent_query_benchmark.py --rows 1000000 5000000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+QUESTIONS = {
+    "aggregate": "SELECT region, COUNT(*) AS orders, SUM(amount) AS revenue FROM orders GROUP BY region",
+    "top 1000": "SELECT id, region, amount FROM orders WHERE quantity > 3 ORDER BY amount DESC LIMIT 1000",
+}
+
+
+def frame(start: int, rows: int) -> pd.DataFrame:
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": (ids * 37 % 100_000) / 100.0,
+        "quantity": ids % 17,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+    })
+
+
+def scripted_llm(sql_query: str):
+    from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+    from langchain_core.messages import AIMessage
+
+    return FakeMessagesListChatModel(responses=[
+        AIMessage(content="", additional_kwargs={
+            "function_call": {"name": "sql_db_query", "arguments": json.dumps({"query": sql_query})}
+        }),
+        AIMessage(content="Here is the result."),
+    ])
+
+
+def reexecute_answer(executor, engine, question: str) -> dict:
+    from sqlalchemy import text
+
+    from utils.result_encoder import ColumnarResult
+
+    response = executor.invoke({"input": question})
+    sql_query = None
+    for step in response.get("intermediate_steps", []):
+        tool_input = step[0].tool_input if hasattr(step[0], "tool_input") else {}
+        if isinstance(tool_input, dict) and "query" in tool_input:
+            sql_query = tool_input["query"]
+            break
+    with engine.connect() as conn:
+        return ColumnarResult.from_cursor(conn.execute(text(sql_query))).to_dict()
+
+
+def median_ms(answer, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        answer()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        from langchain_community.agent_toolkits.sql.base import create_sql_agent
+
+        from utils.agent_manager import AgentManager
+        from utils.db_manager import DBManager
+        from utils.ingest_manager import IngestManager
+
+        db_manager = DBManager()
+        print(f"{'rows':>9} {'question':>10} {'reexecute':>10} {'capture':>9} {'speedup':>8}")
+        for rows in args.rows:
+            chunks = (frame(start, min(100_000, rows - start)) for start in range(0, rows, 100_000))
+            IngestManager.ingest_chunks(chunks, "orders", db_manager)
+            db = db_manager.get_connection()
+            for name, sql_query in QUESTIONS.items():
+                stock = create_sql_agent(
+                    llm=scripted_llm(sql_query), db=db, agent_type="openai-functions",
+                    agent_executor_kwargs={"return_intermediate_steps": True}, top_k=1000,
+                )
+                agent = object.__new__(AgentManager)
+                agent._initialize(db, scripted_llm(sql_query))
+                assert reexecute_answer(stock, db_manager.engine, name) == agent.query_nlp(name)["query_result"]
+
+                reexecute = median_ms(lambda: reexecute_answer(stock, db_manager.engine, name), args.repeat)
+                capture = median_ms(lambda: agent.query_nlp(name), args.repeat)
+                print(f"{rows:>9} {name:>10} {reexecute:>10.1f} {capture:>9.1f} {reexecute / capture:>7.2f}x")
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
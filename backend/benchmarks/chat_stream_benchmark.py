@@ -0,0 +1,153 @@
+"""
+Benchmark for the time until a chat question shows something to the user.
+
+Serves the app with uvicorn on a local port and asks one question over real HTTP,
+so response buffering is what a browser would see. The LLM is a local stand-in
+that replays a fixed script (call sql_db_query, then answer in --answer-words
+words) and sleeps --llm-latency seconds per call, like a remote model's round
+trip. Reported per endpoint, median seconds over --repeat questions:
+
+* blocking:  POST /api/chats/{id}, whose first byte is the whole answer
+* stream:    POST /api/chats/{id}/stream, split into first byte (``start``),
+             first ``result`` event, first answer ``token`` and ``done``
+
+The answer cache is disabled (ANSWER_CACHE_SIZE=0) so every question runs the
+agent.
+
+Usage (from the backend directory):
+    python benchmarks/chat_stream_benchmark.py --rows 1000000 --llm-latency 2
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SQL_QUERY = "SELECT region, COUNT(*) AS orders, SUM(amount) AS revenue FROM orders GROUP BY region"
+
+
+def frame(start: int, rows: int) -> pd.DataFrame:
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": (ids * 37 % 100_000) / 100.0,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+    })
+
+
+def scripted_llm(latency: float, answer_words: int):
+    from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel, GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    class SlowScriptedChatModel(FakeMessagesListChatModel):
+        def _generate(self, *args, **kwargs):
+            time.sleep(latency)
+            return super()._generate(*args, **kwargs)
+
+        _stream = GenericFakeChatModel._stream
+
+    return SlowScriptedChatModel(responses=[
+        AIMessage(content="", additional_kwargs={
+            "function_call": {"name": "sql_db_query", "arguments": json.dumps({"query": SQL_QUERY})}
+        }),
+        AIMessage(content=" ".join(f"word{i}" for i in range(answer_words))),
+    ])
+
+
+def serve(app) -> str:
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def blocking(http, url: str) -> float:
+    start = time.perf_counter()
+    http.post(url, json={"question": "Revenue per region?"}).raise_for_status()
+    return time.perf_counter() - start
+
+
+def streaming(http, url: str) -> dict:
+    marks = {}
+    start = time.perf_counter()
+    with http.stream("POST", f"{url}/stream", json={"question": "Revenue per region?"}) as response:
+        for line in response.iter_lines():
+            if not line.startswith("event: "):
+                continue
+            event = line[len("event: "):]
+            marks.setdefault("first byte" if event in ("start", "queued") else event, time.perf_counter() - start)
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--answer-words", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'metadata.sqlite')}"
+        import httpx
+
+        from database.models.base import Base
+        from database.models.chat import Chat
+        from database.session import SessionLocal, engine
+        from main import app
+        from utils.agent_manager import AgentManager
+        from utils.auth_manager import AuthManager
+        from utils.db_manager import DBManager
+        from utils.ingest_manager import IngestManager
+
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            db.add(Chat(id=1, name="Benchmark", user_id=1))
+            db.commit()
+        app.dependency_overrides[AuthManager.get_current_user] = lambda: 1
+
+        db_manager = DBManager()
+        chunks = (frame(start, min(100_000, args.rows - start)) for start in range(0, args.rows, 100_000))
+        IngestManager.ingest_chunks(chunks, "orders", db_manager)
+        agent = object.__new__(AgentManager)
+        agent._initialize(db_manager.get_connection(), scripted_llm(args.llm_latency, args.answer_words))
+        import apps.chat.routes
+        apps.chat.routes.agent = agent
+
+        url = f"{serve(app)}/api/chats/1"
+        with httpx.Client(timeout=None) as http:
+            whole = statistics.median(blocking(http, url) for _ in range(args.repeat))
+            runs = [streaming(http, url) for _ in range(args.repeat)]
+        marks = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+        print(f"rows={args.rows} llm latency={args.llm_latency}s answer words={args.answer_words}")
+        print(f"{'endpoint':>9} {'first byte':>11} {'result':>8} {'token':>8} {'done':>8}")
+        print(f"{'blocking':>9} {whole:>11.3f} {whole:>8.3f} {whole:>8.3f} {whole:>8.3f}")
+        print(
+            f"{'stream':>9} {marks['first byte']:>11.3f} {marks['result']:>8.3f} "
+            f"{marks['token']:>8.3f} {marks['done']:>8.3f}"
+        )
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark for the column sketches behind the dashboard statistics.
+
+Streams a synthetic numeric column (lognormal) and a text column (Zipf-like
+categories) through ColumnStats in ingest-sized chunks, without SQLite, and
+reports per row count:
+
+* seconds and million rows per second spent in ColumnStats for both columns
+  together (generating the data is not counted)
+* serialized size of the numeric column's KLL sketch, HyperLogLog and histogram
+* growth of the process' peak RSS in MB, which with --exact includes the
+  retained column
+* with --exact (needs the whole column in memory): the largest rank error of
+  the quartile and decile estimates and the relative error of the distinct
+  counts, against NumPy on the full column
+
+Usage (from the backend directory):
+    python benchmarks/column_sketch_benchmark.py --rows 1000000 10000000 --exact
+    python benchmarks/column_sketch_benchmark.py --rows 100000000
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+FRACTIONS = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def chunk(start: int, rows: int):
+    rng = np.random.default_rng(start)
+    numbers = np.round(rng.lognormal(3, 1, rows), 2)
+    categories = np.char.add("category ", (rng.zipf(1.3, rows) % 50_000).astype(str)).astype(object)
+    return numbers, categories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--exact", action="store_true")
+    args = parser.parse_args()
+
+    from utils.column_stats import ColumnStats
+
+    print(f"{'rows':>11} {'s':>7} {'Mrows/s':>8} {'KLL KB':>7} {'HLL KB':>7} {'hist KB':>8} "
+          f"{'+RSS MB':>8} {'rank err':>9} {'num err':>8} {'text err':>9}")
+    for rows in args.rows:
+        before = peak_rss_mb()
+        numeric, text = ColumnStats(), ColumnStats(numeric=False)
+        kept = []
+        seconds = 0.0
+        for start in range(0, rows, args.chunk_size):
+            numbers, categories = chunk(start, min(args.chunk_size, rows - start))
+            start_time = time.perf_counter()
+            numeric.merge(ColumnStats.from_values(numbers))
+            text.merge(ColumnStats.from_text(categories))
+            seconds += time.perf_counter() - start_time
+            if args.exact:
+                kept.append((numbers, categories))
+        rss = peak_rss_mb() - before
+
+        rank_error = numeric_error = text_error = float("nan")
+        if args.exact:
+            numbers = np.sort(np.concatenate([numbers for numbers, _ in kept]))
+            categories = np.concatenate([categories for _, categories in kept])
+            estimates = numeric.sketch.quantiles(FRACTIONS)
+            rank_error = max(
+                abs(np.searchsorted(numbers, estimate, side="right") / rows - fraction)
+                for fraction, estimate in zip(FRACTIONS, estimates)
+            )
+            numeric_error = numeric.distinct.estimate() / len(np.unique(numbers)) - 1
+            text_error = text.distinct.estimate() / len(set(categories)) - 1
+
+        print(
+            f"{rows:>11} {seconds:>7.1f} {rows / seconds / 1e6:>8.2f} "
+            f"{len(numeric.sketch.to_bytes()) / 1024:>7.1f} {len(numeric.distinct.to_bytes()) / 1024:>7.1f} "
+            f"{len(numeric.histogram.to_bytes()) / 1024:>8.1f} {rss:>8.1f} "
+            f"{rank_error:>9.4f} {numeric_error:>8.4f} {text_error:>9.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
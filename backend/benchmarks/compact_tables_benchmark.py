@@ -0,0 +1,138 @@
+"""
+Benchmark for dtype-aware table creation.
+
+Generates a synthetic sales CSV and loads it two ways, each into its own
+analytics database:
+
+* legacy:  pd.read_csv + DataFrame.to_sql (loosely typed columns)
+* compact: IngestManager.stream_csv with inferred tight types
+
+For every variant it reports the database file size, the size of the pages in
+use, the size of the Parquet sidecar and the best-of-N time of full-scan
+queries.
+
+Usage (from the backend directory):
+    python benchmarks/compact_tables_benchmark.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+GENERATE_BLOCK_SIZE = 500_000
+SCAN_QUERIES = {
+    "group by": "SELECT category, store, SUM(quantity * price) FROM sales GROUP BY category, store",
+    "date filter": "SELECT COUNT(*), AVG(price) FROM sales WHERE order_date >= '2024-06-01'",
+    "cost sum": "SELECT SUM(unit_cost * quantity) FROM sales",
+}
+
+
+def generate_csv(path: str, rows: int) -> None:
+    rng = np.random.default_rng(7)
+    stores = np.array([f"Store {index:02d}" for index in range(40)])
+    categories = np.array(["tools", "food", "toys", "office", "garden", "sports", "books", "music"])
+    dates = pd.date_range("2024-01-01", "2024-12-31").strftime("%Y-%m-%d").to_numpy()
+    written = 0
+    header = True
+    while written < rows:
+        size = min(GENERATE_BLOCK_SIZE, rows - written)
+        quantity = rng.integers(1, 20, size=size).astype(float)
+        quantity[rng.random(size=size) < 0.01] = np.nan
+        block = pd.DataFrame({
+            "id": np.arange(written + 1, written + size + 1),
+            "order_date": rng.choice(dates, size=size),
+            "store": rng.choice(stores, size=size),
+            "category": rng.choice(categories, size=size),
+            "quantity": quantity,
+            "price": np.round(rng.random(size=size) * 100, 2),
+            # Spreadsheet exports often carry numbers as padded text
+            "unit_cost": np.char.add(" ", np.round(rng.random(size=size) * 50, 2).astype(str)),
+        })
+        block.to_csv(path, mode="a", header=header, index=False)
+        header = False
+        written += size
+
+
+def load(variant: str, csv_path: str, chunksize: int) -> None:
+    from utils.db_manager import DBManager
+    from utils.ingest_manager import IngestManager
+
+    db_manager = DBManager()
+    if variant == "legacy":
+        if_exists = "replace"
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            chunk.to_sql("sales", db_manager.engine, if_exists=if_exists, index=False)
+            if_exists = "append"
+    else:
+        IngestManager.stream_csv(csv_path, "sales", db_manager, chunksize=chunksize)
+    db_manager.engine.dispose()
+
+
+def used_mb() -> float:
+    from utils.db_manager import DBManager
+
+    engine = DBManager().engine
+    with engine.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        used_pages = conn.exec_driver_sql("PRAGMA page_count").scalar() - conn.exec_driver_sql(
+            "PRAGMA freelist_count"
+        ).scalar()
+    engine.dispose()
+    return used_pages * page_size / 1024 ** 2
+
+
+def scan_seconds(query: str, repeat: int) -> float:
+    from utils.db_manager import DBManager
+
+    engine = DBManager().engine
+    best = float("inf")
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.exec_driver_sql(query).fetchall()
+            best = min(best, time.perf_counter() - start)
+    engine.dispose()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "sales.csv")
+        generate_csv(csv_path, args.rows)
+        print(f"{args.rows} rows, CSV {os.path.getsize(csv_path) / 1024 ** 2:.1f} MB")
+        print(f"{'variant':>12} {'load s':>8} {'file MB':>8} {'used MB':>8} {'parquet MB':>10} "
+              + " ".join(f"{name + ' s':>14}" for name in SCAN_QUERIES))
+
+        for variant in ("legacy", "compact"):
+            variant_dir = os.path.join(workdir, variant)
+            os.makedirs(os.path.join(variant_dir, "data"))
+            os.chdir(variant_dir)
+
+            start = time.perf_counter()
+            load(variant, csv_path, args.chunksize)
+            load_seconds = time.perf_counter() - start
+
+            size_mb = os.path.getsize(os.path.join("data", "db.sqlite")) / 1024 ** 2
+            scans = [scan_seconds(query, args.repeat) for query in SCAN_QUERIES.values()]
+            sidecar_path = os.path.join("data", "columnar", "sales.parquet")
+            sidecar_mb = f"{os.path.getsize(sidecar_path) / 1024 ** 2:.1f}" if os.path.exists(sidecar_path) else "-"
+            print(f"{variant:>12} {load_seconds:>8.2f} {size_mb:>8.1f} {used_mb():>8.1f} {sidecar_mb:>10} "
+                  + " ".join(f"{value:>14.3f}" for value in scans))
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark for streaming CSV ingestion.
+
+Generates synthetic inventory CSV files and ingests each one in a fresh
+process, reporting throughput (rows/s) and peak RSS.
+
+Usage (from the backend directory):
+    python benchmarks/csv_ingest_benchmark.py --rows 1000000 10000000 50000000
+    python benchmarks/csv_ingest_benchmark.py --rows 1000000 --legacy
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+GENERATE_BLOCK_SIZE = 500_000
+
+
+def generate_csv(path: str, rows: int) -> None:
+    rng = np.random.default_rng(42)
+    written = 0
+    header = True
+    while written < rows:
+        size = min(GENERATE_BLOCK_SIZE, rows - written)
+        ids = np.arange(written + 1, written + size + 1)
+        block = pd.DataFrame({
+            "id": ids,
+            "product": np.char.add("product_", (ids % 5000).astype(str)),
+            "category": rng.choice(["tools", "food", "toys", "office"], size=size),
+            "stock": rng.integers(0, 1000, size=size),
+            "price": rng.random(size=size) * 100,
+        })
+        block.to_csv(path, mode="a", header=header, index=False)
+        header = False
+        written += size
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives fork+exec and would include the generator's footprint,
+    # so prefer the per-image high-water mark when /proc is available.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_single(csv_path: str, workdir: str, legacy: bool) -> None:
+    os.chdir(workdir)
+    os.makedirs("data", exist_ok=True)
+
+    from utils.db_manager import DBManager
+    from utils.ingest_manager import IngestManager
+
+    db_manager = DBManager()
+    start = time.perf_counter()
+    if legacy:
+        df = pd.read_csv(csv_path)
+        df.to_sql("benchmark", db_manager.engine, if_exists="replace", index=False)
+        row_count = len(df)
+    else:
+        row_count = IngestManager.stream_csv(csv_path, "benchmark", db_manager)["row_count"]
+    elapsed = time.perf_counter() - start
+
+    print(f"{row_count},{elapsed:.2f},{row_count / elapsed:.0f},{peak_rss_mb():.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--legacy", action="store_true", help="Use pd.read_csv + to_sql instead of streaming")
+    parser.add_argument("--single", nargs=2, metavar=("CSV", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single[0], args.single[1], args.legacy)
+        return
+
+    mode = "legacy" if args.legacy else "streaming"
+    print(f"{'rows':>12} {'mode':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = os.path.join(workdir, "inventory.csv")
+            generate_csv(csv_path, rows)
+
+            command = [sys.executable, os.path.abspath(__file__), "--single", csv_path, workdir]
+            if args.legacy:
+                command.append("--legacy")
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip()
+            row_count, seconds, rate, rss = output.splitlines()[-1].split(",")
+            print(f"{int(row_count):>12} {mode:>10} {float(seconds):>9.2f} {int(rate):>10} {int(rss):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark for the dashboard's descriptive statistics.
+
+Ingests an analytics table with four numeric and one text column and compares:
+
+* pandas:   reading the whole table into a DataFrame and calling describe(),
+            which is what the file-based dashboard analysis does
+* store:    TableStatsManager.describe on current statistics, i.e. a request
+* append:   appending a 1% batch, whose statistics are merged into the stored
+            ones (reported without the row inserts, which every strategy pays)
+* stale:    TableStatsManager.describe after a write outside ingest, served by
+            SQL aggregates (or a sample past STATS_EXACT_MAX_ROWS) without
+            touching the stored statistics
+* rebuild:  ColumnStatsStore.rebuild, the streaming scan ingest runs after such
+            a write to make the stored statistics current again
+
+Reported per table size: median milliseconds over --repeat runs and the growth
+of the process' peak RSS in MB during the first run of each strategy.
+
+Usage (from the backend directory):
+    python benchmarks/dashboard_stats_benchmark.py --rows 100000 2000000
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def frame(start: int, rows: int) -> pd.DataFrame:
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": (ids * 37 % 100_000) / 100.0,
+        "quantity": ids % 17,
+        "epoch": 1_700_000_000 + ids % 86_400,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+    })
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(function, repeat: int):
+    before = peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, peak_rss_mb() - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 2_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from utils.columnar_store import ColumnarStore
+    from utils.db_manager import DBManager
+    from utils.column_stats import ColumnStatsStore
+    from utils.ingest_manager import IngestManager
+    from utils.schema_manager import SchemaManager
+    from utils.table_stats_manager import TableStatsManager
+
+    ColumnarStore.write_table = staticmethod(lambda *a, **k: None)
+
+    print(f"{'rows':>9} {'strategy':>9} {'ms':>9} {'+RSS MB':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        db_manager = DBManager()
+        for rows in args.rows:
+            chunks = (frame(start, min(200_000, rows - start)) for start in range(0, rows, 200_000))
+            IngestManager.ingest_chunks(chunks, f"orders_{rows}", db_manager)
+            table = f"orders_{rows}"
+
+            def rebuild():
+                with db_manager.engine.connect() as conn:
+                    ColumnStatsStore.rebuild(conn, table)
+
+            def store():
+                TableStatsManager.describe(db_manager, table)
+
+            batch = frame(rows, max(1, rows // 100))
+
+            def append():
+                with db_manager.engine.begin() as conn:
+                    stored = ColumnStatsStore.current(conn, table)
+                    stats = ColumnStatsStore.collect(batch, SchemaManager.get_column_types(conn, table))
+                    ColumnStatsStore.record_append(conn, table, stored, stats, SchemaManager.get_table_version(conn, table))
+
+            def with_pandas():
+                df = pd.read_sql(f"SELECT * FROM {table}", db_manager.engine)
+                df.select_dtypes(include=["number"]).describe()
+
+            def stale():
+                TableStatsManager.clear_cache()
+                TableStatsManager.describe(db_manager, table)
+
+            def make_stale():
+                with db_manager.engine.begin() as conn:
+                    SchemaManager.bump_table_version(conn, table)
+
+            # The store strategies run first so their RSS is not hidden by the pandas peak
+            strategies = (
+                ("store", store), ("append", append), (None, make_stale),
+                ("stale", stale), ("rebuild", rebuild), ("pandas", with_pandas),
+            )
+            for name, function in strategies:
+                if name is None:
+                    function()
+                    continue
+                milliseconds, rss = measure(function, args.repeat)
+                print(f"{rows:>9} {name:>9} {milliseconds:>9.1f} {rss:>9.1f}")
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
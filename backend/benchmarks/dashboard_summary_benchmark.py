@@ -0,0 +1,100 @@
+"""
+Benchmark for the combined dashboard summary.
+
+Writes the latest dataset as a CSV file and ingests the same rows as a table,
+then measures through the HTTP API (FastAPI's TestClient):
+
+* separate:    GET /dashboard/ followed by GET /dashboard/analysis, as the
+               dashboard used to load
+* first:       the first GET /dashboard/summary of a dataset version, which
+               computes schema, statistics, null ratios and top values
+* summary:     GET /dashboard/summary once that version's summary is known
+* revalidate:  GET /dashboard/summary with the ETag of the previous response in
+               If-None-Match, answered with 304
+
+The file is in the dataset cache and the table's column statistics are stored
+before anything is measured. Every figure but ``first`` is the median
+milliseconds over --repeat requests.
+
+Usage (from the backend directory):
+    python benchmarks/dashboard_summary_benchmark.py --rows 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def frame(rows: int) -> pd.DataFrame:
+    ids = np.arange(rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": np.where(ids % 9 == 0, np.nan, (ids * 37 % 100_000) / 100.0),
+        "quantity": ids % 17,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+        "note": [f"note {i % 1000}" for i in ids],
+    })
+
+
+def median_ms(request, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+        from fastapi.testclient import TestClient
+
+        from main import app
+        from utils.db_manager import DBManager
+        from utils.ingest_manager import IngestManager
+
+        client = TestClient(app)
+        print(f"{'rows':>9} {'source':>6} {'separate':>9} {'first':>9} {'summary':>9} {'revalidate':>11}")
+        for rows in args.rows:
+            df = frame(rows)
+            df.to_csv(os.path.join("data", "orders.csv"), index=False)
+            IngestManager.ingest_chunks([df], "orders", DBManager())
+            for source, params in (("file", {}), ("table", {"table_name": "orders"})):
+                def separate():
+                    client.get("/api/dashboard/", params=params)
+                    client.get("/api/dashboard/analysis", params=params)
+
+                # Warms the dataset cache and the stored column statistics
+                separate()
+                start = time.perf_counter()
+                etag = client.get("/api/dashboard/summary", params=params).headers["etag"]
+                first = (time.perf_counter() - start) * 1000
+                summary = median_ms(lambda: client.get("/api/dashboard/summary", params=params), args.repeat)
+                revalidate = median_ms(
+                    lambda: client.get("/api/dashboard/summary", params=params, headers={"If-None-Match": etag}),
+                    args.repeat
+                )
+                print(
+                    f"{rows:>9} {source:>6} {median_ms(separate, args.repeat):>9.1f} {first:>9.1f} "
+                    f"{summary:>9.1f} {revalidate:>11.1f}"
+                )
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
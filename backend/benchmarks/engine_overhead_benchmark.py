@@ -0,0 +1,104 @@
+"""
+Benchmark for the per-request cost of reaching the analytics database.
+
+Creates an analytics database with a number of tables and times two request
+shapes, each the way they ran before the engine registry and with it:
+
+* table list: construct a DBManager and list the tables (/tables/ routes)
+* agent db:   construct a DBManager and ask its SQLDatabase for the usable tables
+
+"before" rebuilds what DBManager used to do on every construction: a new engine
+plus a SQLDatabase that reflects every table. "after" uses DBManager as it is now.
+Figures are mean milliseconds per request.
+
+Usage (from the backend directory):
+    python benchmarks/engine_overhead_benchmark.py --tables 50 --requests 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def create_tables(tables: int) -> None:
+    from utils.db_manager import DBManager
+
+    with DBManager().engine.begin() as conn:
+        for index in range(tables):
+            conn.exec_driver_sql(
+                f"CREATE TABLE table_{index:03d} (id INTEGER, name TEXT, amount REAL, created_at TIMESTAMP)"
+            )
+            conn.exec_driver_sql(f"INSERT INTO table_{index:03d} VALUES (1, 'a', 1.5, '2024-01-01 00:00:00')")
+
+
+class LegacyDBManager:
+    """DBManager construction before the registry: a new engine and a full reflection."""
+
+    def __init__(self):
+        from langchain_community.utilities import SQLDatabase
+        from sqlalchemy import create_engine
+
+        from utils.engine_registry import enable_transactional_ddl
+
+        engine = create_engine(f"sqlite:///{os.path.abspath('data/db.sqlite')}")
+        enable_transactional_ddl(engine)
+        self.engine = engine
+        with engine.connect() as conn:
+            internal = [row[0] for row in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND substr(name, 1, 2) = '__'"
+            )]
+        self.db = SQLDatabase(engine=engine, view_support=True, ignore_tables=internal)
+
+    def get_table_names(self):
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+
+
+def mean_ms(requests: int, request) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        request()
+    return (time.perf_counter() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+
+        from utils.db_manager import DBManager
+        from utils.engine_registry import EngineRegistry
+
+        create_tables(args.tables)
+
+        results = {
+            "table list": (
+                mean_ms(args.requests, lambda: LegacyDBManager().get_table_names()),
+                mean_ms(args.requests, lambda: DBManager().get_table_names()),
+            ),
+            "agent db": (
+                mean_ms(args.requests, lambda: LegacyDBManager().db.get_usable_table_names()),
+                mean_ms(args.requests, lambda: DBManager().db.get_usable_table_names()),
+            ),
+        }
+
+        print(f"{args.tables} tables, {args.requests} requests")
+        print(f"{'request':>12} {'before ms':>10} {'after ms':>10}")
+        for name, (before, after) in results.items():
+            print(f"{name:>12} {before:>10.3f} {after:>10.3f}")
+        print(EngineRegistry().pool_stats()[0])
+        EngineRegistry().dispose()
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark for Excel ingestion.
+
+Generates synthetic inventory workbooks and ingests each one in a fresh
+process, reporting throughput (rows/s) and peak RSS. With ``--sheets`` the
+rows are split across several worksheets, which the streaming path loads in
+parallel.
+
+Usage (from the backend directory):
+    python benchmarks/excel_ingest_benchmark.py --rows 100000 1000000
+    python benchmarks/excel_ingest_benchmark.py --rows 1000000 --sheets 4
+    python benchmarks/excel_ingest_benchmark.py --rows 100000 --legacy
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from csv_ingest_benchmark import peak_rss_mb  # noqa: E402
+
+CATEGORIES = ["tools", "food", "toys", "office"]
+
+
+def generate_workbook(path: str, rows: int, sheets: int) -> None:
+    rng = np.random.default_rng(42)
+    workbook = Workbook(write_only=True)
+    per_sheet = -(-rows // sheets)
+    written = 0
+    for index in range(sheets):
+        worksheet = workbook.create_sheet(f"Inventory {index + 1}")
+        worksheet.append(["id", "product", "category", "stock", "price"])
+        size = min(per_sheet, rows - written)
+        stock = rng.integers(0, 1000, size=size).tolist()
+        price = (rng.random(size=size) * 100).tolist()
+        for offset in range(size):
+            row_id = written + offset + 1
+            worksheet.append([row_id, f"product_{row_id % 5000}", CATEGORIES[row_id % 4], stock[offset], price[offset]])
+        written += size
+    workbook.save(path)
+
+
+def run_single(excel_path: str, workdir: str, legacy: bool) -> None:
+    os.chdir(workdir)
+    os.makedirs("data", exist_ok=True)
+
+    from utils.db_manager import DBManager
+    from utils.ingest_manager import IngestManager
+
+    db_manager = DBManager()
+    start = time.perf_counter()
+    if legacy:
+        row_count = 0
+        for sheet, df in pd.read_excel(excel_path, sheet_name=None).items():
+            df.to_sql(IngestManager.sheet_table_name("benchmark", sheet), db_manager.engine,
+                      if_exists="replace", index=False)
+            row_count += len(df)
+    elif len(IngestManager.get_sheet_names(excel_path)) > 1:
+        row_count = IngestManager.stream_excel_workbook(excel_path, "benchmark", db_manager)["row_count"]
+    else:
+        row_count = IngestManager.stream_excel(excel_path, "benchmark", db_manager)["row_count"]
+    elapsed = time.perf_counter() - start
+
+    print(f"{row_count},{elapsed:.2f},{row_count / elapsed:.0f},{peak_rss_mb():.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--sheets", type=int, default=1, help="Number of worksheets to split the rows across")
+    parser.add_argument("--legacy", action="store_true", help="Use pd.read_excel + to_sql instead of streaming")
+    parser.add_argument("--single", nargs=2, metavar=("XLSX", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single[0], args.single[1], args.legacy)
+        return
+
+    mode = "legacy" if args.legacy else "streaming"
+    print(f"{'rows':>12} {'sheets':>7} {'mode':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            excel_path = os.path.join(workdir, "inventory.xlsx")
+            generate_workbook(excel_path, rows, args.sheets)
+
+            command = [sys.executable, os.path.abspath(__file__), "--single", excel_path, workdir]
+            if args.legacy:
+                command.append("--legacy")
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip()
+            row_count, seconds, rate, rss = output.splitlines()[-1].split(",")
+            print(f"{int(row_count):>12} {args.sheets:>7} {mode:>10} {float(seconds):>9.2f} {int(rate):>10} {int(rss):>12}")
+
+
+if __name__ == "__main__":
+    main()
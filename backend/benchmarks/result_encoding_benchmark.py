@@ -0,0 +1,93 @@
+"""
+Serialization benchmark for query results.
+
+Builds a SQLite table with integer, float, text, date and nullable columns and,
+for the same 100k-row SELECT, compares:
+
+* legacy: fetchall, a per-column list comprehension into a dict, then FastAPI's
+  default JSONResponse path (jsonable_encoder + json.dumps)
+* orjson: ColumnarResult.from_cursor + ResultEncoder.to_json
+* arrow:  ColumnarResult.from_cursor + ResultEncoder.to_arrow_ipc (stream format)
+
+Reported per encoder: median milliseconds from executed cursor to response body
+over --repeat runs, and the payload size in MB (raw and gzip-compressed).
+
+Usage (from the backend directory):
+    python benchmarks/result_encoding_benchmark.py --rows 100000 --repeat 5
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.result_encoder import ColumnarResult, ResultEncoder  # noqa: E402
+
+QUERY = "SELECT id, region, amount, quantity, ordered_at, note FROM orders"
+
+
+def seed(engine, rows: int):
+    ids = np.arange(rows)
+    pd.DataFrame({
+        "id": ids,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+        "amount": (ids * 37 % 100_000) / 100.0,
+        "quantity": ids % 17,
+        "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(ids % 365, unit="D"),
+        "note": np.where(ids % 3 == 0, None, "regular order"),
+    }).to_sql("orders", engine, index=False)
+
+
+def legacy(result) -> bytes:
+    rows = result.fetchall()
+    keys = result.keys()
+    data = {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+    return json.dumps(
+        jsonable_encoder({"success": True, "message": None, "response": {"query_result": data}}),
+        ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def orjson_columnar(result) -> bytes:
+    return ResultEncoder.to_json(ColumnarResult.from_cursor(result))
+
+
+def arrow_columnar(result) -> bytes:
+    return ResultEncoder.to_arrow_ipc(ColumnarResult.from_cursor(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, args.rows)
+
+    print(f"{args.rows} rows x 6 columns, median of {args.repeat} runs")
+    print(f"{'encoder':>8} {'ms':>9} {'MB':>9} {'gzip MB':>9}")
+    for name, encode in (("legacy", legacy), ("orjson", orjson_columnar), ("arrow", arrow_columnar)):
+        timings = []
+        for _ in range(args.repeat):
+            with engine.connect() as conn:
+                result = conn.exec_driver_sql(QUERY)
+                start = time.perf_counter()
+                body = encode(result)
+                timings.append(time.perf_counter() - start)
+        compressed = len(gzip.compress(body, compresslevel=6))
+        print(f"{name:>8} {statistics.median(timings) * 1000:>9.1f} {len(body) / 1e6:>9.2f} {compressed / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark for random row sampling.
+
+Builds an analytics table of each requested size directly in SQLite, deletes a
+tenth of its rows so that the rowid range has gaps, and compares:
+
+* order by random: the previous SELECT * ... ORDER BY RANDOM() LIMIT k
+* rowid probe:     SamplingManager with an empty cache
+* stratified:      SamplingManager stratified by a five-valued column
+* cached:          DBManager.get_sample_data on an unchanged table
+
+Every figure is the best-of-N wall time for a sample of k rows.
+
+Usage (from the backend directory):
+    python benchmarks/sampling_benchmark.py --rows 10000 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def build_table(rows: int) -> None:
+    from utils.db_manager import DBManager
+
+    engine = DBManager().engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS events")
+        conn.exec_driver_sql("CREATE TABLE events (id INTEGER, region TEXT, amount REAL, note TEXT)")
+        conn.exec_driver_sql(
+            "INSERT INTO events WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?) "
+            "SELECT n, 'region ' || (n % 5), (n * 37 % 1000) / 10.0, printf('event %08d', n) FROM seq",
+            (rows,)
+        )
+        conn.exec_driver_sql("DELETE FROM events WHERE id % 10 = 3")
+    engine.dispose()
+
+
+def best_of(repeat: int, function) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--sample", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.chdir(workdir)
+
+        from utils.db_manager import DBManager
+        from utils.sampling_manager import SamplingManager
+
+        print(f"k = {args.sample}")
+        print(f"{'rows':>10} {'build s':>8} {'order by random s':>18} {'rowid probe s':>14} "
+              f"{'stratified s':>13} {'cached s':>9}")
+        for rows in args.rows:
+            start = time.perf_counter()
+            build_table(rows)
+            build_seconds = time.perf_counter() - start
+
+            db_manager = DBManager()
+            with db_manager.engine.connect() as conn:
+                legacy = best_of(args.repeat, lambda: conn.exec_driver_sql(
+                    f"SELECT * FROM events ORDER BY RANDOM() LIMIT {args.sample}"
+                ).fetchall())
+
+            def uncached(stratify_by=None):
+                SamplingManager.clear_cache()
+                db_manager.get_sample_data("events", args.sample, stratify_by=stratify_by)
+
+            probe = best_of(args.repeat, uncached)
+            stratified = best_of(args.repeat, lambda: uncached("region"))
+            db_manager.get_sample_data("events", args.sample)
+            cached = best_of(args.repeat, lambda: db_manager.get_sample_data("events", args.sample))
+            db_manager.engine.dispose()
+
+            print(f"{rows:>10} {build_seconds:>8.2f} {legacy:>18.4f} {probe:>14.4f} {stratified:>13.4f} {cached:>9.4f}")
+        os.chdir(BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
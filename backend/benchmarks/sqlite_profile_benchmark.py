@@ -0,0 +1,130 @@
+"""
+Mixed read/write benchmark for the SQLite performance profile.
+
+For each profile it seeds an analytics table, then for a fixed duration runs one
+writer appending chunks through IngestManager (one transaction per chunk, like an
+upload or a sheet refresh) next to reader threads issuing the short queries of
+chat and alarm requests. It compares:
+
+* default: SQLITE_PERFORMANCE_PROFILE=false (rollback journal, stock cache)
+* tuned:   the profile (WAL, synchronous=NORMAL, large cache, mmap, memory temp store)
+
+Reported per profile: rows appended per second, reads per second, read latency
+percentiles in milliseconds, and reads that failed with "database is locked".
+
+Usage (from the backend directory):
+    python benchmarks/sqlite_profile_benchmark.py --seconds 10 --readers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+READ_QUERIES = [
+    "SELECT * FROM events WHERE rowid = {rowid}",
+    "SELECT region, COUNT(*), AVG(amount) FROM events WHERE rowid BETWEEN {rowid} AND {rowid} + 5000 GROUP BY region",
+    "SELECT COUNT(*) FROM events WHERE amount > 99.5",
+]
+
+
+def chunk(start: int, rows: int) -> pd.DataFrame:
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        "id": ids,
+        "region": np.array(["north", "south", "east", "west", "center"])[ids % 5],
+        "amount": (ids * 37 % 10_000) / 100.0,
+    })
+
+
+def run_profile(profile: str, args) -> dict:
+    os.environ["SQLITE_PERFORMANCE_PROFILE"] = "true" if profile == "tuned" else "false"
+
+    from utils.columnar_store import ColumnarStore
+    from utils.db_manager import DBManager
+    from utils.ingest_manager import IngestManager
+
+    # Sidecar refreshes would dominate the writer and do not touch the database lock
+    ColumnarStore.write_table = staticmethod(lambda *a, **k: None)
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([chunk(0, args.seed_rows)], "events", db_manager)
+
+    stop = threading.Event()
+    latencies, locked, written = [], [0], [args.seed_rows]
+
+    def writer():
+        while not stop.is_set():
+            IngestManager.ingest_chunks([chunk(written[0], args.chunk_rows)], "events", db_manager, "append")
+            written[0] += args.chunk_rows
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            query = rng.choice(READ_QUERIES).format(rowid=rng.randint(1, args.seed_rows))
+            start = time.perf_counter()
+            try:
+                with db_manager.engine.connect() as conn:
+                    conn.exec_driver_sql(query).fetchall()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                if "locked" not in str(e):
+                    raise
+                locked[0] += 1
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(index,)) for index in range(args.readers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "rows/s": (written[0] - args.seed_rows) / elapsed,
+        "reads/s": len(latencies) / elapsed,
+        "p50 ms": np.percentile(latencies_ms, 50),
+        "p95 ms": np.percentile(latencies_ms, 95),
+        "max ms": latencies_ms.max(),
+        "locked": locked[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seed-rows", type=int, default=200_000)
+    parser.add_argument("--chunk-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {}
+        for profile in ("default", "tuned"):
+            profile_dir = os.path.join(workdir, profile)
+            os.makedirs(os.path.join(profile_dir, "data"))
+            os.chdir(profile_dir)
+            results[profile] = run_profile(profile, args)
+        os.chdir(BACKEND_DIR)
+
+    columns = list(results["default"])
+    print(f"{args.readers} readers, 1 writer, {args.seconds:.0f}s")
+    print(f"{'profile':>8} " + " ".join(f"{column:>9}" for column in columns))
+    for profile, values in results.items():
+        print(f"{profile:>8} " + " ".join(f"{values[column]:>9.1f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
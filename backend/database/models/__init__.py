@@ -0,0 +1,7 @@
+from .alert import Alert
+from .chat import Chat
+from .dataset import DataSet
+from .ingestion_job import IngestionJob
+from .question import Question
+from .response import Response
+from .user import User
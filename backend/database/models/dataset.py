@@ -1,4 +1,5 @@
-from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy import (JSON, BigInteger, Column, DateTime, Integer, String,
+                        func)
 
 from .base import Base
 
@@ -9,5 +10,12 @@ class DataSet(Base):
     id = Column(Integer, primary_key=True, index=True)
     table_name = Column(String(length=255), nullable=False)
     file_path = Column(String(length=255))
+    content_hash = Column(String(length=64), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    table_fingerprint = Column(String(length=64), nullable=True)
+    row_count = Column(BigInteger, nullable=True)
+    column_names = Column(JSON, nullable=True)
+    etag = Column(String(length=255), nullable=True)
+    last_modified = Column(String(length=64), nullable=True)
     createdAt = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
     updatedAt = Column(DateTime, nullable=False, default=func.now(), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy import (JSON, BigInteger, Boolean, Column, DateTime, Integer,
+                        String, Text, func)
+
+from .base import Base
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(length=255), nullable=False)
+    source = Column(String(length=1024), nullable=False)
+    file_format = Column(String(length=32), nullable=False)
+    operation = Column(String(length=32), nullable=False, default="upload")
+    replace = Column(Boolean, nullable=False, default=True)
+    content_hash = Column(String(length=64), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+
+    phase = Column(String(length=32), nullable=False, default="queued", index=True)
+    rows_processed = Column(BigInteger, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+
+    startedAt = Column(DateTime, nullable=True)
+    finishedAt = Column(DateTime, nullable=True)
+    createdAt = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+    updatedAt = Column(DateTime, nullable=False, default=func.now(), server_default=func.now(), onupdate=func.now())
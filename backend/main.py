@@ -1,12 +1,27 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from main_router import router
 from utils.i18n import set_translator
+from utils.job_manager import JobManager
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        JobManager().resume_pending_jobs()
+    except Exception as e:
+        logger.error(f"Could not resume pending ingestion jobs: {str(e)}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.middleware("http")
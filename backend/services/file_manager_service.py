@@ -1,15 +1,31 @@
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
-from fastapi import HTTPException, UploadFile
-from sqlalchemy import inspect, text
+from fastapi import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 
 from database.models.dataset import DataSet
 from database.session import SessionLocal
+from utils.columnar_store import ColumnarStore
 from utils.db_manager import DBManager
+from utils.env_manager import EnvManager
+from utils.ingest_manager import IngestManager
+from utils.result_encoder import ColumnarResult
+from utils.schema_manager import SchemaManager
+from utils.sheet_sync_manager import SheetSyncManager
+from utils.table_data_manager import TableDataManager
+
+# Streaming reader and display name of every format a single-table upload accepts
+UPLOAD_FORMATS = {
+    "csv": (IngestManager.stream_csv, "CSV"),
+    "excel": (IngestManager.stream_excel, "Excel"),
+    "parquet": (IngestManager.stream_parquet, "Parquet"),
+    "arrow": (IngestManager.stream_arrow_ipc, "Arrow"),
+}
 
 
 class FileManagerService:
@@ -20,74 +36,168 @@ class FileManagerService:
     def __del__(self):
         self.session.close()
 
-    def _store_dataset_info(self, table_name: str, file_path: str) -> None:
-        dataset = DataSet(
-            table_name=table_name,
-            file_path=file_path,
-            createdAt=datetime.now(),
-            updatedAt=datetime.now()
-        )
-        self.session.add(dataset)
+    def _store_dataset_info(
+        self,
+        table_name: str,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        file_size: Optional[int] = None,
+        row_count: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        dataset = self.session.query(DataSet).filter_by(table_name=table_name).first()
+        if dataset is None:
+            dataset = DataSet(table_name=table_name, createdAt=datetime.now())
+            self.session.add(dataset)
+
+        dataset.file_path = file_path
+        dataset.content_hash = content_hash
+        dataset.file_size = file_size
+        dataset.row_count = row_count
+        dataset.column_names = columns
+        dataset.etag = etag
+        dataset.last_modified = last_modified
+        dataset.table_fingerprint = self.db_manager.get_table_fingerprint(table_name)
+        dataset.updatedAt = datetime.now()
         self.session.commit()
 
-    def upload_csv(self, file: UploadFile, file_location: str, table_name: str) -> Dict[str, Any]:
+    def _forget_dataset_content(self, table_name: str) -> None:
+        """
+        Clears the content hash and fingerprint of a table that was appended to or
+        replaced by an update, since it no longer holds the content of its upload.
+        """
+        dataset = self.session.query(DataSet).filter_by(table_name=table_name).first()
+        if dataset is None:
+            return
+
+        dataset.content_hash = None
+        dataset.table_fingerprint = None
+        dataset.updatedAt = datetime.now()
+        self.session.commit()
+
+    def find_cached_upload(self, table_name: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored result of a previous upload of the same content into the same
+        table, as long as the table has not been modified since that upload.
+        """
+        dataset = self.session.query(DataSet).filter_by(table_name=table_name, content_hash=content_hash).first()
+        if dataset is None or dataset.table_fingerprint is None:
+            return None
+
+        if self.db_manager.get_table_fingerprint(table_name) != dataset.table_fingerprint:
+            return None
+
+        return {
+            "success": True,
+            "message": f"Table '{table_name}' already contains this file, skipped re-ingestion",
+            "table_name": table_name,
+            "row_count": dataset.row_count,
+            "columns": dataset.column_names,
+            "deduplicated": True
+        }
+
+    def upload_file(
+        self,
+        file_format: str,
+        file_location: str,
+        table_name: str,
+        content_hash: Optional[str] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ingests an uploaded file of one of the UPLOAD_FORMATS into ``table_name``,
+        replacing its contents, and records the upload.
+        """
+        if file_format not in UPLOAD_FORMATS:
+            raise ValueError(f"Unsupported file format: {file_format}")
+        stream, label = UPLOAD_FORMATS[file_format]
         try:
-            df = pd.read_csv(file_location)
-            with self.db_manager.engine.connect() as conn:
-                df.to_sql(table_name, conn, if_exists='replace', index=False)
+            result = stream(file_location, table_name, self.db_manager, progress_callback=progress_callback)
 
-            self._store_dataset_info(table_name, file_location)
+            row_count = result["row_count"]
+            self._store_dataset_info(
+                table_name, file_location, content_hash, file_size, row_count, result["columns"]
+            )
 
-            row_count = len(df)
             return {
                 "success": True,
-                "message": f"CSV uploaded successfully as '{table_name}' with {row_count} rows",
+                "message": f"{label} file uploaded successfully as '{table_name}' with {row_count} rows",
                 "table_name": table_name,
                 "row_count": row_count,
-                "columns": df.columns.tolist()
+                "columns": result["columns"]
             }
         except Exception as e:
             if os.path.exists(file_location):
                 os.remove(file_location)
-            raise HTTPException(status_code=500, detail=f"Error uploading CSV: {str(e)}")
-
-    def upload_excel(self, file: UploadFile, file_location: str, table_name: str) -> Dict[str, Any]:
+            raise HTTPException(status_code=500, detail=f"Error uploading {label} file: {str(e)}")
+
+    def upload_excel_workbook(
+        self,
+        file_location: str,
+        table_name: str,
+        content_hash: Optional[str] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Loads every sheet of a workbook into its own '<table_name>_<sheet>' table.
+        """
         try:
-            df = pd.read_excel(file_location, sheet_name=0)
-            with self.db_manager.engine.connect() as conn:
-                df.to_sql(table_name, conn, if_exists='replace', index=False)
+            result = IngestManager.stream_excel_workbook(
+                file_location, table_name, self.db_manager, progress_callback=progress_callback
+            )
 
-            self._store_dataset_info(table_name, file_location)
+            for sheet_result in result["tables"].values():
+                self._store_dataset_info(
+                    sheet_result["table_name"], file_location, content_hash, file_size,
+                    sheet_result["row_count"], sheet_result["columns"]
+                )
 
-            row_count = len(df)
             return {
                 "success": True,
-                "message": f"Excel uploaded successfully as '{table_name}' with {row_count} rows",
-                "table_name": table_name,
-                "row_count": row_count,
-                "columns": df.columns.tolist()
+                "message": f"Excel workbook uploaded successfully as {len(result['tables'])} tables "
+                           f"with {result['row_count']} rows",
+                "row_count": result["row_count"],
+                "tables": result["tables"]
             }
         except Exception as e:
             if os.path.exists(file_location):
                 os.remove(file_location)
-            raise HTTPException(status_code=500, detail=f"Error uploading Excel file: {str(e)}")
-
-    def upload_google_sheet(self, table_name: str, url: str) -> Dict[str, Any]:
+            raise HTTPException(status_code=500, detail=f"Error uploading Excel workbook: {str(e)}")
+
+    def upload_google_sheet(
+        self,
+        table_name: str,
+        url: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
         try:
             url = url.replace("/edit?usp=sharing", "/export?format=csv")
-            df = pd.read_csv(url)
-
-            with self.db_manager.engine.connect() as conn:
-                df.to_sql(table_name, conn, if_exists='replace', index=False)
-
-            self._store_dataset_info(table_name, url)
+            fetched = SheetSyncManager.fetch(url)
+            result = IngestManager.stream_csv(
+                io.BytesIO(fetched["content"]), table_name, self.db_manager, progress_callback=progress_callback
+            )
+
+            self._store_dataset_info(
+                table_name,
+                url,
+                content_hash=fetched["content_hash"],
+                file_size=len(fetched["content"]),
+                row_count=result["row_count"],
+                columns=result["columns"],
+                etag=fetched["etag"],
+                last_modified=fetched["last_modified"]
+            )
 
             return {
                 "success": True,
-                "message": f"Google Sheet uploaded successfully as '{table_name}' with {len(df)} rows",
+                "message": f"Google Sheet uploaded successfully as '{table_name}' with {result['row_count']} rows",
                 "table_name": table_name,
-                "row_count": len(df),
-                "columns": df.columns.tolist()
+                "row_count": result["row_count"],
+                "columns": result["columns"]
             }
         except Exception as e:
             return {
@@ -96,34 +206,135 @@ class FileManagerService:
             }
 
     def fetch_and_update_google_sheets(self) -> Dict[str, Any]:
-        datasets = self.session.query(DataSet).all()
+        """
+        Refreshes every dataset loaded from a remote CSV export. Sources are fetched
+        concurrently with conditional requests; unchanged content is skipped and
+        changed content is applied to the table as a row-level diff.
+        """
+        datasets = [
+            dataset for dataset in self.session.query(DataSet).all()
+            if dataset.file_path and dataset.file_path.startswith(("http://", "https://"))
+        ]
         updated_tables = []
+        unchanged_tables = []
+        failed_tables = {}
+        changes = {}
+
+        with ThreadPoolExecutor(max_workers=EnvManager.get_sheets_refresh_concurrency()) as executor:
+            futures = {
+                executor.submit(SheetSyncManager.fetch, dataset.file_path, dataset.etag, dataset.last_modified): dataset
+                for dataset in datasets
+            }
 
-        for dataset in datasets:
-            print(dataset.file_path)  # Debugging line
-            if "docs.google.com/spreadsheets" in dataset.file_path:
-                export_url = dataset.file_path.replace("/edit?usp=sharing", "/export?format=csv")
-                df = pd.read_csv(export_url)
-
-                with self.db_manager.engine.connect() as conn:
-                    df.to_sql(dataset.table_name, conn, if_exists='replace', index=False)
+            for future in as_completed(futures):
+                dataset = futures[future]
+                try:
+                    fetched = future.result()
+                    table_unchanged = (
+                        dataset.table_fingerprint is not None
+                        and self.db_manager.get_table_fingerprint(dataset.table_name) == dataset.table_fingerprint
+                    )
+
+                    if table_unchanged and (
+                        not fetched["modified"] or fetched["content_hash"] == dataset.content_hash
+                    ):
+                        dataset.etag = fetched["etag"]
+                        dataset.last_modified = fetched["last_modified"]
+                        self.session.commit()
+                        unchanged_tables.append(dataset.table_name)
+                        continue
+
+                    if not fetched["modified"]:
+                        fetched = SheetSyncManager.fetch(dataset.file_path)
+
+                    df = pd.read_csv(io.BytesIO(fetched["content"]))
+                    changes[dataset.table_name] = SheetSyncManager.apply_diff(dataset.table_name, df, self.db_manager)
+
+                    dataset.content_hash = fetched["content_hash"]
+                    dataset.etag = fetched["etag"]
+                    dataset.last_modified = fetched["last_modified"]
+                    dataset.row_count = len(df)
+                    dataset.column_names = df.columns.tolist()
+                    dataset.table_fingerprint = self.db_manager.get_table_fingerprint(dataset.table_name)
+                    dataset.updatedAt = datetime.now()
+                    self.session.commit()
+
+                    updated_tables.append(dataset.table_name)
+                except Exception as e:
+                    self.session.rollback()
+                    failed_tables[dataset.table_name] = str(e)
+
+        return {
+            "success": not failed_tables,
+            "updated_tables": updated_tables,
+            "unchanged_tables": unchanged_tables,
+            "failed_tables": failed_tables,
+            "changes": changes
+        }
 
-                self.session.execute(text("UPDATE datasets SET updatedAt = :updatedAt WHERE file_path = :file_path"),
-                                     {"updatedAt": datetime.now(), "file_path": dataset.file_path})
-                self.session.commit()
+    def get_tables(self) -> List[str]:
+        return self.db_manager.get_table_names()
 
-                updated_tables.append(dataset.table_name)
+    def get_table_data(
+        self,
+        table_name: str,
+        after: Optional[int] = None,
+        limit: int = 1000,
+        columns: Optional[str] = None,
+        filters: Optional[List[str]] = None
+    ) -> Tuple[ColumnarResult, Dict[str, Any]]:
+        """
+        Returns a page of the table as a ColumnarResult and the fields that
+        accompany it in the response.
+        """
+        try:
+            page = TableDataManager.get_page(self.db_manager, table_name, after, limit, columns, filters)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return page["result"], {
+            "table_name": table_name,
+            "next_after": page["next_after"],
+            "limit": limit
+        }
+
+    def export_table(
+        self,
+        table_name: str,
+        export_format: str = "ndjson",
+        columns: Optional[str] = None,
+        filters: Optional[List[str]] = None
+    ) -> Tuple[Iterator[bytes], str]:
+        """
+        Returns a lazy byte stream of the table in NDJSON or CSV and its media type.
+        """
+        try:
+            selected, batches = TableDataManager.stream_rows(self.db_manager, table_name, columns, filters)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        return {"success": True, "updated_tables": updated_tables}
+        if export_format == "csv":
+            return TableDataManager.to_csv(selected, batches), "text/csv"
+        return TableDataManager.to_ndjson(selected, batches), "application/x-ndjson"
 
-    def get_tables(self) -> List[str]:
-        return self.db_manager.get_table_names()
+    def get_tables_metadata(self) -> Dict[str, Any]:
+        try:
+            return {
+                "success": True,
+                "tables": self.db_manager.get_all_table_metadata()
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting tables metadata: {str(e)}")
 
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         try:
-            schema = self.db_manager.get_table_schema(table_name)
+            metadata = self.db_manager.get_table_metadata(table_name)
 
-            if not schema:
+            if not metadata:
                 raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist.")
 
             sample_data = self.db_manager.get_sample_data_in_rows(table_name, limit=5)
@@ -131,7 +342,8 @@ class FileManagerService:
             return {
                 "success": True,
                 "table_name": table_name,
-                "schema": schema,
+                "schema": metadata["columns"],
+                "row_count": metadata["row_count"],
                 "sample_data": sample_data if sample_data else []
             }
         except Exception as e:
@@ -139,12 +351,12 @@ class FileManagerService:
 
     def delete_table(self, table_name: str) -> bool:
         try:
-            inspector = inspect(self.db_manager.engine)
-            if table_name not in inspector.get_table_names():
+            if table_name not in self.db_manager.get_table_names():
                 return False
 
-            with self.db_manager.engine.begin() as connection:
-                connection.execute(text(f'DROP TABLE "{table_name}"'))
+            with self.db_manager.write_engine.begin() as connection:
+                SchemaManager.drop_table(connection, table_name)
+            ColumnarStore.delete_table(table_name, self.db_manager.data_dir)
 
             dataset = self.session.query(DataSet).filter_by(table_name=table_name).first()
             if dataset:
@@ -160,33 +372,21 @@ class FileManagerService:
             print(f"Error deleting table {table_name}: {str(e)}")
             return False
 
-    def update_table_from_csv(self, table_name: str, file_location: str, replace: bool = False) -> Dict[str, Any]:
-        try:
-            tables = self.get_tables()
-            if table_name not in tables and not replace:
-                return {
-                    "success": False,
-                    "message": f"Table '{table_name}' does not exist. Use replace=True to create it."
-                }
-
-            df = pd.read_csv(file_location)
-            with self.db_manager.engine.connect() as conn:
-                if_exists = 'replace' if replace else 'append'
-                df.to_sql(table_name, conn, if_exists=if_exists, index=False)
-
-            return {
-                "success": True,
-                "message": f"Table '{table_name}' {'replaced' if replace else 'updated'} successfully with {len(df)} rows",
-                "row_count": len(df),
-                "columns": df.columns.tolist()
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "message": f"Error updating table from CSV: {str(e)}"
-            }
-
-    def update_table_from_excel(self, table_name: str, file_location: str, replace: bool = False) -> Dict[str, Any]:
+    def update_table_from_file(
+        self,
+        file_format: str,
+        table_name: str,
+        file_location: str,
+        replace: bool = False,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Appends a file of one of the UPLOAD_FORMATS to ``table_name``, or replaces
+        the table with it when ``replace`` is set. Excel files load their first sheet.
+        """
+        if file_format not in UPLOAD_FORMATS:
+            raise ValueError(f"Unsupported file format: {file_format}")
+        stream, label = UPLOAD_FORMATS[file_format]
         try:
             tables = self.get_tables()
             if table_name not in tables and not replace:
@@ -195,20 +395,20 @@ class FileManagerService:
                     "message": f"Table '{table_name}' does not exist. Use replace=True to create it."
                 }
 
-            # Always load the first sheet
-            df = pd.read_excel(file_location, sheet_name=0)
-            with self.db_manager.engine.connect() as conn:
-                if_exists = 'replace' if replace else 'append'
-                df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+            if_exists = 'replace' if replace else 'append'
+            result = stream(
+                file_location, table_name, self.db_manager, if_exists=if_exists, progress_callback=progress_callback
+            )
+            self._forget_dataset_content(table_name)
 
             return {
                 "success": True,
-                "message": f"Table '{table_name}' {'replaced' if replace else 'updated'} successfully with {len(df)} rows",
-                "row_count": len(df),
-                "columns": df.columns.tolist()
+                "message": f"Table '{table_name}' {'replaced' if replace else 'updated'} successfully with {result['row_count']} rows",
+                "row_count": result["row_count"],
+                "columns": result["columns"]
             }
         except Exception as e:
             return {
                 "success": False,
-                "message": f"Error updating table from Excel: {str(e)}"
+                "message": f"Error updating table from {label}: {str(e)}"
             }
@@ -29,6 +29,11 @@ class ResponseService:
             db.refresh(response)
             return response
 
+    @staticmethod
+    def get_response(response_id: int) -> Optional[Response]:
+        with SessionLocal() as db:
+            return db.query(Response).filter(Response.id == response_id).first()
+
     @staticmethod
     def update_response_with_result(
         response_id: int,
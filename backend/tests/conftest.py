@@ -1,11 +1,17 @@
+import json
+
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel, GenericFakeChatModel
+from langchain_core.messages import AIMessage
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from database.models import base
+from database.models.base import Base
 from main import app
+from utils.agent_manager import AgentManager
 
 # URL de la base de datos en memoria para pruebas
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -49,6 +55,22 @@ def test_session(test_db):
     session.close()
 
 
+@pytest.fixture(scope="function")
+def metadata_session(tmp_path, monkeypatch):
+    """Points the metadata session at a temporary SQLite database and isolates the analytics data directory."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'metadata.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr("utils.job_manager.SessionLocal", SessionLocal)
+    monkeypatch.setattr("services.file_manager_service.SessionLocal", SessionLocal)
+
+    yield SessionLocal
+    engine.dispose()
+
+
 @pytest.fixture(scope="function")
 def sample_csv_file(tmp_path):
     """Genera un archivo CSV temporal para pruebas."""
@@ -66,3 +88,33 @@ def sample_excel_file(tmp_path):
     file_path = tmp_path / "test_file.xlsx"
     df.to_excel(file_path, index=False)
     return file_path
+
+
+class ScriptedChatModel(FakeMessagesListChatModel):
+    """Local stand-in for the agent's LLM: replays a fixed list of messages and counts the calls."""
+    calls: int = 0
+
+    def _generate(self, *args, **kwargs):
+        self.calls += 1
+        return super()._generate(*args, **kwargs)
+
+    # Streams each message word by word, as a real model would
+    _stream = GenericFakeChatModel._stream
+
+
+@pytest.fixture(scope="function")
+def scripted_agent():
+    """Builds SQL agents over a DBManager whose LLM runs ``sql_queries`` with sql_db_query, then answers."""
+    def build(db_manager, sql_queries, answer="answer"):
+        responses = [
+            AIMessage(content="", additional_kwargs={
+                "function_call": {"name": "sql_db_query", "arguments": json.dumps({"query": query})}
+            })
+            for query in sql_queries
+        ]
+        llm = ScriptedChatModel(responses=responses + [AIMessage(content=answer)])
+        # A private instance: the shared AgentManager talks to OpenAI
+        agent = object.__new__(AgentManager)
+        agent._initialize(db_manager.get_connection(), llm)
+        return agent
+    return build
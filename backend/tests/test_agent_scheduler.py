@@ -0,0 +1,123 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from utils.agent_scheduler import AgentScheduler
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+
+
+@pytest.fixture(scope="function")
+def limits(monkeypatch):
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY_PER_USER", "1")
+    monkeypatch.setenv("AGENT_QUEUE_SIZE", "3")
+    monkeypatch.setenv("AGENT_QUEUE_SIZE_PER_USER", "2")
+    yield
+    assert AgentScheduler.stats()["running"] == 0 and AgentScheduler.stats()["queued"] == 0
+
+
+async def connected():
+    return False
+
+
+def test_waiting_users_are_served_round_robin(limits):
+    """Tests that a second user's question runs before the first user's backlog, and the queue bound."""
+    async def scenario():
+        order = []
+        release = asyncio.Event()
+
+        def job(name):
+            async def run():
+                order.append(name)
+                if name == "a1":
+                    await release.wait()
+                return name
+            return run
+
+        tasks = [asyncio.ensure_future(AgentScheduler.run("a", job("a1"), connected))]
+        await asyncio.sleep(0)
+        for user, name in (("a", "a2"), ("a", "a3"), ("b", "b1")):
+            tasks.append(asyncio.ensure_future(AgentScheduler.run(user, job(name), connected)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        assert AgentScheduler.queue_positions("a") == [1, 3]
+        assert AgentScheduler.queue_positions("b") == [2]
+        assert AgentScheduler.position(AgentScheduler._waiting["b"][0]) == 2
+        with pytest.raises(HTTPException) as full:
+            await AgentScheduler.run("c", job("c1"), connected)
+        assert full.value.status_code == 429
+        with pytest.raises(HTTPException):
+            AgentScheduler.ensure_room("c")
+
+        release.set()
+        assert await asyncio.gather(*tasks) == ["a1", "a2", "a3", "b1"]
+        return order
+
+    assert asyncio.run(scenario()) == ["a1", "a2", "b1", "a3"]
+
+
+def test_disconnected_clients_are_cancelled(limits):
+    """Tests that a disconnect cancels the running agent and frees the slot for the queue."""
+    async def scenario():
+        cancelled = asyncio.Event()
+        gone = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def disconnected():
+            return gone.is_set()
+
+        running = asyncio.ensure_future(AgentScheduler.run("a", slow, disconnected))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.ensure_future(AgentScheduler.run("b", connected, connected))
+        await asyncio.sleep(0.01)
+        assert AgentScheduler.stats()["queued"] == 1
+
+        gone.set()
+        with pytest.raises(HTTPException) as closed:
+            await running
+        assert closed.value.status_code == 499
+        assert cancelled.is_set()
+        assert await waiting is False
+
+    asyncio.run(scenario())
+
+
+def test_ask_chat_runs_the_agent_asynchronously(metadata_session, scripted_agent, client, monkeypatch):
+    """Tests the async chat endpoint end to end, and that it answers 429 once the queue is full."""
+    from database.models.chat import Chat
+    from main import app
+    from utils.answer_cache import AnswerCache
+    from utils.auth_manager import AuthManager
+
+    for service in ("chat_service", "question_service", "response_service"):
+        monkeypatch.setattr(f"services.{service}.SessionLocal", metadata_session)
+    monkeypatch.setitem(app.dependency_overrides, AuthManager.get_current_user, lambda: 7)
+    with metadata_session() as db:
+        db.add(Chat(id=1, name="Sales", user_id=7))
+        db.commit()
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"region": ["north", "south"], "total": [3, 4]})], "orders", db_manager)
+    monkeypatch.setattr("apps.chat.routes.agent", scripted_agent(db_manager, ["SELECT SUM(total) AS total FROM orders"], "Seven"))
+    AnswerCache.clear_cache()
+
+    answer = client.post("/api/chats/1", json={"question": "Total?"}).json()["response"]
+    assert answer["content"] == "Seven"
+    assert answer["query_result"] == {"total": [7]}
+    assert client.get("/api/chats/1").json()["response"]["messages"][-1]["content"] == "Seven"
+
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "0")
+    monkeypatch.setenv("AGENT_QUEUE_SIZE", "0")
+    rejected = client.post("/api/chats/1", json={"question": "Again?"})
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "5"
+    AnswerCache.clear_cache()
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from main import app
+from utils.answer_cache import AnswerCache
+from utils.auth_manager import AuthManager
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+
+
+ORDERS_QUERY = "SELECT region, total FROM orders ORDER BY region"
+
+
+def agent_runs(agent) -> int:
+    # Every run asks the LLM for the query, then for the answer
+    return agent.llm.calls // 2
+
+
+@pytest.fixture(scope="function")
+def agent(metadata_session, scripted_agent):
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"region": ["north", "south"], "total": [3, 4]})], "orders", db_manager)
+    IngestManager.ingest_chunks([pd.DataFrame({"name": ["ana"]})], "customers", db_manager)
+    AnswerCache.clear_cache()
+    yield scripted_agent(db_manager, [ORDERS_QUERY])
+    AnswerCache.clear_cache()
+
+
+def test_repeated_question_is_answered_from_the_cache(agent, client, monkeypatch):
+    """Tests that a normalized repeat skips the agent and returns the stored SQL, answer and result."""
+    first = agent.query_nlp("What is the total per region?")
+    second = agent.query_nlp("  what is   the TOTAL per region ")
+
+    assert agent_runs(agent) == 1
+    assert second == first
+    assert first["sql_query"] == ORDERS_QUERY
+    assert first["query_result"] == {"region": ["north", "south"], "total": [3, 4]}
+    monkeypatch.setitem(app.dependency_overrides, AuthManager.get_current_user, lambda: 7)
+    stats = client.get("/api/chats/answer-cache/stats").json()["response"]
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 1, 0.5)
+
+
+def test_reingesting_a_touched_table_invalidates_the_answer(agent):
+    """Tests that only changes to the tables an answer touched send the question back to the agent."""
+    agent.query_nlp("Total per region?")
+    IngestManager.ingest_chunks([pd.DataFrame({"name": ["bo"]})], "customers", DBManager(), "append")
+    agent.query_nlp("Total per region?")
+    assert agent_runs(agent) == 1
+
+    IngestManager.ingest_chunks([pd.DataFrame({"region": ["east"], "total": [5]})], "orders", DBManager(), "append")
+    answer = agent.query_nlp("Total per region?")
+
+    assert agent_runs(agent) == 2
+    assert answer["query_result"] == {"region": ["east", "north", "south"], "total": [5, 3, 4]}
+    assert AnswerCache.stats()["invalidations"] == 1
+
+
+def test_failed_queries_are_not_cached(metadata_session, scripted_agent):
+    """Tests that an answer whose SQL fails to run is asked again next time."""
+    AnswerCache.clear_cache()
+    agent = scripted_agent(DBManager(), ["SELECT missing FROM orders"])
+    assert "error" in agent.query_nlp("Broken?")["query_result"]
+    agent.query_nlp("Broken?")
+    assert agent_runs(agent) == 2
+    AnswerCache.clear_cache()
+
+
+def test_answer_cache_evicts_least_recently_used(monkeypatch):
+    """Tests the entry bound, LRU order and that answers touching no table depend on every table."""
+    monkeypatch.setenv("ANSWER_CACHE_SIZE", "2")
+    AnswerCache.clear_cache()
+    for question in ("a", "b"):
+        AnswerCache.put(question, {"content": question}, {})
+    assert AnswerCache.get("a", create_engine("sqlite://"))["answer"]["content"] == "a"
+    AnswerCache.put("c", {"content": "c"}, {})
+
+    assert list(AnswerCache._cache) == ["a", "c"]
+    assert AnswerCache.stats()["evictions"] == 1
+    assert AnswerCache.touched_tables({"orders": 2, "customers": 1}, ["select * from Orders"], []) == ({"orders": 2}, False)
+    assert AnswerCache.touched_tables({"orders": 2}, [], []) == ({"orders": 2}, True)
+    assert AnswerCache.normalize_question(" ¿Cuántas  VENTAS? ") == "cuántas ventas"
+    AnswerCache.clear_cache()
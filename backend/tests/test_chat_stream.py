@@ -0,0 +1,88 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils.answer_cache import AnswerCache
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture(scope="function")
+def chat(metadata_session, scripted_agent, monkeypatch):
+    from database.models.chat import Chat
+    from main import app
+    from utils.auth_manager import AuthManager
+
+    for service in ("chat_service", "question_service", "response_service"):
+        monkeypatch.setattr(f"services.{service}.SessionLocal", metadata_session)
+    monkeypatch.setitem(app.dependency_overrides, AuthManager.get_current_user, lambda: 7)
+    with metadata_session() as db:
+        db.add(Chat(id=1, name="Sales", user_id=7))
+        db.commit()
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"region": ["north", "south"], "total": [3, 4]})], "orders", db_manager)
+    agent = scripted_agent(db_manager, ["SELECT SUM(total) AS total FROM orders"], "The total is 7")
+    monkeypatch.setattr("apps.chat.routes.agent", agent)
+    AnswerCache.clear_cache()
+    yield agent
+    AnswerCache.clear_cache()
+
+
+def test_stream_sends_steps_result_and_tokens_then_stores_the_answer(chat, client):
+    """Tests the event sequence of a streamed answer and that the answer is persisted at the end."""
+    response = client.post("/api/chats/1/stream", json={"question": "Total?"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+
+    assert names[:3] == ["start", "step", "result"]
+    assert events[1][1] == {
+        "tool": "sql_db_query",
+        "input": {"query": "SELECT SUM(total) AS total FROM orders"},
+        "sql_query": "SELECT SUM(total) AS total FROM orders",
+    }
+    assert events[2][1]["query_result"] == {"total": [7]}
+    assert "".join(data["content"] for name, data in events if name == "token") == "The total is 7"
+    assert names[-1] == "done"
+    done = events[-1][1]
+    assert (done["content"], done["query_result"]) == ("The total is 7", {"total": [7]})
+
+    messages = client.get("/api/chats/1").json()["response"]["messages"]
+    assert [message["content"] for message in messages] == ["Total?", "The total is 7"]
+    stored = client.get(f"/api/chats/responses/{done['response_id']}/result").json()
+    assert stored["data"] == {"total": [7]}
+
+
+def test_stream_replays_cached_answers_and_refuses_a_full_queue(chat, client, metadata_session, monkeypatch):
+    """Tests that a cached answer streams without the agent, and the 429 before a stream starts."""
+    from database.models.chat import Chat
+
+    with metadata_session() as db:
+        db.add(Chat(id=2, name="Sales again", user_id=7))
+        db.commit()
+    client.post("/api/chats/1/stream", json={"question": "Total?"})
+    calls = chat.llm.calls
+
+    events = parse_events(client.post("/api/chats/2/stream", json={"question": "total"}).text)
+    assert [name for name, _ in events] == ["start", "result", "token", "done"]
+    assert events[1][1] == {
+        "sql_query": "SELECT SUM(total) AS total FROM orders",
+        "query_result": {"total": [7]},
+        "total_rows": 1,
+        "truncated": None,
+    }
+    assert events[2][1] == {"content": "The total is 7"}
+    assert chat.llm.calls == calls
+
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "0")
+    monkeypatch.setenv("AGENT_QUEUE_SIZE", "0")
+    assert client.post("/api/chats/1/stream", json={"question": "Again?"}).status_code == 429
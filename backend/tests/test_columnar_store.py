@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+
+from apps.dashboard.service import DashboardService
+from utils.columnar_store import ColumnarStore
+from utils.db_manager import DBManager
+from utils.file_manager import FileManager
+from utils.ingest_manager import IngestManager
+
+
+@pytest.fixture(scope="function")
+def db_manager(tmp_path, monkeypatch):
+    """Provides a DBManager backed by an empty analytics database in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return DBManager()
+
+
+@pytest.fixture(scope="function")
+def orders_frame():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "customer": ["ana", None, "luis"],
+        "total": [9.5, 20.0, None],
+        "ordered_at": pd.to_datetime(["2024-01-01 10:00", "2024-01-02 11:30", None]),
+    })
+
+
+def test_stream_parquet_writes_table_and_sidecar(db_manager, orders_frame, tmp_path):
+    """Tests that a Parquet upload is ingested in batches and mirrored to a typed sidecar."""
+    parquet_path = tmp_path / "orders.parquet"
+    orders_frame.to_parquet(parquet_path, row_group_size=2)
+
+    result = IngestManager.stream_parquet(str(parquet_path), "orders", db_manager, chunksize=2)
+
+    assert result == {"row_count": 3, "columns": ["id", "customer", "total", "ordered_at"]}
+    sidecar = ColumnarStore.read_table("orders", db_manager.data_dir)
+    assert sidecar["id"].tolist() == [1, 2, 3]
+    assert str(sidecar["ordered_at"].dtype).startswith("datetime64")
+    assert sidecar["customer"].isna().tolist() == [False, True, False]
+
+
+@pytest.mark.parametrize("ipc_format", ["file", "stream"])
+def test_stream_arrow_ipc_reads_file_and_stream_formats(db_manager, orders_frame, tmp_path, ipc_format):
+    """Tests that both Arrow IPC formats are ingested."""
+    arrow_path = str(tmp_path / "orders.arrow")
+    table = pa.Table.from_pandas(orders_frame, preserve_index=False)
+    if ipc_format == "file":
+        feather.write_feather(table, arrow_path)
+    else:
+        with pa.OSFile(arrow_path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    result = IngestManager.stream_arrow_ipc(arrow_path, "orders", db_manager)
+
+    assert result["row_count"] == 3
+    assert ColumnarStore.read_table("orders", db_manager.data_dir)["total"].tolist()[:2] == [9.5, 20.0]
+
+
+def test_dropping_tables_removes_their_sidecars(db_manager, orders_frame):
+    """Tests that a dropped table leaves no sidecar a new table of the same name could be served from."""
+    IngestManager.ingest_chunks([orders_frame], "orders", db_manager)
+    IngestManager.ingest_chunks([orders_frame], "returns", db_manager)
+    assert os.path.exists(ColumnarStore.sidecar_path("orders", db_manager.data_dir))
+
+    db_manager.delete_table("returns")
+    assert db_manager.get_table_names() == ["orders"]
+    assert not os.path.exists(ColumnarStore.sidecar_path("returns", db_manager.data_dir))
+
+    FileManager.clear_db_except_titanic(db_manager)
+    assert db_manager.get_table_names() == []
+    assert not os.path.exists(ColumnarStore.sidecar_path("orders", db_manager.data_dir))
+
+
+def test_dashboard_reads_sidecar_instead_of_source(db_manager, tmp_path):
+    """Tests that the dashboard uses the columnar sidecar once it is newer than the upload."""
+    csv_path = tmp_path / "data" / "sales.csv"
+    csv_path.write_text("id,amount\n1,10\n2,30\n")
+    IngestManager.stream_csv(str(csv_path), "sales", db_manager)
+
+    csv_path.write_text("this file is no longer parsed")
+    os.utime(csv_path, (0, 0))
+
+    analysis = DashboardService.calculate_some_analysis()
+
+    assert analysis["file_name"] == "sales.csv"
+    assert analysis["descriptive_statistics"]["amount"]["mean"] == 20.0
+
+
+def test_append_marks_sidecar_stale_until_read(db_manager, orders_frame, monkeypatch):
+    """Tests that appends leave the sidecar to be rebuilt once by its next reader instead of rewriting it."""
+    IngestManager.ingest_chunks([orders_frame], "orders", db_manager)
+    exports = []
+    write_table = ColumnarStore.write_table
+    monkeypatch.setattr(
+        ColumnarStore, "write_table", staticmethod(lambda *args: exports.append(args[0]) or write_table(*args))
+    )
+
+    IngestManager.ingest_chunks([orders_frame], "orders", db_manager, if_exists="append")
+    IngestManager.ingest_chunks([orders_frame], "orders", db_manager, if_exists="append")
+    assert exports == []
+
+    path = ColumnarStore.current_path("orders", db_manager)
+    assert path == ColumnarStore.current_path("orders", db_manager)
+    assert exports == ["orders"]
+    assert len(ColumnarStore.read_table("orders", db_manager.data_dir)) == 9
+
+
+def test_dashboard_reads_sidecar_rebuilt_after_an_append(db_manager, tmp_path):
+    """Tests that a sidecar marked stale by a write is rebuilt before the dashboard reads it."""
+    csv_path = tmp_path / "data" / "sales.csv"
+    csv_path.write_text("id,amount\n1,10\n2,30\n")
+    IngestManager.stream_csv(str(csv_path), "sales", db_manager)
+    os.utime(csv_path, (0, 0))
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [3], "amount": [50]})], "sales", db_manager, if_exists="append")
+
+    analysis = DashboardService.calculate_some_analysis()
+
+    assert analysis["descriptive_statistics"]["amount"]["mean"] == 30.0
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from apps.dashboard.service import DashboardService
+from utils.column_stats import ColumnStatsStore
+from utils.dataset_cache import DatasetCache
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+
+
+@pytest.fixture(scope="function")
+def summary_db(metadata_session):
+    DatasetCache.clear_cache()
+    DashboardService.clear_summary_cache()
+    yield DBManager()
+    DatasetCache.clear_cache()
+    DashboardService.clear_summary_cache()
+
+
+def orders_frame(rows: int) -> pd.DataFrame:
+    ids = np.arange(rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": np.where(ids % 4 == 0, np.nan, ids % 10),
+        "region": np.array(["north", "north", "south", "east"])[ids % 4],
+    })
+
+
+def test_table_summary_combines_schema_statistics_and_top_values(summary_db, client):
+    """Tests that one response carries schema, statistics, null ratios and top values of a table."""
+    IngestManager.ingest_chunks([orders_frame(400)], "orders", summary_db)
+
+    summary = client.get("/api/dashboard/summary", params={"table_name": "orders", "top_k": 2}).json()
+
+    assert [column["name"] for column in summary["columns"]] == ["id", "amount", "region"]
+    assert summary["descriptive_statistics"]["amount"]["count"] == 300
+    assert summary["null_ratios"] == {"id": 0, "amount": 0.25, "region": 0}
+    assert summary["top_values"]["region"] == [{"value": "north", "count": 200}, {"value": "south", "count": 100}]
+    assert summary["top_values_max_error"]["region"] == 0
+
+
+def test_table_summary_revalidates_without_reading_the_table(summary_db, client, monkeypatch):
+    """Tests that a matching If-None-Match gets a 304 untouched by the data, until the table changes."""
+    IngestManager.ingest_chunks([orders_frame(40)], "orders", summary_db)
+    params = {"table_name": "orders"}
+    first = client.get("/api/dashboard/summary", params=params)
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    def untouchable(*args, **kwargs):
+        raise AssertionError("the data was read")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(ColumnStatsStore, "load", staticmethod(untouchable))
+        patched.setattr(DBManager, "get_table_metadata", untouchable)
+        revalidated = client.get("/api/dashboard/summary", params=params, headers={"If-None-Match": f'"other", {etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert revalidated.content == b""
+
+    IngestManager.ingest_chunks([orders_frame(4)], "orders", summary_db, "append")
+    changed = client.get("/api/dashboard/summary", params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["row_count"] == 44
+    assert client.get("/api/dashboard/summary", params={"table_name": "missing"}).status_code == 404
+
+
+def test_table_summary_etag_follows_writes_outside_the_pipeline(summary_db, client):
+    """Tests that tables written without a version bump still get a new ETag when their rows change."""
+    with summary_db.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orders (id INTEGER, region TEXT)"))
+        conn.execute(text("INSERT INTO orders VALUES (1, 'north')"))
+    params = {"table_name": "orders"}
+    first = client.get("/api/dashboard/summary", params=params)
+    assert first.status_code == 200
+
+    with summary_db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO orders VALUES (2, 'south')"))
+    assert summary_db.get_table_version("orders") == 0
+    changed = client.get("/api/dashboard/summary", params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+
+
+def test_file_summary_follows_the_dataset_file(summary_db, client, monkeypatch):
+    """Tests that the latest file is summarized once per version and revalidated by its identity."""
+    path = os.path.join("data", "orders.csv")
+    orders_frame(20).to_csv(path, index=False)
+
+    first = client.get("/api/dashboard/summary")
+    summary = first.json()
+    assert summary["file_name"] == "orders.csv"
+    assert summary["null_ratios"]["amount"] == 0.25
+    assert summary["top_values"]["region"][0] == {"value": "north", "count": 10}
+
+    with monkeypatch.context() as patched:
+        patched.setattr(DatasetCache, "get", staticmethod(lambda *args, **kwargs: pytest.fail("the file was read")))
+        revalidated = client.get("/api/dashboard/summary", headers={"If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+
+    orders_frame(30).to_csv(path, index=False)
+    changed = client.get("/api/dashboard/summary", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["row_count"] == 30
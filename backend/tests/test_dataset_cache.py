@@ -0,0 +1,124 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.file_manager.routes import router
+from utils.dataset_cache import DatasetCache
+from utils.db_manager import DBManager
+
+
+@pytest.fixture(scope="function")
+def dataset_dir(metadata_session):
+    DatasetCache.clear_cache()
+    yield "data"
+    DatasetCache.clear_cache()
+
+
+@pytest.fixture(scope="function")
+def parse_count(monkeypatch):
+    """Counts the dataset files DBManager actually parses."""
+    calls = []
+    read_file = DBManager._read_file
+
+    def counting_read_file(file_path):
+        calls.append(os.path.basename(file_path))
+        return read_file(file_path)
+
+    monkeypatch.setattr(DBManager, "_read_file", staticmethod(counting_read_file))
+    return calls
+
+
+def write_csv(path, rows):
+    pd.DataFrame({"id": range(rows), "amount": [i * 1.5 for i in range(rows)]}).to_csv(path, index=False)
+
+
+def test_dataset_is_parsed_once_per_file_version(dataset_dir, parse_count):
+    """Tests that repeated reads reuse the parsed frame until the file changes."""
+    path = os.path.join(dataset_dir, "sales.csv")
+    write_csv(path, 10)
+
+    first, file_name = DBManager().get_dataframe()
+    second, _ = DBManager().get_dataframe()
+
+    assert file_name == "sales.csv"
+    assert first is second
+    assert parse_count == ["sales.csv"]
+
+    write_csv(path, 12)
+    assert len(DBManager().get_dataframe()[0]) == 12
+    assert parse_count == ["sales.csv", "sales.csv"]
+
+
+def test_cold_cache_reuses_persisted_snapshot(dataset_dir, parse_count):
+    """Tests that a new process loads the Parquet snapshot instead of re-parsing the CSV."""
+    path = os.path.join(dataset_dir, "sales.csv")
+    write_csv(path, 10)
+    parsed, _ = DBManager().get_dataframe()
+
+    DatasetCache.clear_cache()
+    restored, _ = DBManager().get_dataframe()
+
+    assert os.path.exists(DatasetCache.snapshot_path(path))
+    assert parse_count == ["sales.csv"]
+    pd.testing.assert_frame_equal(restored, parsed)
+
+    # A snapshot of an older version of the file is ignored
+    write_csv(path, 3)
+    DatasetCache.clear_cache()
+    assert len(DBManager().get_dataframe()[0]) == 3
+    assert parse_count == ["sales.csv", "sales.csv"]
+
+
+def test_cache_is_bounded(dataset_dir, monkeypatch):
+    """Tests that least recently used entries are evicted past the entry or memory budget."""
+    monkeypatch.setenv("DATASET_CACHE_SIZE", "2")
+    loads = []
+    paths = []
+    for name in ("a", "b", "c"):
+        path = os.path.join(dataset_dir, f"{name}.csv")
+        write_csv(path, 5)
+        paths.append(path)
+
+    def load(path):
+        return DatasetCache.get(path, lambda: loads.append(path) or pd.read_csv(path))
+
+    load(paths[0])
+    load(paths[1])
+    load(paths[0])
+    load(paths[2])
+    load(paths[0])
+    load(paths[1])
+
+    assert [os.path.basename(path) for path in loads] == ["a.csv", "b.csv", "c.csv", "b.csv"]
+
+    monkeypatch.setenv("DATASET_CACHE_MAX_MB", "0")
+    DatasetCache.clear_cache()
+    load(paths[0])
+    load(paths[0])
+    assert len(loads) == 6
+
+
+def test_upload_warms_the_cache(dataset_dir, sample_csv_file, parse_count):
+    """Tests that the dashboard's dataset is already in memory once an upload job completes."""
+    app = FastAPI()
+    app.include_router(router, prefix="/file_manager")
+    client = TestClient(app)
+
+    with open(sample_csv_file, "rb") as file:
+        job_id = client.post(
+            "/file_manager/upload/csv/", files={"file": file}, data={"table_name": "people"}
+        ).json()["job_id"]
+    deadline = time.time() + 10
+    while client.get(f"/file_manager/jobs/{job_id}").json()["phase"] != "completed":
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+    sidecar = os.path.join(dataset_dir, "columnar", "people.parquet")
+    cached = DatasetCache._lookup(DatasetCache.file_key(sidecar))
+    assert cached is not None
+    assert DBManager().get_dataframe()[0] is cached
+    assert parse_count == []
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+
+from utils.db_manager import DBManager
+from utils.engine_registry import EngineRegistry
+from utils.ingest_manager import IngestManager
+
+
+def test_db_managers_share_one_engine(metadata_session):
+    """Tests that every DBManager of a process reuses the registered engine and its pool."""
+    first, second = DBManager(), DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2]})], "orders", first)
+
+    assert first.engine is second.engine
+    assert second.get_table_names() == ["orders"]
+    stats = next(s for s in EngineRegistry().pool_stats() if s["database"] == os.path.abspath("data/db.sqlite"))
+    assert stats["connections_opened"] == 1
+    assert stats["checked_out"] == 0
+
+
+def test_sql_database_is_rebuilt_only_after_schema_changes(metadata_session, monkeypatch):
+    """Tests that table reflection is shared until a table is created or dropped."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks(
+        [pd.DataFrame({"id": range(50), "city": ["Lima", "Quito"] * 25})], "customers", db_manager
+    )
+
+    database = db_manager.get_connection()
+    assert DBManager().get_connection() is database
+    assert database.get_usable_table_names() == ["customers"]
+
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1]})], "orders", db_manager)
+
+    assert DBManager().get_connection() is not database
+    assert DBManager().get_connection().get_usable_table_names() == ["customers", "orders"]
+
+
+def test_engine_is_replaced_when_database_file_is_removed(metadata_session):
+    """Tests that a deleted database file is not read through stale pooled connections."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1]})], "orders", db_manager)
+
+    os.remove(os.path.join("data", "db.sqlite"))
+
+    assert DBManager().engine is not db_manager.engine
+    assert DBManager().get_table_names() == []
+
+
+def test_engine_stats_route(client):
+    """Tests that the pool statistics of the registered engines are exposed."""
+    DBManager().get_table_names()
+
+    response = client.get("/api/file_manager/engine/stats")
+
+    assert response.status_code == 200
+    assert {"database", "pool_size", "checked_out", "connections_opened"} <= response.json()["engines"][0].keys()
+
+
+def test_performance_profile_is_applied_to_every_connection(metadata_session):
+    """Tests that analytics connections run in WAL mode with the configured cache and timeouts."""
+    engine = DBManager().engine
+    with engine.connect() as first, engine.connect() as second:
+        for conn in (first, second):
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -64 * 1024
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 30000
+
+
+def test_performance_profile_can_be_disabled(metadata_session, monkeypatch):
+    """Tests that disabling the profile keeps SQLite's defaults apart from the busy timeout."""
+    monkeypatch.setenv("SQLITE_PERFORMANCE_PROFILE", "false")
+    with DBManager().engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 30000
+
+
+def test_ingest_refreshes_planner_statistics(metadata_session):
+    """Tests that every ingest leaves up-to-date ANALYZE statistics for the table."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(10)})], "orders", db_manager)
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(5)})], "orders", db_manager, "append")
+
+    with db_manager.engine.connect() as conn:
+        stats = conn.exec_driver_sql("SELECT stat FROM sqlite_stat1 WHERE tbl = 'orders'").fetchall()
+    assert [row[0] for row in stats] == ["15"]
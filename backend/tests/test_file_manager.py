@@ -1,7 +1,14 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 
 from main import app
+from utils.file_manager import FileManager
 
 client = TestClient(app)
 
@@ -70,3 +77,37 @@ def test_replace_existing_table(client, sample_csv_file, test_session):
     result = test_session.execute(text("SELECT name FROM sqlite_master WHERE type='table';")).fetchall()
     table_names = [row[0] for row in result]
     assert "test_table" not in table_names, "The previous table was not deleted."
+
+
+# Criterion 4: Uploaded files are streamed to disk with their digest and size
+
+
+def test_save_upload_file_reports_digest_and_size(tmp_path, monkeypatch):
+    """Tests that saving an upload returns its SHA-256 digest and size and leaves no temp files."""
+    monkeypatch.chdir(tmp_path)
+    content = b"id,name\n" + b"".join(f"{i},item {i}\n".encode() for i in range(50000))
+    upload = UploadFile(file=io.BytesIO(content), filename="inventory.csv")
+
+    stored_file = FileManager.save_upload_file(upload, "inventory")
+
+    assert stored_file["path"] == os.path.join("data", "inventory.csv")
+    assert stored_file["sha256"] == hashlib.sha256(content).hexdigest()
+    assert stored_file["size"] == len(content)
+    assert (tmp_path / "data" / "inventory.csv").read_bytes() == content
+    assert os.listdir(tmp_path / "data") == ["inventory.csv"]
+
+
+def test_save_upload_file_rejects_oversized_upload(tmp_path, monkeypatch):
+    """Tests that uploads over MAX_UPLOAD_SIZE_MB are rejected without replacing the existing file."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MAX_UPLOAD_SIZE_MB", "1")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "inventory.csv").write_bytes(b"id\n1\n")
+    upload = UploadFile(file=io.BytesIO(b"x" * (2 * 1024 * 1024)), filename="inventory.csv")
+
+    with pytest.raises(HTTPException) as exc_info:
+        FileManager.save_upload_file(upload, "inventory")
+
+    assert exc_info.value.status_code == 413
+    assert (tmp_path / "data" / "inventory.csv").read_bytes() == b"id\n1\n"
+    assert os.listdir(tmp_path / "data") == ["inventory.csv"]
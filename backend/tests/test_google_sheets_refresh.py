@@ -0,0 +1,150 @@
+import hashlib
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from services.file_manager_service import FileManagerService
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.sheet_sync_manager import SheetSyncManager
+
+
+class CsvExportServer(ThreadingHTTPServer):
+    """Local stand-in for the Google Sheets CSV export endpoint with ETag support."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), CsvExportHandler)
+        self.sheets = {}
+        self.full_responses = 0
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}/export?format=csv"
+
+
+class CsvExportHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = self.path.strip("/").split("/")[0]
+        content = self.server.sheets[name].encode()
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.server.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def csv_server():
+    server = CsvExportServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read_table(table_name):
+    with DBManager().engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text(f"SELECT * FROM {table_name} ORDER BY 1, 2")).fetchall()]
+
+
+def test_apply_diff_by_key(metadata_session):
+    """Tests that keyed rows are inserted, updated and deleted individually."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2, 3], "stock": [10, 20, 30]})], "stock", db_manager)
+
+    changes = SheetSyncManager.apply_diff(
+        "stock", pd.DataFrame({"id": [1, 2, 4], "stock": [10, 25, 40]}), db_manager
+    )
+
+    assert changes == {"replaced": False, "inserted": 1, "updated": 1, "deleted": 1}
+    assert read_table("stock") == [(1, 10), (2, 25), (4, 40)]
+
+
+def test_apply_diff_without_key(metadata_session):
+    """Tests that tables without a unique first column are diffed as a multiset of rows."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks(
+        [pd.DataFrame({"category": ["a", "a", "b"], "stock": [1, 1, 2]})], "stock", db_manager
+    )
+
+    changes = SheetSyncManager.apply_diff(
+        "stock", pd.DataFrame({"category": ["a", "b", "c"], "stock": [1, 2, 3]}), db_manager
+    )
+
+    assert changes == {"replaced": False, "inserted": 1, "updated": 0, "deleted": 1}
+    assert read_table("stock") == [("a", 1), ("b", 2), ("c", 3)]
+
+
+def test_apply_diff_compares_typed_values(metadata_session):
+    """Tests that dates, timestamps and numbers read back from SQLite match the same values parsed from the sheet."""
+    sheet = "id,day,shipped_at,price,qty\n1,2024-01-05,2024-01-05T10:00:00,1.5,\n2,2024-02-10,2024-02-10T11:30:00,2.0,3\n"
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.read_csv(io.StringIO(sheet))], "shipments", db_manager)
+    # Timestamps as pandas' to_sql writes them, as in tables loaded before the ingest pipeline
+    with db_manager.engine.begin() as conn:
+        conn.execute(text("UPDATE shipments SET shipped_at = shipped_at || '.000000'"))
+
+    unchanged = SheetSyncManager.apply_diff("shipments", pd.read_csv(io.StringIO(sheet)), db_manager)
+    changed = SheetSyncManager.apply_diff(
+        "shipments", pd.read_csv(io.StringIO(sheet.replace("2.0,3", "2.5,3"))), db_manager
+    )
+
+    assert unchanged == {"replaced": False, "inserted": 0, "updated": 0, "deleted": 0}
+    assert changed == {"replaced": False, "inserted": 0, "updated": 1, "deleted": 0}
+    assert read_table("shipments")[1][3] == 2.5
+
+
+def test_refresh_skips_unchanged_and_diffs_changed_sheets(metadata_session, csv_server):
+    """Tests that a refresh uses conditional requests and only rewrites the rows that changed."""
+    csv_server.sheets["inventory"] = "id,product,stock\n1,screws,100\n2,nails,50\n"
+    csv_server.sheets["suppliers"] = "id,name\n1,ACME\n"
+
+    service = FileManagerService()
+    assert service.upload_google_sheet("inventory", csv_server.url("inventory"))["success"]
+    assert service.upload_google_sheet("suppliers", csv_server.url("suppliers"))["success"]
+    assert csv_server.full_responses == 2
+
+    result = service.fetch_and_update_google_sheets()
+
+    assert sorted(result["unchanged_tables"]) == ["inventory", "suppliers"]
+    assert result["updated_tables"] == []
+    assert csv_server.full_responses == 2
+
+    csv_server.sheets["inventory"] = "id,product,stock\n1,screws,80\n3,bolts,10\n"
+
+    result = service.fetch_and_update_google_sheets()
+
+    assert result["success"]
+    assert result["updated_tables"] == ["inventory"]
+    assert result["unchanged_tables"] == ["suppliers"]
+    assert result["changes"]["inventory"] == {"replaced": False, "inserted": 1, "updated": 1, "deleted": 1}
+    assert read_table("inventory") == [(1, "screws", 80), (3, "bolts", 10)]
+
+
+def test_refresh_rewrites_a_sheet_table_replaced_in_between(metadata_session, csv_server):
+    """Tests that an unchanged sheet is applied again when its table was replaced with rows of the same shape."""
+    csv_server.sheets["suppliers"] = "id,name\n1,ACME\n"
+    service = FileManagerService()
+    assert service.upload_google_sheet("suppliers", csv_server.url("suppliers"))["success"]
+
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1], "name": ["Globex"]})], "suppliers", DBManager())
+    result = service.fetch_and_update_google_sheets()
+
+    assert result["updated_tables"] == ["suppliers"]
+    assert read_table("suppliers") == [(1, "ACME")]
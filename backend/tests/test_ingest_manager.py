@@ -0,0 +1,248 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.schema_manager import COLUMN_STATS_TABLE, TABLE_STATS_TABLE, TABLE_VERSIONS_TABLE, SchemaManager
+
+BOOKKEEPING_TABLES = {TABLE_VERSIONS_TABLE, TABLE_STATS_TABLE, COLUMN_STATS_TABLE}
+
+
+@pytest.fixture(scope="function")
+def db_manager(tmp_path, monkeypatch):
+    """Provides a DBManager backed by an empty analytics database in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return DBManager()
+
+
+@pytest.fixture(scope="function")
+def large_csv_file(tmp_path):
+    """Generates a CSV file with more rows than a single ingestion chunk."""
+    lines = ["id,name,price"]
+    lines += [f"{i},item {i},{i * 1.5}" for i in range(1, 1001)]
+    lines.append("1001,item 1001,")
+    file_path = tmp_path / "inventory.csv"
+    file_path.write_text("\n".join(lines))
+    return file_path
+
+
+def test_stream_csv_reports_rows_and_columns(db_manager, large_csv_file):
+    """Tests that a chunked CSV ingestion writes every row and reports the schema."""
+    result = IngestManager.stream_csv(str(large_csv_file), "inventory", db_manager, chunksize=100)
+
+    assert result["row_count"] == 1001
+    assert result["columns"] == ["id", "name", "price"]
+
+    with db_manager.engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM inventory")).scalar()
+        missing_price = conn.execute(text("SELECT price FROM inventory WHERE id = 1001")).scalar()
+    assert count == 1001
+    assert missing_price is None
+
+
+def test_stream_csv_schema_is_inferred_from_first_chunk(db_manager, large_csv_file):
+    """Tests that the table is created with types inferred from the first chunk."""
+    IngestManager.stream_csv(str(large_csv_file), "inventory", db_manager, chunksize=100)
+
+    schema = {col["column_name"]: col["data_type"] for col in db_manager.get_table_schema("inventory")}
+    assert schema == {"id": "INTEGER", "name": "TEXT", "price": "REAL"}
+
+
+def test_stream_csv_replace_and_append(db_manager, large_csv_file):
+    """Tests that 'replace' recreates the table and 'append' adds to it."""
+    IngestManager.stream_csv(str(large_csv_file), "inventory", db_manager, chunksize=100)
+    IngestManager.stream_csv(str(large_csv_file), "inventory", db_manager, if_exists="append", chunksize=100)
+
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM inventory")).scalar() == 2002
+
+    IngestManager.stream_csv(str(large_csv_file), "inventory", db_manager, chunksize=100)
+
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM inventory")).scalar() == 1001
+
+
+@pytest.fixture(scope="function")
+def workbook_file(tmp_path):
+    """Generates a workbook with two populated sheets and an empty one."""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    orders = workbook.active
+    orders.title = "Orders"
+    orders.append(["id", "customer", "total"])
+    for i in range(1, 251):
+        orders.append([i, f"customer {i}", i * 2.5])
+    orders.append([None, None, None])
+
+    returns = workbook.create_sheet("Returns 2024")
+    returns.append(["order_id", "reason"])
+    returns.append([7, "damaged"])
+
+    workbook.create_sheet("Empty")
+
+    file_path = tmp_path / "sales.xlsx"
+    workbook.save(file_path)
+    return file_path
+
+
+def test_stream_excel_reads_first_sheet_in_chunks(db_manager, workbook_file):
+    """Tests that the first sheet is streamed in chunks and empty rows are skipped."""
+    result = IngestManager.stream_excel(str(workbook_file), "orders", db_manager, chunksize=100)
+
+    assert result == {"row_count": 250, "columns": ["id", "customer", "total"]}
+    schema = {col["column_name"]: col["data_type"] for col in db_manager.get_table_schema("orders")}
+    assert schema == {"id": "INTEGER", "customer": "TEXT", "total": "REAL"}
+
+
+def test_excel_headers_are_named_like_pandas(db_manager, tmp_path):
+    """Tests that blank and repeated header cells get the column names pandas would give them."""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["amount", "amount", None, "amount.1", "", "note"])
+    sheet.append([1, 2, 3, 4, 5, "a"])
+    file_path = tmp_path / "ledger.xlsx"
+    workbook.save(file_path)
+
+    result = IngestManager.stream_excel(str(file_path), "ledger", db_manager)
+    workbook_result = IngestManager.stream_excel_workbook(str(file_path), "book", db_manager, max_workers=1)
+
+    expected = pd.read_excel(file_path).columns.tolist()
+    assert result["columns"] == expected == ["amount", "amount.2", "Unnamed: 2", "amount.1", "Unnamed: 4", "note"]
+    assert workbook_result["tables"]["Sheet"]["columns"] == expected
+    with db_manager.engine.connect() as conn:
+        row = conn.execute(text('SELECT amount, "amount.2", "amount.1", "Unnamed: 4" FROM ledger')).fetchone()
+    assert tuple(row) == (1, 2, 4, 5)
+
+
+@pytest.mark.parametrize("cpu_count", [1, 4])
+def test_stream_excel_workbook_loads_each_sheet(db_manager, workbook_file, monkeypatch, cpu_count):
+    """Tests that every non-empty sheet is loaded into its own table, serially or in the process pool."""
+    monkeypatch.setattr("utils.ingest_manager.os.cpu_count", lambda: cpu_count)
+    result = IngestManager.stream_excel_workbook(str(workbook_file), "sales", db_manager, chunksize=100, max_workers=2)
+
+    assert result["row_count"] == 251
+    assert {sheet: info["table_name"] for sheet, info in result["tables"].items()} == {
+        "Orders": "sales_orders",
+        "Returns 2024": "sales_returns_2024",
+    }
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM sales_orders")).scalar() == 250
+        assert conn.execute(text("SELECT reason FROM sales_returns_2024")).scalar() == "damaged"
+    assert "sales_empty" not in db_manager.get_table_names()
+
+
+def test_stream_excel_workbook_fails_on_a_sheet_that_cannot_be_parsed(db_manager, workbook_file, monkeypatch):
+    """Tests that only empty sheets are skipped and any other parsing error fails the whole load."""
+    real_compact_frame = SchemaManager.compact_frame
+
+    def compact_frame(df):
+        if "reason" in df.columns:
+            raise ValueError("cannot convert column 'reason'")
+        return real_compact_frame(df)
+
+    monkeypatch.setattr(SchemaManager, "compact_frame", staticmethod(compact_frame))
+
+    with pytest.raises(ValueError, match="cannot convert"):
+        IngestManager.stream_excel_workbook(str(workbook_file), "sales", db_manager, max_workers=1)
+
+
+def test_replace_keeps_old_table_readable_during_load(db_manager):
+    """Tests that readers see the previous table until the new rows are swapped in."""
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(10)})], "live", db_manager)
+    observed = []
+
+    def chunks_with_concurrent_reads():
+        for start in range(0, 30, 10):
+            with db_manager.engine.connect() as conn:
+                observed.append(conn.execute(text("SELECT COUNT(*) FROM live")).scalar())
+            yield pd.DataFrame({"id": range(start, start + 10)})
+
+    IngestManager.ingest_chunks(chunks_with_concurrent_reads(), "live", db_manager)
+
+    assert observed == [10, 10, 10]
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM live")).scalar() == 30
+    assert set(db_manager.get_internal_table_names()) == BOOKKEEPING_TABLES
+
+
+def test_failed_replace_leaves_old_table_intact(db_manager):
+    """Tests that an interrupted load drops its staging table and keeps the live one."""
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(10)})], "live", db_manager)
+
+    def failing_chunks():
+        yield pd.DataFrame({"id": range(5)})
+        raise ValueError("broken upload")
+
+    with pytest.raises(ValueError, match="broken upload"):
+        IngestManager.ingest_chunks(failing_chunks(), "live", db_manager)
+
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM live")).scalar() == 10
+    assert set(db_manager.get_internal_table_names()) == BOOKKEEPING_TABLES
+
+
+def test_concurrent_ingests_wait_for_the_write_lock(db_manager):
+    """Tests that overlapping replace and append jobs queue on the write lock instead of failing."""
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(10)})], "appended", db_manager)
+    errors = []
+
+    def slow_chunks(start):
+        for offset in range(0, 50, 10):
+            time.sleep(0.01)
+            yield pd.DataFrame({"id": range(start + offset, start + offset + 10)})
+
+    def ingest(table_name, if_exists):
+        try:
+            IngestManager.ingest_chunks(slow_chunks(0), table_name, DBManager(), if_exists)
+        except Exception as e:
+            errors.append(e)
+
+    jobs = [("first", "replace"), ("second", "replace"), ("appended", "append"), ("first", "append")]
+    threads = [threading.Thread(target=ingest, args=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with db_manager.engine.connect() as conn:
+        counts = [conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar() for name in ("second", "appended")]
+    assert counts == [50, 60]
+
+
+def test_concurrent_replaces_of_one_table_use_their_own_staging_tables(db_manager):
+    """Tests that a failing replace cannot drop or swap in the staging table of another job on the same table."""
+    assert SchemaManager.staging_table_name("live") != SchemaManager.staging_table_name("live")
+    errors = []
+
+    def chunks(rows, fail):
+        for offset in range(0, rows, 10):
+            time.sleep(0.01)
+            yield pd.DataFrame({"id": range(offset, offset + 10)})
+        if fail:
+            raise ValueError("broken upload")
+
+    def replace(rows, fail=False):
+        try:
+            IngestManager.ingest_chunks(chunks(rows, fail), "live", DBManager())
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=replace, args=job) for job in [(30,), (40, True), (50,), (40, True)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["broken upload", "broken upload"]
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM live")).scalar() in (30, 50)
+    assert set(db_manager.get_internal_table_names()) == BOOKKEEPING_TABLES
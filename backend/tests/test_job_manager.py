@@ -0,0 +1,171 @@
+import os
+import time
+
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from apps.file_manager.routes import router
+from database.models.dataset import DataSet
+from database.models.ingestion_job import IngestionJob
+from utils.db_manager import DBManager
+from utils.job_manager import JobManager
+
+app = FastAPI()
+app.include_router(router, prefix="/file_manager")
+client = TestClient(app)
+
+
+def wait_for_job(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/file_manager/jobs/{job_id}").json()
+        if job["phase"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+def test_upload_returns_job_and_completes_in_background(metadata_session, sample_csv_file):
+    """Tests that uploading a CSV returns a job id right away and the job reports its progress."""
+    with open(sample_csv_file, "rb") as file:
+        response = client.post(
+            "/file_manager/upload/csv/",
+            files={"file": file},
+            data={"table_name": "test_table"}
+        )
+
+    assert response.status_code == 202
+    assert response.json()["phase"] == "queued"
+
+    job = wait_for_job(response.json()["job_id"])
+
+    assert job["phase"] == "completed", job["error"]
+    assert job["rows_processed"] == 1
+    assert job["result"]["columns"] == ["id", "name", "email"]
+    with DBManager().engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM test_table")).scalar() == 1
+    with metadata_session() as db:
+        assert db.query(DataSet).filter_by(table_name="test_table").count() == 1
+
+
+def test_failed_job_reports_error(metadata_session, sample_csv_file):
+    """Tests that appending to a missing table marks the job as failed with the error message."""
+    with open(sample_csv_file, "rb") as file:
+        response = client.put(
+            "/file_manager/tables/missing_table",
+            files={"file": file},
+            data={"replace": "false"}
+        )
+
+    job = wait_for_job(response.json()["job_id"])
+
+    assert job["phase"] == "failed"
+    assert "does not exist" in job["error"]
+
+
+def test_unknown_job_returns_404(metadata_session):
+    response = client.get("/file_manager/jobs/999")
+    assert response.status_code == 404
+
+
+def test_resume_pending_jobs_after_restart(metadata_session, sample_csv_file, tmp_path):
+    """Tests that interrupted replacements are re-queued and interrupted appends are marked as failed."""
+    source = str(tmp_path / "data" / "resumed.csv")
+    (tmp_path / "data" / "resumed.csv").write_bytes(sample_csv_file.read_bytes())
+
+    with metadata_session() as db:
+        replace_job = IngestionJob(table_name="resumed", source=source, file_format="csv",
+                                   operation="upload", replace=True, phase="inserting", rows_processed=0)
+        append_job = IngestionJob(table_name="resumed", source=source, file_format="csv",
+                                  operation="update", replace=False, phase="inserting", rows_processed=0)
+        db.add_all([replace_job, append_job])
+        db.commit()
+        replace_id, append_id = replace_job.id, append_job.id
+
+    assert JobManager().resume_pending_jobs() == 1
+
+    assert wait_for_job(replace_id)["phase"] == "completed"
+    append_status = wait_for_job(append_id)
+    assert append_status["phase"] == "failed"
+    assert "restart" in append_status["error"]
+
+
+def upload_csv(file_path, table_name, **data):
+    with open(file_path, "rb") as file:
+        return client.post(
+            "/file_manager/upload/csv/",
+            files={"file": file},
+            data={"table_name": table_name, **data}
+        )
+
+
+def test_repeated_upload_is_deduplicated(metadata_session, sample_csv_file):
+    """Tests that re-uploading identical content skips ingestion and returns the cached shape."""
+    first = upload_csv(sample_csv_file, "test_table")
+    assert wait_for_job(first.json()["job_id"])["phase"] == "completed"
+
+    second = upload_csv(sample_csv_file, "test_table")
+
+    assert second.status_code == 200
+    assert second.json()["deduplicated"] is True
+    assert second.json()["row_count"] == 1
+    assert second.json()["columns"] == ["id", "name", "email"]
+
+    forced = upload_csv(sample_csv_file, "test_table", force="true")
+    assert forced.status_code == 202
+    assert wait_for_job(forced.json()["job_id"])["phase"] == "completed"
+
+
+def test_upload_is_reingested_after_table_changes(metadata_session, sample_csv_file):
+    """Tests that the cached upload is ignored once the table has been modified."""
+    first = upload_csv(sample_csv_file, "test_table")
+    assert wait_for_job(first.json()["job_id"])["phase"] == "completed"
+
+    with open(sample_csv_file, "rb") as file:
+        append = client.put("/file_manager/tables/test_table", files={"file": file}, data={"replace": "false"})
+    assert wait_for_job(append.json()["job_id"])["phase"] == "completed"
+
+    again = upload_csv(sample_csv_file, "test_table")
+    assert again.status_code == 202
+
+
+def test_parquet_upload_job(metadata_session, tmp_path):
+    """Tests that a Parquet upload is queued and loaded like the text formats."""
+    parquet_path = tmp_path / "prices.parquet"
+    pd.DataFrame({"sku": ["a", "b"], "price": [1.5, 2.5]}).to_parquet(parquet_path)
+
+    with open(parquet_path, "rb") as file:
+        response = client.post(
+            "/file_manager/upload/parquet/",
+            files={"file": ("prices.parquet", file)},
+            data={"table_name": "prices"}
+        )
+
+    assert response.status_code == 202
+    job = wait_for_job(response.json()["job_id"])
+    assert job["phase"] == "completed", job["error"]
+    assert job["result"]["columns"] == ["sku", "price"]
+    assert os.path.exists(os.path.join("data", "columnar", "prices.parquet"))
+
+
+def test_upload_is_reingested_after_a_same_shape_replace(metadata_session, sample_csv_file, tmp_path):
+    """Tests that replacing the table with other rows of the same shape invalidates the cached upload."""
+    first = upload_csv(sample_csv_file, "test_table")
+    assert wait_for_job(first.json()["job_id"])["phase"] == "completed"
+
+    other_file = tmp_path / "other.csv"
+    other_file.write_text("id,name,email\n1,Other User,other@example.com")
+    with open(other_file, "rb") as file:
+        replace = client.put("/file_manager/tables/test_table", files={"file": file}, data={"replace": "true"})
+    assert wait_for_job(replace.json()["job_id"])["phase"] == "completed"
+    with metadata_session() as db:
+        dataset = db.query(DataSet).filter_by(table_name="test_table").one()
+        assert (dataset.content_hash, dataset.table_fingerprint) == (None, None)
+
+    again = upload_csv(sample_csv_file, "test_table")
+    assert again.status_code == 202
+    assert wait_for_job(again.json()["job_id"])["phase"] == "completed"
+    with DBManager().engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM test_table")).scalar() == "Test User"
@@ -0,0 +1,123 @@
+import pandas as pd
+from sqlalchemy import event
+
+from utils.db_manager import DBManager
+from utils.file_manager import FileManager
+from utils.ingest_manager import IngestManager
+from utils.metadata_cache import MetadataCache
+from utils.schema_manager import SchemaManager
+from utils.table_stats_manager import TableStatsManager
+
+
+def count_statements(engine, fragment):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if fragment in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_schema_is_read_once_per_table_version(metadata_session):
+    """Tests that repeated schema lookups are served from the cache until the table changes."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2], "name": ["a", "b"]})], "orders", db_manager)
+    MetadataCache.clear_cache()
+    pragmas = count_statements(db_manager.engine, "PRAGMA table_info")
+
+    for _ in range(3):
+        assert [col["column_name"] for col in db_manager.get_table_schema("orders")] == ["id", "name"]
+    assert len(pragmas) == 1
+
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [3], "name": ["c"]})], "orders", db_manager, "append")
+
+    assert db_manager.get_table_metadata("orders")["row_count"] == 3
+    reads = len(pragmas)
+    db_manager.get_table_schema("orders")
+    assert len(pragmas) == reads
+
+
+def test_row_count_comes_from_stored_statistics(metadata_session):
+    """Tests that schema lookups never count rows, and metadata only counts them when ingest's statistics are stale."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2, 3], "name": ["a", None, "c"]})], "orders", db_manager)
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [4], "name": [None]})], "orders", db_manager, "append")
+    MetadataCache.clear_cache()
+    counts = count_statements(db_manager.engine, "COUNT(*)")
+
+    db_manager.get_table_schema("orders")
+    db_manager.get_table_fingerprint("orders")
+    assert db_manager.get_table_metadata("orders")["row_count"] == 4
+    assert counts == []
+
+    with db_manager.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM orders WHERE id = 1")
+        SchemaManager.bump_table_version(conn, "orders")
+    assert [db_manager.get_table_metadata("orders")["row_count"] for _ in range(2)] == [3, 3]
+    assert len(counts) == 1
+
+
+def test_metadata_follows_replace_drop_and_dataframe_inserts(metadata_session):
+    """Tests that every write path invalidates the cached metadata of its table."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2]})], "orders", db_manager)
+    assert db_manager.get_table_metadata("orders")["row_count"] == 2
+
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1], "total": [9.5]})], "orders", db_manager)
+    metadata = db_manager.get_table_metadata("orders")
+    assert [col["data_type"] for col in metadata["columns"]] == ["INTEGER", "REAL"]
+    assert metadata["row_count"] == 1
+
+    FileManager.insert_dataframe_to_table(pd.DataFrame({"id": [1, 2, 3]}), "orders", db_manager)
+    assert db_manager.get_table_metadata("orders")["row_count"] == 3
+
+    with db_manager.engine.begin() as conn:
+        SchemaManager.drop_table(conn, "orders")
+    assert db_manager.get_table_metadata("orders") is None
+
+
+def test_metadata_and_statistics_follow_writes_without_a_version_bump(metadata_session):
+    """Tests that rows written outside ingest refresh the row count and statistics the caches serve."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2], "total": [1.5, 2.5]})], "orders", db_manager)
+    assert db_manager.get_table_metadata("orders")["row_count"] == 2
+    assert TableStatsManager.describe(db_manager, "orders")["descriptive_statistics"]["total"]["max"] == 2.5
+
+    with db_manager.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO orders VALUES (3, 10.0)")
+
+    assert db_manager.get_table_version("orders") == 1
+    assert db_manager.get_table_metadata("orders")["row_count"] == 3
+    described = TableStatsManager.describe(db_manager, "orders")["descriptive_statistics"]["total"]
+    assert (described["count"], described["max"]) == (3, 10.0)
+    assert TableStatsManager.histogram(db_manager, "orders", "total")["count"] == 3
+
+
+def test_cached_metadata_cannot_be_mutated_by_callers(metadata_session):
+    """Tests that callers receive copies of the cached entries."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1]})], "orders", db_manager)
+
+    db_manager.get_table_schema("orders")[0]["column_name"] = "changed"
+
+    assert db_manager.get_table_schema("orders")[0]["column_name"] == "id"
+
+
+def test_bulk_metadata_route(metadata_session, client):
+    """Tests that the metadata of every table is returned in one call."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2], "name": ["a", "b"]})], "customers", db_manager)
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1]})], "orders", db_manager)
+    with db_manager.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX orders_id ON orders (id)")
+
+    response = client.get("/api/file_manager/tables/metadata")
+
+    assert response.status_code == 200
+    tables = {table["table_name"]: table for table in response.json()["tables"]}
+    assert tables.keys() == {"customers", "orders"}
+    assert tables["customers"]["row_count"] == 2
+    assert [col["column_name"] for col in tables["customers"]["columns"]] == ["id", "name"]
+    assert tables["orders"]["indexes"] == [{"name": "orders_id", "unique": False, "columns": ["id"]}]
@@ -0,0 +1,53 @@
+import pandas as pd
+from sqlalchemy import event
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.query_capture import QueryCapture
+from utils.sql_sandbox import SQLSandbox
+
+
+def test_answer_reuses_the_final_query_the_agent_ran(metadata_session, scripted_agent, monkeypatch):
+    """Tests that query_nlp returns the rows of the agent's last successful query without running SQL again."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"region": ["north", "south"], "total": [3, 4]})], "orders", db_manager)
+    agent = scripted_agent(db_manager, [
+        "SELECT region FROM orders",
+        "SELECT nope FROM orders",
+        "SELECT region, total * 2 AS doubled FROM orders ORDER BY region",
+    ])
+    statements = []
+    sandboxed = []
+    monkeypatch.setattr(SQLSandbox, "execute", staticmethod(
+        lambda db_path, query, execute=SQLSandbox.execute: sandboxed.append(query) or execute(db_path, query)
+    ))
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_manager.engine, "before_cursor_execute", count)
+    try:
+        answer = agent.query_nlp("Double the totals")
+    finally:
+        event.remove(db_manager.engine, "before_cursor_execute", count)
+
+    assert answer["sql_query"] == "SELECT region, total * 2 AS doubled FROM orders ORDER BY region"
+    assert answer["query_result"] == {"region": ["north", "south"], "doubled": [6, 8]}
+    assert sum("doubled" in statement for statement in sandboxed) == 1
+    assert not any("doubled" in statement for statement in statements)
+
+
+def test_agent_sees_the_captured_rows_and_errors(metadata_session, scripted_agent):
+    """Tests the observation the LLM receives and that a run whose only query failed reports the error."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"name": ["x" * 400, "b"]})], "people", db_manager)
+    agent = scripted_agent(db_manager, ["SELECT name FROM people", "SELECT 1 FROM missing"])
+
+    with QueryCapture.collect() as captures:
+        response = agent.agent_executor.invoke({"input": "names"})
+    observations = [observation for _, observation in response["intermediate_steps"]]
+
+    assert observations[0] == str([("x" * 297 + "...",), ("b",)])
+    assert observations[1].startswith("Error: ")
+    assert QueryCapture.final(captures)["query"] == "SELECT name FROM people"
+    assert "error" in QueryCapture.final(captures[1:])
@@ -0,0 +1,105 @@
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.result_encoder import (ARROW_FILE_MEDIA_TYPE, ARROW_METADATA_KEY,
+                                  ARROW_STREAM_MEDIA_TYPE, JSON_MEDIA_TYPE,
+                                  ColumnarResult, ResultEncoder)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("application/vnd.apache.arrow.stream", ARROW_STREAM_MEDIA_TYPE),
+    ("application/json;q=0.9, application/vnd.apache.arrow.stream", ARROW_STREAM_MEDIA_TYPE),
+    ("application/vnd.apache.arrow.stream;q=0.2, application/json", JSON_MEDIA_TYPE),
+    ("text/html, application/vnd.apache.arrow.file;q=0.5", ARROW_FILE_MEDIA_TYPE),
+])
+def test_negotiation(accept, expected):
+    """Tests that the supported media type with the highest quality wins, JSON by default."""
+    assert ResultEncoder.negotiate(accept) == expected
+
+
+def test_cursor_is_transposed_in_batches():
+    """Tests that columns are built from fetchmany batches, dropping skipped leading columns."""
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10) "
+            "SELECT i AS rowid_, i * 2 AS double, 'v' || i AS label FROM n"
+        )
+        columnar = ColumnarResult.from_cursor(result, skip=1, batch_size=3)
+
+    assert columnar.columns == ["double", "label"]
+    assert columnar.num_rows == 10
+    assert columnar.to_dict()["double"] == list(range(2, 21, 2))
+    assert ColumnarResult.from_rows(["a", "b"], []).to_dict() == {"a": [], "b": []}
+
+
+def test_arrow_encoding_round_trip():
+    """Tests that Arrow IPC keeps types and metadata and falls back to text for mixed columns."""
+    columnar = ColumnarResult(["id", "amount", "mixed"], [[1, 2, None], [1.5, None, 3.0], [1, "a", None]])
+
+    body = ResultEncoder.to_arrow_ipc(columnar, {"next_after": 3})
+    table = pa.ipc.open_stream(body).read_all()
+
+    assert table.schema.field("id").type == pa.int64()
+    assert table.schema.field("amount").type == pa.float64()
+    assert table.column("mixed").to_pylist() == ["1", "a", None]
+    assert orjson.loads(table.schema.metadata[ARROW_METADATA_KEY]) == {"next_after": 3}
+    assert orjson.loads(ResultEncoder.to_json(columnar, {"next_after": 3})) == {
+        "next_after": 3,
+        "columns": ["id", "amount", "mixed"],
+        "data": {"id": [1, 2, None], "amount": [1.5, None, 3.0], "mixed": [1, "a", None]},
+    }
+
+
+def test_table_data_route_serves_arrow(metadata_session, client):
+    """Tests that table pages are sent as an Arrow stream when the client accepts it."""
+    IngestManager.ingest_chunks(
+        [pd.DataFrame({"id": range(30), "city": ["Lima", "Quito", "Cusco"] * 10})], "customers", DBManager()
+    )
+
+    response = client.get(
+        "/api/file_manager/tables/customers/data",
+        params={"limit": 20},
+        headers={"Accept": ARROW_STREAM_MEDIA_TYPE},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["id", "city"]
+    assert table.column("id").to_pylist() == list(range(20))
+    assert pa.types.is_dictionary(table.schema.field("city").type)
+    assert table.column("city").to_pylist()[:3] == ["Lima", "Quito", "Cusco"]
+    metadata = orjson.loads(table.schema.metadata[ARROW_METADATA_KEY])
+    assert metadata == {"table_name": "customers", "next_after": 20, "limit": 20}
+
+
+def test_stored_chat_result_is_negotiated(metadata_session, monkeypatch, client):
+    """Tests that a response's stored query result is served in the accepted encoding."""
+    from database.models.chat import Chat
+    from main import app
+    from services.response_service import ResponseService
+    from utils.auth_manager import AuthManager
+
+    monkeypatch.setattr("services.chat_service.SessionLocal", metadata_session)
+    monkeypatch.setattr("services.response_service.SessionLocal", metadata_session)
+    monkeypatch.setitem(app.dependency_overrides, AuthManager.get_current_user, lambda: 7)
+    with metadata_session() as db:
+        db.add(Chat(id=1, name="Sales", user_id=7))
+        db.commit()
+    response = ResponseService.create_response(1, None, "Two regions", {"region": ["north", "south"], "total": [3, 4]})
+
+    url = f"/api/chats/responses/{response.id}/result"
+    arrow = client.get(url, headers={"Accept": ARROW_STREAM_MEDIA_TYPE})
+    as_json = client.get(url).json()
+
+    assert pa.ipc.open_stream(arrow.content).read_all().to_pydict() == {"region": ["north", "south"], "total": [3, 4]}
+    assert as_json["data"] == {"region": ["north", "south"], "total": [3, 4]}
+    assert client.get("/api/chats/responses/999/result").status_code == 404
@@ -0,0 +1,111 @@
+import random
+
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.sampling_manager import SamplingManager
+from utils.sheet_sync_manager import SheetSyncManager
+
+
+@pytest.fixture(scope="function")
+def sparse_table(metadata_session):
+    """A 1000-row table where two thirds of the rowids have been deleted."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks(
+        [pd.DataFrame({"id": range(3000), "group": ["rare" if i == 7 else "common" for i in range(3000)]})],
+        "events",
+        db_manager
+    )
+    with db_manager.engine.begin() as conn:
+        conn.exec_driver_sql('DELETE FROM events WHERE id % 3 != 1 AND id != 7')
+    return db_manager
+
+
+def test_uniform_sample_skips_gaps(sparse_table):
+    """Tests that rowid probing returns distinct existing rows from a table with gaps."""
+    with sparse_table.engine.connect() as conn:
+        rowids = SamplingManager.sample_rowids(conn, "events", 50, random.Random(1))
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT rowid FROM events")}
+
+    assert len(rowids) == 50
+    assert len(set(rowids)) == 50
+    assert set(rowids) <= existing
+
+
+def test_sample_returns_every_row_of_small_tables(metadata_session):
+    """Tests that asking for more rows than the table holds returns the whole table."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]})], "small", db_manager)
+
+    sample = db_manager.get_sample_data("small", 10)
+
+    assert sorted(row["id"] for row in sample) == [1, 2, 3]
+    assert db_manager.get_sample_data_in_rows("small", 10).keys() == {"id", "name"}
+
+
+def test_stratified_sample_represents_rare_values(sparse_table):
+    """Tests that every stratum gets at least one row and quotas follow the value counts."""
+    sample = sparse_table.get_sample_data("events", 10, stratify_by="group")
+
+    groups = [row["group"] for row in sample]
+    assert groups.count("rare") == 1
+    assert groups.count("common") == 9
+    assert SamplingManager.stratum_quotas({"a": 90, "b": 9, "c": 1}, 10) == {"a": 8, "b": 1, "c": 1}
+
+
+def test_sample_cache_is_invalidated_by_changes(metadata_session):
+    """Tests that samples are cached until the table is appended to or updated in place."""
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(100), "value": [0] * 100})], "metrics", db_manager)
+
+    first = db_manager.get_sample_data("metrics", 5)
+    assert db_manager.get_sample_data("metrics", 5) == first
+
+    SheetSyncManager.apply_diff("metrics", pd.DataFrame({"id": range(100), "value": [1] * 100}), db_manager)
+    updated = db_manager.get_sample_data("metrics", 5)
+    assert {row["value"] for row in updated} == {1}
+
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [100], "value": [2]})], "metrics", db_manager, "append")
+    assert db_manager.get_table_version("metrics") == 3
+
+
+def test_stratified_sample_with_many_rare_strata_stays_within_the_limit(metadata_session):
+    """Tests that the per-stratum minimum is taken back from large strata so the sample never exceeds the limit."""
+    quotas = SamplingManager.stratum_quotas({"common": 999600, **{f"r{i}": 10 for i in range(40)}}, 100)
+    assert sum(quotas.values()) == 100
+    assert quotas["common"] == 60
+    assert all(quotas[f"r{i}"] == 1 for i in range(40))
+
+    db_manager = DBManager()
+    groups = ["common"] * 20000 + [f"r{i}" for i in range(40)]
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(len(groups)), "group": groups})], "events", db_manager)
+
+    sample = db_manager.get_sample_data("events", 100, stratify_by="group")
+
+    assert len(sample) == 100
+    assert len({row["group"] for row in sample}) == 41
+
+
+def test_unfilled_strata_are_completed_in_one_pass(metadata_session):
+    """Tests that strata rowid probing misses are all filled by a single extra query."""
+    db_manager = DBManager()
+    groups = ["common"] * 20000 + [f"r{i}" for i in range(40) for _ in range(3)]
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(len(groups)), "group": groups})], "events", db_manager)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_manager.engine, "before_cursor_execute", count)
+    try:
+        with db_manager.engine.connect() as conn:
+            rowids = SamplingManager.stratified_rowids(conn, "events", "group", 100, random.Random(3))
+    finally:
+        event.remove(db_manager.engine, "before_cursor_execute", count)
+
+    assert len(rowids) == len(set(rowids)) == 100
+    assert sum("ROW_NUMBER()" in statement for statement in statements) == 1
+    assert not any("ORDER BY RANDOM() LIMIT" in statement for statement in statements)
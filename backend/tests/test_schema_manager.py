@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.schema_manager import SchemaManager
+
+
+@pytest.fixture(scope="function")
+def db_manager(tmp_path, monkeypatch):
+    """Provides a DBManager backed by an empty analytics database in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return DBManager()
+
+
+@pytest.fixture(scope="function")
+def shipments_frame():
+    return pd.DataFrame({
+        "id": ["1", "2", "3", "4", "5", "6"],
+        "zip_code": ["01234", "02345", "10001", "10002", "10003", "10004"],
+        "boxes": [1.0, 2.0, None, 4.0, 5.0, 6.0],
+        "weight": ["1.5", "2.25", "3", "4", "5", "6"],
+        "shipped_on": ["2024-01-01", "2024-01-02", None, "2024-01-04", "2024-01-05", "2024-01-06"],
+        "delivered_at": ["2024-01-03 10:00:00", "2024-01-04T12:30", None, None, None, None],
+        "carrier": ["dhl", "ups", "dhl", "dhl", "ups", "dhl"],
+    })
+
+
+def table_sql(db_manager, table_name):
+    with db_manager.engine.connect() as conn:
+        return conn.execute(text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": table_name}).scalar()
+
+
+def test_compact_frame_chooses_tight_types(shipments_frame):
+    """Tests that numeric-looking text, integral floats and ISO dates get precise types."""
+    compacted, column_types = SchemaManager.compact_frame(shipments_frame)
+
+    assert column_types == {
+        "id": "INTEGER",
+        "zip_code": "TEXT",
+        "boxes": "INTEGER",
+        "weight": "REAL",
+        "shipped_on": "DATE",
+        "delivered_at": "TIMESTAMP",
+        "carrier": "TEXT",
+    }
+    assert str(compacted["id"].dtype) == "int8"
+    assert compacted["boxes"].tolist()[:2] == [1, 2]
+
+
+def test_single_chunk_tables_are_strict(db_manager):
+    """Tests that a dataset known in full is created as a STRICT table with explicit types."""
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2], "price": [1.5, 2.0]})], "prices", db_manager)
+
+    assert table_sql(db_manager, "prices") == 'CREATE TABLE "prices" ("id" INTEGER, "price" REAL) STRICT'
+
+
+def test_appending_values_that_do_not_fit_relaxes_a_strict_table(db_manager):
+    """Tests that an append with values outside a STRICT table's types is stored instead of rejected."""
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [1, 2], "qty": [3, 4]})], "stock", db_manager)
+    IngestManager.ingest_chunks([pd.DataFrame({"id": [3, 4], "qty": [5, 6]})], "stock", db_manager, "append")
+    assert table_sql(db_manager, "stock").endswith("STRICT")
+
+    result = IngestManager.ingest_chunks(
+        [pd.DataFrame({"id": [5, 6], "qty": [10.5, "N/A"]})], "stock", db_manager, "append"
+    )
+
+    assert result["row_count"] == 2
+    assert table_sql(db_manager, "stock") == 'CREATE TABLE "stock" ("id" INTEGER, "qty" INTEGER)'
+    with db_manager.engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, qty, typeof(qty) FROM stock ORDER BY id")).fetchall()
+    assert [tuple(row) for row in rows][3:] == [(4, 6, "integer"), (5, 10.5, "real"), (6, "N/A", "text")]
+    assert db_manager.get_table_metadata("stock")["row_count"] == 6
+
+
+def test_multi_chunk_tables_convert_later_chunks(db_manager):
+    """Tests that later chunks follow the first chunk's types and the table is not STRICT."""
+    chunks = [
+        pd.DataFrame({"id": ["1", "2"], "boxes": [1.0, 2.0]}),
+        pd.DataFrame({"id": ["3", "n/a"], "boxes": [None, 4.0]}),
+    ]
+    IngestManager.ingest_chunks(chunks, "boxes", db_manager)
+
+    assert not table_sql(db_manager, "boxes").endswith("STRICT")
+    with db_manager.engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, typeof(id), boxes, typeof(boxes) FROM boxes")).fetchall()
+    assert [tuple(row) for row in rows] == [
+        (1, "integer", 1, "integer"),
+        (2, "integer", 2, "integer"),
+        (3, "integer", None, "null"),
+        ("n/a", "text", 4, "integer"),
+    ]
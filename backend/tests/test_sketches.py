@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from utils.column_stats import ColumnStats
+from utils.sketches import FixedBinHistogram, FrequentItems, HyperLogLog, KLLSketch
+
+
+def test_kll_sketch_is_exact_until_it_compacts():
+    """Tests that small inputs give the same quantiles as NumPy."""
+    values = np.random.default_rng(1).normal(size=150)
+
+    sketch = KLLSketch(k=200).update(values)
+
+    assert sketch.is_exact
+    assert sketch.quantiles([0.25, 0.5, 0.75]) == pytest.approx(list(np.quantile(values, [0.25, 0.5, 0.75])))
+
+
+def test_kll_sketch_rank_error_and_size_are_bounded():
+    """Tests that merged chunk sketches stay within the rank error in bounded memory."""
+    values = np.random.default_rng(2).lognormal(size=200_000)
+    sketch = KLLSketch(k=200)
+    for chunk in np.array_split(values, 20):
+        sketch.merge(KLLSketch(k=200).update(chunk))
+
+    assert sketch.n == len(values)
+    assert sketch.num_retained < 3 * 200
+    ordered = np.sort(values)
+    for fraction, estimate in zip([0.01, 0.25, 0.5, 0.75, 0.99], sketch.quantiles([0.01, 0.25, 0.5, 0.75, 0.99])):
+        true_rank = np.searchsorted(ordered, estimate, side="right") / len(values)
+        assert abs(true_rank - fraction) < 0.02
+
+
+def test_kll_sketch_serialization_round_trip():
+    """Tests that a sketch restored from bytes answers the same quantiles."""
+    sketch = KLLSketch(k=50).update(np.arange(10_000, dtype=float))
+
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+
+    assert (restored.k, restored.n) == (50, 10_000)
+    assert restored.quantiles([0.1, 0.5, 0.9]) == sketch.quantiles([0.1, 0.5, 0.9])
+
+
+def test_column_stats_merge_matches_one_pass():
+    """Tests that merging batch statistics equals summarizing all values at once."""
+    values = np.random.default_rng(3).normal(1e9, 5, size=5000)
+    values[::11] = np.nan
+    merged = ColumnStats()
+    for chunk in np.array_split(values, 7):
+        merged.merge(ColumnStats.from_values(chunk))
+
+    whole = ColumnStats.from_values(values)
+
+    assert (merged.count, merged.null_count) == (whole.count, whole.null_count)
+    assert merged.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert merged.describe()["std"] == pytest.approx(np.nanstd(values, ddof=1), rel=1e-9)
+    assert (merged.minimum, merged.maximum) == (np.nanmin(values), np.nanmax(values))
+
+
+def test_hyperloglog_estimates_within_its_error_after_merging():
+    """Tests that merged distinct-count sketches stay within a few standard errors."""
+    rng = np.random.default_rng(4)
+    values = rng.integers(0, 300_000, size=400_000).astype(float)
+    merged = HyperLogLog()
+    for chunk in np.array_split(values, 8):
+        merged.merge(HyperLogLog().update(chunk))
+
+    true_count = len(np.unique(values))
+    assert abs(merged.estimate() / true_count - 1) < 4 * merged.relative_error
+    assert HyperLogLog().update(np.array(["a", "b", "a"], dtype=object)).estimate() == 2
+    assert HyperLogLog.from_bytes(merged.to_bytes()).estimate() == merged.estimate()
+
+
+def test_histogram_counts_are_exact_across_merges():
+    """Tests that histograms built on chunks of different ranges merge into exact bin counts."""
+    values = np.concatenate([np.linspace(5, 5.01, 100), np.full(3, 5.0), [-1000.0, 3000.0, np.nan, np.inf]])
+    merged = FixedBinHistogram(bins=32)
+    for chunk in np.array_split(values, 4):
+        merged.merge(FixedBinHistogram(bins=32).update(chunk))
+
+    bins = merged.to_bins()
+    assert len(bins) <= 32
+    edges = [item["start"] for item in bins] + [bins[-1]["end"]]
+    finite = values[np.isfinite(values)]
+    assert [item["count"] for item in bins] == np.histogram(finite, edges)[0].tolist()
+    assert sum(item["count"] for item in merged.to_bins(4)) == len(finite)
+    assert len(merged.to_bins(4)) <= 4
+    assert FixedBinHistogram.from_bytes(merged.to_bytes()).to_bins() == bins
+
+
+def test_frequent_items_bound_their_undercount():
+    """Tests that merged Misra-Gries summaries keep heavy hitters with counts within the error bound."""
+    values = np.random.default_rng(5).zipf(1.5, 200_000).astype(float)
+    merged = FrequentItems(capacity=32)
+    for chunk in np.array_split(values, 10):
+        merged.merge(FrequentItems(capacity=32).update(chunk))
+
+    true_values, true_counts = np.unique(values, return_counts=True)
+    true = dict(zip(true_values.tolist(), true_counts.tolist()))
+    assert 0 < merged.max_error <= len(values) // 33
+    assert [item["value"] for item in merged.top(3)] == [1.0, 2.0, 3.0]
+    for item in merged.top(32):
+        assert true[item["value"]] - merged.max_error <= item["count"] <= true[item["value"]]
+    exact = FrequentItems(capacity=4).update(np.array(["a", "b", "a"], dtype=object))
+    assert (exact.top(1), exact.max_error) == ([{"value": "a", "count": 2}], 0)
+    assert FrequentItems.from_bytes(merged.to_bytes()).top(5) == merged.top(5)
@@ -0,0 +1,106 @@
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from utils.db_manager import DBManager
+from utils.engine_registry import EngineRegistry
+from utils.ingest_manager import IngestManager
+from utils.sql_sandbox import SQLSandbox
+
+ENDLESS = "WITH RECURSIVE numbers(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM numbers) SELECT x FROM numbers"
+
+
+@pytest.fixture(scope="function")
+def db_path(metadata_session):
+    db_manager = DBManager()
+    IngestManager.ingest_chunks([pd.DataFrame({"id": range(25), "note": ["n" * 1000] * 25})], "orders", db_manager)
+    return db_manager.engine.url.database
+
+
+def test_sandbox_is_read_only(db_path):
+    """Tests that agent SQL can neither write nor attach another database."""
+    for statement in ("DELETE FROM orders", "CREATE TABLE other (x)"):
+        with pytest.raises((sqlite3.OperationalError, sqlite3.ProgrammingError)):
+            SQLSandbox.execute(db_path, statement)
+    for statement in ("ATTACH DATABASE 'other.sqlite' AS other", "PRAGMA query_only = 0; DELETE FROM orders"):
+        with pytest.raises(sqlite3.DatabaseError, match="not authorized"):
+            SQLSandbox.execute(db_path, statement)
+
+    assert SQLSandbox.execute(db_path, "SELECT COUNT(*) AS n FROM orders")["result"].to_dict() == {"n": [25]}
+    assert DBManager().get_table_metadata("orders")["row_count"] == 25
+
+
+def test_only_schema_pragmas_are_allowed(db_path):
+    """Tests that pragmas changing connection settings are denied and cannot leak to the pooled connection."""
+    for statement in ("PRAGMA cache_size = -4000000", "PRAGMA temp_store = MEMORY", "PRAGMA cache_size"):
+        with pytest.raises(sqlite3.DatabaseError, match="not authorized"):
+            SQLSandbox.execute(db_path, statement)
+
+    columns = SQLSandbox.execute(db_path, "PRAGMA table_info(orders)")["result"].to_dict()
+    assert columns["name"] == ["id", "note"]
+    assert SQLSandbox.execute(db_path, "SELECT name FROM pragma_table_info('orders')")["total_rows"] == 2
+    connection = EngineRegistry().get_read_only_engine(db_path).raw_connection()
+    try:
+        assert connection.driver_connection.execute("PRAGMA cache_size").fetchone()[0] != -4000000
+    finally:
+        connection.close()
+
+
+def test_row_cap_reports_the_true_total(db_path, monkeypatch):
+    """Tests that rows past the cap are counted but not kept, across fetch batches."""
+    monkeypatch.setenv("AGENT_SQL_MAX_ROWS", "10")
+    monkeypatch.setenv("EXPORT_BATCH_SIZE", "4")
+
+    executed = SQLSandbox.execute(db_path, "SELECT id FROM orders ORDER BY id")
+
+    assert executed["result"].to_dict() == {"id": list(range(10))}
+    assert (executed["total_rows"], executed["truncated"]) == (25, "rows")
+    small = SQLSandbox.execute(db_path, "SELECT id FROM orders WHERE id < 3")
+    assert (small["total_rows"], small["truncated"]) == (3, None)
+    empty = SQLSandbox.execute(db_path, "SELECT id FROM orders WHERE id < 0")
+    assert (empty["result"].to_dict(), empty["total_rows"]) == ({"id": []}, 0)
+
+
+def test_memory_budget_truncates_rows_and_bounds_values(db_path, monkeypatch):
+    """Tests that kept rows stay within the memory budget and SQLite cannot build larger values."""
+    monkeypatch.setenv("AGENT_SQL_MAX_MB", "1")
+
+    executed = SQLSandbox.execute(db_path, "SELECT a.note FROM orders a, orders b, orders c")
+
+    assert executed["truncated"] == "memory"
+    assert executed["total_rows"] == 25 ** 3
+    assert 500 < executed["result"].num_rows < 1100
+    with pytest.raises(sqlite3.DataError):
+        SQLSandbox.execute(db_path, "SELECT zeroblob(2 * 1024 * 1024)")
+
+
+def test_timeout_interrupts_long_queries(db_path, monkeypatch):
+    """Tests the wall-clock limit, both before the kept rows are read and while counting the rest."""
+    monkeypatch.setenv("AGENT_SQL_TIMEOUT_MS", "200")
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        SQLSandbox.execute(db_path, "SELECT COUNT(*) FROM (" + ENDLESS + ")")
+    assert time.monotonic() - start < 2
+
+    monkeypatch.setenv("AGENT_SQL_MAX_ROWS", "5")
+    counting = SQLSandbox.execute(db_path, ENDLESS)
+    assert counting["result"].to_dict() == {"x": [1, 2, 3, 4, 5]}
+    assert (counting["total_rows"], counting["truncated"]) == (None, "rows")
+    # The pooled connection is usable again afterwards
+    assert SQLSandbox.execute(db_path, "SELECT 1 AS one")["result"].to_dict() == {"one": [1]}
+
+
+def test_agent_is_told_when_rows_were_left_out(db_path, scripted_agent, monkeypatch):
+    """Tests that the answer and the LLM's observation carry the true size of a capped result."""
+    monkeypatch.setenv("AGENT_SQL_MAX_ROWS", "10")
+    agent = scripted_agent(DBManager(), ["SELECT id FROM orders"])
+
+    answer = agent.query_nlp("All ids")
+    observation = agent.agent_executor.invoke({"input": "All ids"})["intermediate_steps"][0][1]
+
+    assert len(answer["query_result"]["id"]) == 10
+    assert (answer["total_rows"], answer["truncated"]) == (25, "rows")
+    assert observation.endswith("(Showing the first 10 of 25 rows. Aggregate or filter to see the rest.)")
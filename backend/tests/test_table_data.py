@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+
+
+@pytest.fixture(scope="function")
+def people(metadata_session):
+    frame = pd.DataFrame({
+        "id": range(1, 26),
+        "name": [f"person_{i}" for i in range(1, 26)],
+        "age": [20 + i for i in range(1, 26)],
+        "city": [None if i % 5 == 0 else ["Lima", "Quito"][i % 2] for i in range(1, 26)],
+    })
+    IngestManager.ingest_chunks([frame], "people", DBManager())
+    return frame
+
+
+def test_keyset_pagination_walks_the_whole_table(people, client):
+    """Tests that following next_after returns every row once, in order."""
+    ids, after, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"after": after} if after is not None else {})}
+        response = client.get("/api/file_manager/tables/people/data", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        ids += body["data"]["id"]
+        after, pages = body["next_after"], pages + 1
+        if after is None:
+            break
+
+    assert pages == 3
+    assert ids == list(range(1, 26))
+
+
+def test_projection_and_filters(people, client):
+    """Tests that only the requested columns of the matching rows are returned."""
+    response = client.get(
+        "/api/file_manager/tables/people/data",
+        params=[("columns", "id,city"), ("filter", "age:gt:35"), ("filter", "city:contains:im")],
+    )
+
+    body = response.json()
+    assert body["columns"] == ["id", "city"]
+    assert body["data"] == {"id": [16, 18, 22, 24], "city": ["Lima"] * 4}
+
+    nulls = client.get("/api/file_manager/tables/people/data", params={"filter": "city:null"}).json()
+    assert nulls["data"]["id"] == [5, 10, 15, 20, 25]
+
+
+def test_invalid_requests(people, client):
+    """Tests that unknown tables, columns and operators are rejected."""
+    assert client.get("/api/file_manager/tables/missing/data").status_code == 404
+    assert client.get("/api/file_manager/tables/people/data", params={"columns": "salary"}).status_code == 400
+    assert client.get("/api/file_manager/tables/people/data", params={"filter": "age:between:1"}).status_code == 400
+    assert client.get("/api/file_manager/tables/people/export", params={"format": "xml"}).status_code == 422
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_streaming_export(people, client, monkeypatch, export_format):
+    """Tests that exports stream every matching row across several cursor batches."""
+    monkeypatch.setenv("EXPORT_BATCH_SIZE", "4")
+
+    response = client.get(
+        "/api/file_manager/tables/people/export",
+        params={"format": export_format, "columns": "id,name", "filter": "age:le:40"},
+    )
+
+    assert response.status_code == 200
+    assert f'filename="people.{export_format}"' in response.headers["content-disposition"]
+    if export_format == "ndjson":
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows[0] == {"id": 1, "name": "person_1"}
+    else:
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert rows[0] == {"id": "1", "name": "person_1"}
+    assert len(rows) == 20
@@ -0,0 +1,204 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.column_stats import ColumnStatsStore
+from utils.db_manager import DBManager
+from utils.ingest_manager import IngestManager
+from utils.schema_manager import SchemaManager
+from utils.table_stats_manager import TableStatsManager
+
+
+@pytest.fixture(scope="function")
+def stats_db(metadata_session):
+    return DBManager()
+
+
+def orders_frame(rows: int) -> pd.DataFrame:
+    ids = np.arange(rows)
+    return pd.DataFrame({
+        "id": ids,
+        "amount": np.where(ids % 7 == 0, np.nan, (ids * 37 % 1000) / 10.0),
+        "epoch": 1_700_000_000 + ids % 13,
+        "region": np.array(["north", "south", "east"])[ids % 3],
+    })
+
+
+def test_exact_statistics_match_pandas(stats_db, monkeypatch):
+    """Tests that stored statistics equal pandas' describe() while the sketches hold every value."""
+    monkeypatch.setenv("STATS_SKETCH_K", "2000")
+    frame = orders_frame(1000)
+    IngestManager.ingest_chunks([frame], "orders", stats_db)
+
+    analysis = TableStatsManager.describe(stats_db, "orders")
+
+    assert analysis["approximate"] is False
+    assert analysis["row_count"] == 1000
+    assert set(analysis["descriptive_statistics"]) == {"id", "amount", "epoch"}
+    expected = frame[["id", "amount", "epoch"]].describe().to_dict()
+    for column, stats in expected.items():
+        for key, value in stats.items():
+            assert analysis["descriptive_statistics"][column][key] == pytest.approx(value, rel=1e-9), (column, key)
+
+
+def test_large_tables_use_quantile_sketches(stats_db, monkeypatch):
+    """Tests that quartiles past the sketch's exact range are estimated within its rank error."""
+    monkeypatch.setenv("STATS_SKETCH_K", "100")
+    frame = orders_frame(40_000)
+    IngestManager.ingest_chunks([frame], "orders", stats_db)
+
+    analysis = TableStatsManager.describe(stats_db, "orders")
+
+    assert analysis["approximate"] is True
+    stats = analysis["descriptive_statistics"]
+    expected = frame["amount"].describe()
+    for key in ("count", "mean", "std", "min", "max"):
+        assert stats["amount"][key] == pytest.approx(expected[key], rel=1e-9), key
+    for key in ("25%", "50%", "75%"):
+        assert stats["amount"][key] == pytest.approx(expected[key], rel=0.05), key
+
+
+def test_append_merges_only_the_new_batch(stats_db, monkeypatch):
+    """Tests that appending merges the batch's statistics without rescanning the table."""
+    frame = pd.DataFrame({"value": range(1, 21), "label": ["a"] * 20})
+    IngestManager.ingest_chunks([frame], "numbers", stats_db)
+    assert TableStatsManager.describe(stats_db, "numbers")["descriptive_statistics"]["value"]["max"] == 20
+
+    def rebuild(*args):
+        raise AssertionError("the table was rescanned")
+
+    monkeypatch.setattr(ColumnStatsStore, "rebuild", staticmethod(rebuild))
+    IngestManager.ingest_chunks([pd.DataFrame({"value": [100], "label": ["b"]})], "numbers", stats_db, "append")
+
+    stats = TableStatsManager.describe(stats_db, "numbers")["descriptive_statistics"]["value"]
+    expected = pd.Series([*range(1, 21), 100]).describe()
+    assert (stats["count"], stats["max"], stats["mean"]) == (21, 100, expected["mean"])
+    assert stats["std"] == pytest.approx(expected["std"])
+
+
+def test_replace_and_other_writes_rebuild_statistics(stats_db):
+    """Tests that replaced tables get fresh statistics and writes outside ingest make them stale."""
+    IngestManager.ingest_chunks([pd.DataFrame({"value": [1, 2, 3]})], "numbers", stats_db)
+    IngestManager.ingest_chunks([pd.DataFrame({"value": [5, 7]})], "numbers", stats_db)
+    assert TableStatsManager.describe(stats_db, "numbers")["descriptive_statistics"]["value"]["mean"] == 6
+
+    with stats_db.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE numbers SET value = 100 WHERE value = 7")
+        SchemaManager.bump_table_version(conn, "numbers")
+
+    stats = TableStatsManager.describe(stats_db, "numbers")["descriptive_statistics"]["value"]
+    assert (stats["count"], stats["max"]) == (2, 100)
+    with stats_db.engine.begin() as conn:
+        SchemaManager.drop_table(conn, "numbers")
+        assert ColumnStatsStore.load(conn, "numbers") == (None, {})
+
+
+def test_stale_statistics_are_served_without_rebuilding(stats_db, monkeypatch):
+    """Tests that requests on a table written outside ingest use SQL aggregates and a sample, not a rebuild."""
+    monkeypatch.setenv("STATS_EXACT_MAX_ROWS", "100")
+    monkeypatch.setenv("STATS_SAMPLE_SIZE", "200")
+    IngestManager.ingest_chunks([orders_frame(1000)], "orders", stats_db)
+    with stats_db.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE orders SET epoch = epoch + 1")
+        SchemaManager.bump_table_version(conn, "orders")
+        stored_version, _ = ColumnStatsStore.load(conn, "orders")
+
+    def rebuild(*args):
+        raise AssertionError("the table was rescanned")
+
+    monkeypatch.setattr(ColumnStatsStore, "rebuild", staticmethod(rebuild))
+    analysis = TableStatsManager.describe(stats_db, "orders")
+    histogram = TableStatsManager.histogram(stats_db, "orders", "id", 10)
+    summary = TableStatsManager.summarize(stats_db, "orders", 3)
+
+    assert analysis["approximate"] is True
+    assert analysis["descriptive_statistics"]["epoch"]["min"] == 1_700_000_001
+    assert analysis["descriptive_statistics"]["id"]["count"] == 1000
+    assert histogram["approximate"] is True
+    assert sum(item["count"] for item in histogram["bins"]) == pytest.approx(1000, abs=10)
+    assert summary["approximate"] is True
+    assert {item["value"] for item in summary["top_values"]["region"]} == {"north", "south", "east"}
+    with stats_db.engine.connect() as conn:
+        assert ColumnStatsStore.load(conn, "orders")[0] == stored_version
+
+
+@pytest.mark.parametrize("max_rows", [100, 2])
+def test_stale_statistics_leave_out_text_in_numeric_columns(stats_db, monkeypatch, max_rows):
+    """Tests that count, min, max and quartiles of SQL aggregates and samples all skip text values."""
+    monkeypatch.setenv("STATS_EXACT_MAX_ROWS", str(max_rows))
+    # Loaded in two chunks, so the table is not STRICT and accepts text through type affinity
+    chunks = [pd.DataFrame({"value": [1, 2, 3]}), pd.DataFrame({"value": [4, 5]})]
+    IngestManager.ingest_chunks(chunks, "numbers", stats_db)
+    with stats_db.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX numbers_value ON numbers (value)")
+        conn.exec_driver_sql("INSERT INTO numbers VALUES ('N/A'), ('-')")
+        SchemaManager.bump_table_version(conn, "numbers")
+
+    stats = TableStatsManager.describe(stats_db, "numbers")["descriptive_statistics"]["value"]
+
+    assert (stats["min"], stats["25%"], stats["50%"], stats["75%"], stats["max"]) == (1, 2, 3, 4, 5)
+    assert stats["count"] == (5 if max_rows == 100 else pytest.approx(5, abs=1))
+
+
+def test_refresh_scans_outside_the_write_lock(stats_db, monkeypatch):
+    """Tests that rebuilding stale statistics after a write lets other writers in during the scan."""
+    IngestManager.ingest_chunks([pd.DataFrame({"value": [1, 2, 3]})], "numbers", stats_db)
+    with stats_db.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE numbers SET value = 10 WHERE value = 3")
+        SchemaManager.bump_table_version(conn, "numbers")
+    rebuild = ColumnStatsStore.rebuild
+
+    def rebuild_while_writing(conn, table_name):
+        writer = sqlite3.connect(stats_db.engine.url.database, timeout=0.1)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.rollback()
+        finally:
+            writer.close()
+        return rebuild(conn, table_name)
+
+    monkeypatch.setattr(ColumnStatsStore, "rebuild", staticmethod(rebuild_while_writing))
+    stats = ColumnStatsStore.refresh(stats_db, "numbers")
+
+    assert stats["value"].maximum == 10
+    assert ColumnStatsStore.stored(stats_db, "numbers")["value"].maximum == 10
+
+
+def test_dashboard_routes_per_table(stats_db, client):
+    """Tests that the dashboard describes the requested table and rejects unknown ones."""
+    IngestManager.ingest_chunks([orders_frame(50)], "orders", stats_db)
+
+    schema = client.get("/api/dashboard/", params={"table_name": "orders"}).json()
+    analysis = client.get("/api/dashboard/analysis", params={"table_name": "orders"}).json()
+
+    assert [column["name"] for column in schema["columns"]] == ["id", "amount", "epoch", "region"]
+    assert analysis["descriptive_statistics"]["id"]["50%"] == 24.5
+    assert client.get("/api/dashboard/analysis", params={"table_name": "missing"}).status_code == 404
+
+
+def test_histogram_and_distinct_count_routes(stats_db, client):
+    """Tests that charts get histograms and distinct counts kept current through appends."""
+    IngestManager.ingest_chunks([orders_frame(1000)], "orders", stats_db)
+    IngestManager.ingest_chunks([orders_frame(200)], "orders", stats_db, "append")
+
+    histogram = client.get("/api/dashboard/histogram", params={"table_name": "orders", "column": "id", "bins": 10})
+    distinct = client.get("/api/dashboard/distinct", params={"table_name": "orders"}).json()
+
+    bins = histogram.json()["bins"]
+    assert len(bins) <= 10
+    assert (bins[0]["start"], bins[-1]["end"]) == (0, 999)
+    assert sum(item["count"] for item in bins) == 1200
+    counts = distinct["distinct_counts"]
+    assert (counts["epoch"], counts["region"]) == (13, 3)
+    assert counts["id"] == pytest.approx(1000, rel=4 * distinct["relative_error"])
+    with stats_db.engine.connect() as conn:
+        rebuilt = ColumnStatsStore.rebuild(conn, "orders")
+    assert rebuilt["region"].distinct.estimate() == 3
+    assert client.get(
+        "/api/dashboard/histogram", params={"table_name": "orders", "column": "region"}
+    ).status_code == 400
+    assert client.get(
+        "/api/dashboard/histogram", params={"table_name": "orders", "column": "missing"}
+    ).status_code == 404
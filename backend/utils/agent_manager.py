@@ -1,11 +1,13 @@
 
+from fastapi.concurrency import run_in_threadpool
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
 from langchain_openai import ChatOpenAI
-from sqlalchemy import text
 
 from services.chat_service import ChatService
+from utils.answer_cache import AnswerCache
 from utils.db_manager import DBManager
 from utils.env_manager import EnvManager
+from utils.query_capture import CapturingSQLDatabaseToolkit, QueryCapture
 
 
 class AgentManager:
@@ -29,16 +31,32 @@ class AgentManager:
 
     def _initialize(self, db, llm):
         self.db = db
+        self.llm = llm
         self.agent_executor = create_sql_agent(
             llm=llm,
-            db=db,
+            # The query tool keeps the rows it returns, so no answer is queried twice
+            toolkit=CapturingSQLDatabaseToolkit(db=db, llm=llm),
             verbose=False,
             agent_type="openai-functions",
             agent_executor_kwargs={"return_intermediate_steps": True},
             top_k=1000,
         )
 
-    def query_nlp(self, query, chat_id=None):
+    @staticmethod
+    def _tool_inputs(intermediate_steps, key):
+        values = []
+        for step in intermediate_steps:
+            tool_input = step[0].tool_input if hasattr(step[0], "tool_input") else {}
+            if isinstance(tool_input, dict) and key in tool_input:
+                values.append(tool_input[key])
+        return values
+
+    def _prepare(self, query, chat_id):
+        """
+        Builds the agent's prompt and looks the question up in the answer cache.
+        Returns the prompt, the cache key, the cached answer or None, and the table
+        versions to store a fresh answer under.
+        """
         context = ""
         if chat_id:
             messages = ChatService.get_chat_messages(chat_id, limit=10)
@@ -46,31 +64,110 @@ class AgentManager:
 
         prompt = f"{context}\nUser: {query}" if context else query
 
-        response = self.agent_executor.invoke({"input": prompt})
+        engine = self.db._engine
+        cache_key = AnswerCache.make_key(query, context, str(engine.url))
+        cached = AnswerCache.get(cache_key, engine)
+        if cached is not None:
+            return prompt, cache_key, dict(cached["answer"]), None
+        # Read before the agent runs, so data changing during the run leaves a stale entry
+        return prompt, cache_key, None, AnswerCache.table_versions(engine)
+
+    def _answer(self, cache_key, versions, response, captures):
         intermediate_steps = response.get('intermediate_steps', [])
 
-        sql_query = None
-        for step in intermediate_steps:
-            tool_input = step[0].tool_input if hasattr(step[0], "tool_input") else {}
-            if isinstance(tool_input, dict) and "query" in tool_input:
-                sql_query = tool_input["query"]
-                break
-
-        result_data = {}
-        if sql_query:
-            try:
-                with self.db._engine.connect() as conn:
-                    result = conn.execute(text(sql_query))
-                    rows = result.fetchall()
-                    keys = result.keys()
-                    result_data = {key: [row[i] for row in rows] for i, key in enumerate(keys)}
-            except Exception as e:
-                result_data = {"error": str(e)}
-
-        return {
+        final = QueryCapture.final(captures)
+        answer = {
             "content": response.get("output", ""),
-            "query_result": result_data,
+            "query_result": {},
+            "sql_query": final["query"] if final else None,
+            "total_rows": None,
+            "truncated": None,
         }
+        if final and "result" in final:
+            answer.update(
+                query_result=final["result"].to_dict(), total_rows=final["total_rows"], truncated=final["truncated"]
+            )
+        elif final:
+            answer["query_result"] = {"error": final["error"]}
+
+        if "error" not in answer["query_result"]:
+            table_names = [
+                name for names in self._tool_inputs(intermediate_steps, "table_names") for name in str(names).split(",")
+            ]
+            sql_queries = self._tool_inputs(intermediate_steps, "query")
+            tables, whole_database = AnswerCache.touched_tables(versions, sql_queries, table_names)
+            AnswerCache.put(cache_key, answer, tables, whole_database)
+        return answer
+
+    def query_nlp(self, query, chat_id=None):
+        prompt, cache_key, cached, versions = self._prepare(query, chat_id)
+        if cached is not None:
+            return cached
+
+        with QueryCapture.collect() as captures:
+            response = self.agent_executor.invoke({"input": prompt})
+        return self._answer(cache_key, versions, response, captures)
+
+    async def aquery_nlp(self, query, chat_id=None):
+        """
+        query_nlp for async handlers: the agent runs on the event loop through its
+        async invocation, so waiting on the LLM holds no worker thread, and
+        cancelling the calling task stops the run between steps. Database work
+        around it runs in the threadpool.
+        """
+        prompt, cache_key, cached, versions = await run_in_threadpool(self._prepare, query, chat_id)
+        if cached is not None:
+            return cached
+
+        with QueryCapture.collect() as captures:
+            response = await self.agent_executor.ainvoke({"input": prompt})
+        return await run_in_threadpool(self._answer, cache_key, versions, response, captures)
+
+    async def astream_nlp(self, query, chat_id=None):
+        """
+        aquery_nlp as it happens: yields ``(event, data)`` pairs for each tool the
+        agent calls (``step``, with the SQL for queries), each result the SQL tool
+        returns (``result``) and each token of the answer (``token``), then the
+        whole answer as ``answer``. Models that do not stream send the answer as a
+        single token. A cached answer is replayed as a result and one token.
+        """
+        prompt, cache_key, cached, versions = await run_in_threadpool(self._prepare, query, chat_id)
+        if cached is not None:
+            if cached["sql_query"]:
+                yield "result", {
+                    key: cached.get(key) for key in ("sql_query", "query_result", "total_rows", "truncated")
+                }
+            yield "token", {"content": cached["content"]}
+            yield "answer", cached
+            return
+
+        response, streamed = None, False
+        with QueryCapture.collect() as captures:
+            async for event in self.agent_executor.astream_events({"input": prompt}, version="v2"):
+                kind = event["event"]
+                if kind == "on_tool_start":
+                    tool_input = event["data"].get("input")
+                    step = {"tool": event["name"], "input": tool_input}
+                    if isinstance(tool_input, dict) and "query" in tool_input:
+                        step["sql_query"] = tool_input["query"]
+                    yield "step", step
+                elif kind == "on_tool_end" and event["name"] == "sql_db_query" and captures and "result" in captures[-1]:
+                    yield "result", {
+                        "sql_query": captures[-1]["query"],
+                        "query_result": captures[-1]["result"].to_dict(),
+                        "total_rows": captures[-1]["total_rows"],
+                        "truncated": captures[-1]["truncated"],
+                    }
+                elif kind == "on_chat_model_stream" and isinstance(event["data"]["chunk"].content, str) and event["data"]["chunk"].content:
+                    streamed = True
+                    yield "token", {"content": event["data"]["chunk"].content}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    response = event["data"]["output"]
+
+        answer = await run_in_threadpool(self._answer, cache_key, versions, response or {}, captures)
+        if not streamed and answer["content"]:
+            yield "token", {"content": answer["content"]}
+        yield "answer", answer
 
     def query_nlp_text_only(self, prompt):
         response = self.agent_executor.invoke({"input": prompt})
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from utils.env_manager import EnvManager
+
+# How often a waiting or running request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.25
+# Nginx's status for a request the client closed before the response was sent
+CLIENT_CLOSED_REQUEST = 499
+
+
+class AgentScheduler:
+    """
+    Bounds how many SQL agent runs execute at once, process-wide and per user.
+
+    A request that cannot start waits in its user's queue. Whenever a run
+    finishes, the next run is taken from the users with waiting requests in
+    round-robin order, so one user's burst of questions cannot starve everyone
+    else. A request that finds the queue full (globally or for its user) is
+    rejected with 429. A client that disconnects while its request waits or runs
+    has the request cancelled and its slot released.
+
+    Waiters may belong to different event loops (one per TestClient request), so
+    state is guarded by a thread lock and waiters are woken through their loop.
+    """
+    _lock = threading.Lock()
+    _running = 0
+    _running_per_user: Dict[Any, int] = {}
+    # Users with waiting requests, in the order they are next served
+    _waiting: "OrderedDict[Any, Deque[Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _queued() -> int:
+        return sum(len(waiters) for waiters in AgentScheduler._waiting.values())
+
+    @staticmethod
+    def _start(user_id) -> None:
+        AgentScheduler._running += 1
+        AgentScheduler._running_per_user[user_id] = AgentScheduler._running_per_user.get(user_id, 0) + 1
+
+    @staticmethod
+    def _can_start(user_id) -> bool:
+        return (
+            AgentScheduler._running < EnvManager.get_agent_max_concurrency()
+            and AgentScheduler._running_per_user.get(user_id, 0) < EnvManager.get_agent_max_concurrency_per_user()
+            # Waiters of other users only remain when they are at their own limit
+            and user_id not in AgentScheduler._waiting
+        )
+
+    @staticmethod
+    def _check_room(user_id) -> None:
+        """
+        Raises a 429 HTTPException when ``user_id`` can neither start nor queue a run.
+        Must be called with the lock held.
+        """
+        if AgentScheduler._can_start(user_id):
+            return
+        if (
+            AgentScheduler._queued() >= EnvManager.get_agent_queue_size()
+            or len(AgentScheduler._waiting.get(user_id, ())) >= EnvManager.get_agent_queue_size_per_user()
+        ):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many questions are waiting to be answered, please try again shortly",
+                headers={"Retry-After": "5"},
+            )
+
+    @staticmethod
+    def _enqueue(user_id) -> Dict[str, Any]:
+        """
+        Starts a run for ``user_id`` right away or appends a waiter to its queue.
+        Must be called with the lock held.
+        """
+        AgentScheduler._check_room(user_id)
+        waiter = {"user_id": user_id, "future": asyncio.get_running_loop().create_future(), "granted": False}
+        if AgentScheduler._can_start(user_id):
+            AgentScheduler._start(user_id)
+            waiter["granted"] = True
+            waiter["future"].set_result(None)
+        else:
+            AgentScheduler._waiting.setdefault(user_id, deque()).append(waiter)
+        return waiter
+
+    @staticmethod
+    def _dispatch() -> None:
+        """
+        Hands free slots to waiters, one user at a time in round-robin order. Must be
+        called with the lock held.
+        """
+        max_per_user = EnvManager.get_agent_max_concurrency_per_user()
+        while AgentScheduler._running < EnvManager.get_agent_max_concurrency():
+            user_id = next(
+                (user for user in AgentScheduler._waiting if AgentScheduler._running_per_user.get(user, 0) < max_per_user),
+                None
+            )
+            if user_id is None:
+                return
+            waiters = AgentScheduler._waiting.pop(user_id)
+            waiter = waiters.popleft()
+            if waiters:
+                # Back of the rotation
+                AgentScheduler._waiting[user_id] = waiters
+            AgentScheduler._start(user_id)
+            waiter["granted"] = True
+            future = waiter["future"]
+            future.get_loop().call_soon_threadsafe(lambda future=future: future.done() or future.set_result(None))
+
+    @staticmethod
+    def _release(user_id) -> None:
+        with AgentScheduler._lock:
+            AgentScheduler._running -= 1
+            AgentScheduler._running_per_user[user_id] -= 1
+            if not AgentScheduler._running_per_user[user_id]:
+                del AgentScheduler._running_per_user[user_id]
+            AgentScheduler._dispatch()
+
+    @staticmethod
+    def ensure_room(user_id) -> None:
+        """
+        Raises a 429 HTTPException when a run for ``user_id`` would be rejected right
+        now, e.g. before committing to a streaming response.
+        """
+        with AgentScheduler._lock:
+            AgentScheduler._check_room(user_id)
+
+    @staticmethod
+    def enqueue(user_id) -> Dict[str, Any]:
+        """
+        Asks for a run slot for ``user_id`` and returns the waiter to pass to
+        ``wait`` and ``leave``. Raises a 429 HTTPException when the queue is full.
+        """
+        with AgentScheduler._lock:
+            return AgentScheduler._enqueue(user_id)
+
+    @staticmethod
+    async def wait(waiter: Dict[str, Any], timeout: Optional[float] = None) -> bool:
+        """
+        Waits up to ``timeout`` seconds for the waiter's slot and tells whether it was
+        granted. A cancelled wait leaves the queue.
+        """
+        try:
+            done, _ = await asyncio.wait({waiter["future"]}, timeout=timeout)
+        except asyncio.CancelledError:
+            AgentScheduler.leave(waiter)
+            raise
+        return bool(done)
+
+    @staticmethod
+    def leave(waiter: Dict[str, Any]) -> None:
+        """
+        Releases the waiter's slot, or withdraws it from the queue if it was not
+        granted one yet. Leaving twice has no effect.
+        """
+        with AgentScheduler._lock:
+            if waiter.get("left"):
+                return
+            waiter["left"] = True
+            if not waiter["granted"]:
+                waiters = AgentScheduler._waiting.get(waiter["user_id"])
+                if waiters is not None and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del AgentScheduler._waiting[waiter["user_id"]]
+                return
+        AgentScheduler._release(waiter["user_id"])
+
+    @staticmethod
+    @asynccontextmanager
+    async def slot(user_id):
+        """
+        Waits for a run slot for ``user_id`` and holds it for the block. Raises a 429
+        HTTPException when the queue is full.
+        """
+        waiter = AgentScheduler.enqueue(user_id)
+        await AgentScheduler.wait(waiter)
+        try:
+            yield
+        finally:
+            AgentScheduler.leave(waiter)
+
+    @staticmethod
+    async def run(user_id, job: Callable[[], Awaitable[Any]], is_disconnected: Callable[[], Awaitable[bool]]) -> Any:
+        """
+        Runs ``job`` in a slot of ``user_id`` and returns its result. While the request
+        waits or runs, ``is_disconnected`` is polled; once it reports the client gone
+        the run is cancelled and a 499 HTTPException raised.
+        """
+        async def in_slot():
+            async with AgentScheduler.slot(user_id):
+                return await job()
+
+        task = asyncio.ensure_future(in_slot())
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+                if done:
+                    return task.result()
+                if await is_disconnected():
+                    task.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await task
+                    raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+    @staticmethod
+    def _line() -> List[Dict[str, Any]]:
+        """
+        Returns the waiting requests in the round-robin order they will be served.
+        """
+        with AgentScheduler._lock:
+            queues = [list(waiters) for waiters in AgentScheduler._waiting.values()]
+        line = []
+        for depth in range(max((len(waiters) for waiters in queues), default=0)):
+            line.extend(waiters[depth] for waiters in queues if depth < len(waiters))
+        return line
+
+    @staticmethod
+    def queue_positions(user_id) -> List[int]:
+        """
+        Returns the 1-based place in line of each waiting request of ``user_id``.
+        """
+        return [position for position, waiter in enumerate(AgentScheduler._line(), 1) if waiter["user_id"] == user_id]
+
+    @staticmethod
+    def position(waiter: Dict[str, Any]) -> int:
+        """
+        Returns the 1-based place in line of ``waiter``, or 0 once it holds a slot.
+        """
+        return next((position for position, queued in enumerate(AgentScheduler._line(), 1) if queued is waiter), 0)
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with AgentScheduler._lock:
+            return {
+                "running": AgentScheduler._running,
+                "queued": AgentScheduler._queued(),
+                "max_concurrency": EnvManager.get_agent_max_concurrency(),
+                "max_concurrency_per_user": EnvManager.get_agent_max_concurrency_per_user(),
+            }
@@ -0,0 +1,155 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.env_manager import EnvManager
+from utils.result_encoder import ResultEncoder
+from utils.schema_manager import SchemaManager
+
+
+class AnswerCache:
+    """
+    Keeps the answers of the SQL agent in memory, keyed by the normalized question
+    and the chat context it was asked in, so repeating a question against
+    unchanged data skips the LLM round-trips entirely.
+
+    Every entry records the version (see SchemaManager.get_table_version) of the
+    tables the agent touched while answering. A lookup compares them with the
+    current versions and drops the entry as soon as one of those tables was
+    re-ingested, appended to or dropped. Answers that touched no table depend on
+    the whole database and are dropped when any table changes or the set of
+    tables does. The cache is a LRU bounded by entry count and by the serialized
+    size of its entries.
+    """
+    _cache: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+    _cached_bytes = 0
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _invalidations = 0
+    _evictions = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Folds case, Unicode forms and whitespace and strips trailing punctuation, so
+        trivially different spellings of a question share one entry.
+        """
+        normalized = unicodedata.normalize("NFKC", question or "").casefold()
+        normalized = re.sub(r"\s+", " ", normalized).strip()
+        return normalized.rstrip(" ?!.¿¡").lstrip(" ¿¡")
+
+    @staticmethod
+    def make_key(question: str, context: str, database: str) -> str:
+        payload = "\x1f".join([database, AnswerCache.normalize_question(question), context or ""])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def table_versions(engine) -> Dict[str, int]:
+        """
+        Returns the current version of every analytics table of ``engine``.
+        """
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall()
+            tables = [row[0] for row in rows if not SchemaManager.is_internal_table(row[0])]
+            return {table: SchemaManager.get_table_version(conn, table) for table in tables}
+
+    @staticmethod
+    def touched_tables(
+        versions: Dict[str, int],
+        sql_queries: Iterable[str],
+        table_names: Iterable[str]
+    ) -> Tuple[Dict[str, int], bool]:
+        """
+        Narrows ``versions`` to the tables referenced by name in ``sql_queries`` or
+        listed in ``table_names``, and tells whether the answer depends on the whole
+        database instead because neither names a table.
+        """
+        statements = " ".join(sql_queries)
+        named = {name.strip().strip('"`[]') for name in table_names if name and name.strip()}
+        touched = {
+            table: version for table, version in versions.items()
+            if table in named or re.search(rf"(?<![\w$]){re.escape(table)}(?![\w$])", statements, re.IGNORECASE)
+        }
+        return (touched, False) if touched else (dict(versions), True)
+
+    @staticmethod
+    def _is_current(engine, entry: Dict[str, Any]) -> bool:
+        versions = AnswerCache.table_versions(engine)
+        if entry["whole_database"] and set(versions) != set(entry["tables"]):
+            return False
+        return all(versions.get(table) == version for table, version in entry["tables"].items())
+
+    @staticmethod
+    def get(key: str, engine) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached answer under ``key`` if every table it touched is still
+        at the recorded version, counting a hit or a miss.
+        """
+        with AnswerCache._lock:
+            cached = AnswerCache._cache.get(key)
+        entry = cached[0] if cached else None
+        if entry is not None and not AnswerCache._is_current(engine, entry):
+            with AnswerCache._lock:
+                if AnswerCache._cache.get(key) is cached:
+                    AnswerCache._cached_bytes -= AnswerCache._cache.pop(key)[1]
+                    AnswerCache._invalidations += 1
+            entry = None
+
+        with AnswerCache._lock:
+            if entry is None:
+                AnswerCache._misses += 1
+                return None
+            AnswerCache._hits += 1
+            if key in AnswerCache._cache:
+                AnswerCache._cache.move_to_end(key)
+            return entry
+
+    @staticmethod
+    def put(key: str, answer: Dict[str, Any], tables: Dict[str, int], whole_database: bool = False) -> None:
+        """
+        Stores an answer (its SQL, text and result, as returned by query_nlp)
+        together with the versions of the tables it touched. The versions must be
+        read before the agent runs, so a write racing with it leaves an entry that
+        is already stale rather than one that looks current.
+        """
+        max_entries = EnvManager.get_answer_cache_size()
+        max_bytes = EnvManager.get_answer_cache_max_mb() * 1024 * 1024
+        entry = {"answer": answer, "tables": tables, "whole_database": whole_database}
+        size = len(ResultEncoder.dumps(entry))
+        with AnswerCache._lock:
+            if key in AnswerCache._cache:
+                AnswerCache._cached_bytes -= AnswerCache._cache.pop(key)[1]
+            if max_entries <= 0 or size > max_bytes:
+                return
+            AnswerCache._cache[key] = (entry, size)
+            AnswerCache._cached_bytes += size
+            while len(AnswerCache._cache) > max_entries or AnswerCache._cached_bytes > max_bytes:
+                AnswerCache._cached_bytes -= AnswerCache._cache.popitem(last=False)[1][1]
+                AnswerCache._evictions += 1
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        with AnswerCache._lock:
+            lookups = AnswerCache._hits + AnswerCache._misses
+            return {
+                "entries": len(AnswerCache._cache),
+                "size_bytes": AnswerCache._cached_bytes,
+                "hits": AnswerCache._hits,
+                "misses": AnswerCache._misses,
+                "hit_rate": AnswerCache._hits / lookups if lookups else 0.0,
+                "miss_rate": AnswerCache._misses / lookups if lookups else 0.0,
+                "invalidations": AnswerCache._invalidations,
+                "evictions": AnswerCache._evictions,
+            }
+
+    @staticmethod
+    def clear_cache() -> None:
+        with AnswerCache._lock:
+            AnswerCache._cache.clear()
+            AnswerCache._cached_bytes = 0
+            AnswerCache._hits = AnswerCache._misses = 0
+            AnswerCache._invalidations = AnswerCache._evictions = 0
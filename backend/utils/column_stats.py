@@ -0,0 +1,446 @@
+import datetime
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+from sqlalchemy.exc import OperationalError
+
+from utils.env_manager import EnvManager
+from utils.sampling_manager import SamplingManager
+from utils.schema_manager import (COLUMN_STATS_TABLE, TABLE_STATS_TABLE,
+                                  SchemaManager)
+from utils.sketches import (FixedBinHistogram, FrequentItems, HyperLogLog,
+                            KLLSketch)
+
+QUANTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+
+
+class ColumnStats:
+    """
+    Running statistics of one column: count, nulls, a HyperLogLog sketch of its
+    distinct values, a summary of its most frequent values and, for numeric
+    columns, sum, Welford's mean and sum of squared deviations (M2), min, max, a
+    KLL quantile sketch and a fixed-bin histogram. Two ColumnStats merge with
+    Chan et al.'s parallel formulas and the sketches' own merges, so the
+    statistics of a table can be kept current from the statistics of each
+    appended batch.
+    """
+
+    def __init__(
+        self,
+        count: int = 0,
+        null_count: int = 0,
+        total: float = 0.0,
+        mean: float = 0.0,
+        m2: float = 0.0,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        sketch: Optional[KLLSketch] = None,
+        distinct: Optional[HyperLogLog] = None,
+        histogram: Optional[FixedBinHistogram] = None,
+        frequent: Optional[FrequentItems] = None,
+        numeric: bool = True
+    ):
+        self.count = count
+        self.null_count = null_count
+        self.total = total
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.sketch = sketch or KLLSketch(EnvManager.get_stats_sketch_k())
+        self.distinct = distinct or HyperLogLog(EnvManager.get_stats_hll_precision())
+        self.histogram = histogram or FixedBinHistogram(EnvManager.get_stats_histogram_bins())
+        self.frequent = frequent or FrequentItems(EnvManager.get_stats_frequent_items())
+        self.numeric = numeric
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "ColumnStats":
+        """
+        Summarizes one batch of a numeric column; NaNs count as nulls.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        present = values[~np.isnan(values)]
+        stats = cls(null_count=len(values) - len(present))
+        if len(present):
+            stats.count = len(present)
+            stats.total = float(present.sum())
+            stats.mean = stats.total / stats.count
+            stats.m2 = float(((present - stats.mean) ** 2).sum())
+            stats.minimum, stats.maximum = float(present.min()), float(present.max())
+            stats.sketch.update(present)
+            stats.distinct.update(present)
+            stats.histogram.update(present)
+            stats.frequent.update(present[np.isfinite(present)])
+        return stats
+
+    @classmethod
+    def from_text(cls, values: np.ndarray) -> "ColumnStats":
+        """
+        Summarizes one batch of a non-numeric column given as strings; None counts as null.
+        """
+        values = np.asarray(values, dtype=object)
+        present = values[pd.notna(values)]
+        stats = cls(count=len(present), null_count=len(values) - len(present), numeric=False)
+        stats.distinct.update(present)
+        stats.frequent.update(present)
+        return stats
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        count = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self.count = count
+        self.null_count += other.null_count
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        self.histogram.merge(other.histogram)
+        self.frequent.merge(other.frequent)
+        return self
+
+    def scale(self, factor: float) -> "ColumnStats":
+        """
+        Extrapolates the statistics of a uniform sample to a table ``factor`` times
+        its size: counts, sums, histogram and top-value counts are scaled, while
+        the mean, extremes, quantiles and distinct-value sketch stay as sampled.
+        """
+        self.count = round(self.count * factor)
+        self.null_count = round(self.null_count * factor)
+        self.total *= factor
+        self.m2 *= factor
+        self.histogram.counts = np.rint(self.histogram.counts * factor).astype(np.int64)
+        self.frequent.counters = {value: round(count * factor) for value, count in self.frequent.counters.items()}
+        self.frequent.n = round(self.frequent.n * factor)
+        self.frequent.max_error = round(self.frequent.max_error * factor)
+        return self
+
+    def describe(self) -> Dict[str, float]:
+        """
+        Returns the values of pandas' describe(); undefined ones are reported as 0.
+        """
+        quantiles = self.sketch.quantiles(list(QUANTILES.values()))
+        values = {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "std": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None,
+            "min": self.minimum,
+            **dict(zip(QUANTILES, quantiles)),
+            "max": self.maximum,
+        }
+        return {key: 0 if value is None or not math.isfinite(value) else value for key, value in values.items()}
+
+
+class ColumnStatsStore:
+    """
+    Persists the ColumnStats of every column of the analytics tables in
+    ``__column_stats__``, stamped in ``__table_stats__`` with the table version
+    they describe. Only ingest writes them: it merges the statistics of appended
+    batches in the same transaction as the rows, writes fresh ones when a table
+    is replaced and, after any other write, rebuilds them with one scan
+    (``refresh``). Requests only read them; until they are current, ``estimate``
+    gives bounded-cost statistics instead.
+    """
+
+    @staticmethod
+    def is_numeric_type(sql_type: Optional[str]) -> bool:
+        """
+        Applies SQLite's type affinity rules; booleans are left out, as in pandas' describe.
+        """
+        sql_type = (sql_type or "").upper()
+        if "BOOL" in sql_type:
+            return False
+        return any(token in sql_type for token in ("INT", "REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL"))
+
+    @staticmethod
+    def numeric_columns(column_types: Dict[str, str]) -> List[str]:
+        return [column for column, sql_type in column_types.items() if ColumnStatsStore.is_numeric_type(sql_type)]
+
+    @staticmethod
+    def _text_value(value) -> str:
+        if isinstance(value, (bool, np.bool_)):
+            return str(int(value))
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _text_values(series: pd.Series) -> np.ndarray:
+        """
+        Renders a chunk's column as the strings SQLite returns for it after
+        ingest, so distinct counts agree between merged batches and rebuilds.
+        """
+        if ptypes.infer_dtype(series, skipna=True) in ("string", "empty"):
+            return series.to_numpy(dtype=object, na_value=None)
+        if ptypes.is_datetime64_any_dtype(series.dtype):
+            rendered = series.map(lambda value: value.isoformat(sep=" "), na_action="ignore")
+        else:
+            rendered = series.map(ColumnStatsStore._text_value, na_action="ignore")
+        return rendered.to_numpy(dtype=object, na_value=None)
+
+    @staticmethod
+    def collect(chunk: pd.DataFrame, column_types: Dict[str, str]) -> Dict[str, ColumnStats]:
+        """
+        Summarizes the columns of a DataFrame chunk. In numeric columns values
+        that are not numbers count as nulls, as they do in a rebuild.
+        """
+        stats = {}
+        for column, sql_type in column_types.items():
+            if ColumnStatsStore.is_numeric_type(sql_type):
+                stats[column] = ColumnStats.from_values(
+                    pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                )
+            else:
+                stats[column] = ColumnStats.from_text(ColumnStatsStore._text_values(chunk[column]))
+        return stats
+
+    @staticmethod
+    def merge_into(target: Dict[str, ColumnStats], batch: Dict[str, ColumnStats]) -> Dict[str, ColumnStats]:
+        for column, stats in batch.items():
+            if column in target:
+                target[column].merge(stats)
+            else:
+                target[column] = stats
+        return target
+
+    @staticmethod
+    def _ensure_tables(conn) -> None:
+        # Statistics are derived data: a store laid out by an older release is
+        # dropped and rebuilt table by table as they are read
+        if SchemaManager._object_type(conn, COLUMN_STATS_TABLE) == "table":
+            columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({COLUMN_STATS_TABLE})")}
+            if not {"distinct_sketch", "top_values"} <= columns:
+                conn.exec_driver_sql(f"DROP TABLE {COLUMN_STATS_TABLE}")
+                conn.exec_driver_sql(f"DELETE FROM {TABLE_STATS_TABLE}")
+        if SchemaManager._object_type(conn, TABLE_STATS_TABLE) == "table":
+            columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({TABLE_STATS_TABLE})")}
+            if "min_rowid" not in columns:
+                conn.exec_driver_sql(f"DROP TABLE {TABLE_STATS_TABLE}")
+                conn.exec_driver_sql(f"DELETE FROM {COLUMN_STATS_TABLE}")
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {TABLE_STATS_TABLE} "
+            "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL, min_rowid INTEGER, max_rowid INTEGER)"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {COLUMN_STATS_TABLE} ("
+            "table_name TEXT NOT NULL, column_name TEXT NOT NULL, count INTEGER NOT NULL, "
+            "null_count INTEGER NOT NULL, total REAL NOT NULL, mean REAL NOT NULL, m2 REAL NOT NULL, "
+            "minimum REAL, maximum REAL, sketch BLOB NOT NULL, distinct_sketch BLOB NOT NULL, histogram BLOB, "
+            "top_values BLOB NOT NULL, PRIMARY KEY (table_name, column_name))"
+        )
+
+    @staticmethod
+    def load(conn, table_name: str) -> Tuple[Optional[int], Dict[str, ColumnStats]]:
+        """
+        Returns the table version the stored statistics describe and the
+        statistics by column. The version is None when there are none, or when rows
+        were written since without moving the version, as far as the table's rowid
+        range tells.
+        """
+        if SchemaManager._object_type(conn, TABLE_STATS_TABLE) != "table":
+            return None, {}
+        try:
+            row = conn.exec_driver_sql(
+                f"SELECT version, min_rowid, max_rowid FROM {TABLE_STATS_TABLE} WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        except OperationalError:
+            return None, {}
+        if row is None or tuple(row[1:]) != SchemaManager.rowid_range(conn, table_name):
+            return None, {}
+        try:
+            rows = conn.exec_driver_sql(
+                f"SELECT column_name, count, null_count, total, mean, m2, minimum, maximum, sketch, distinct_sketch, "
+                f"histogram, top_values FROM {COLUMN_STATS_TABLE} WHERE table_name = ?",
+                (table_name,)
+            ).fetchall()
+        except OperationalError:
+            # Laid out by an older release; the next save replaces the store
+            return None, {}
+        return row[0], {
+            column: ColumnStats(
+                count, null_count, total, mean, m2, minimum, maximum, KLLSketch.from_bytes(sketch),
+                HyperLogLog.from_bytes(distinct), histogram and FixedBinHistogram.from_bytes(histogram),
+                FrequentItems.from_bytes(top_values), numeric=histogram is not None
+            )
+            for column, count, null_count, total, mean, m2, minimum, maximum, sketch, distinct, histogram, top_values
+            in rows
+        }
+
+    @staticmethod
+    def save(conn, table_name: str, stats: Dict[str, ColumnStats], version: int) -> None:
+        ColumnStatsStore._ensure_tables(conn)
+        ColumnStatsStore.delete(conn, table_name)
+        conn.exec_driver_sql(
+            f"INSERT INTO {TABLE_STATS_TABLE} (table_name, version, min_rowid, max_rowid) VALUES (?, ?, ?, ?)",
+            (table_name, version, *SchemaManager.rowid_range(conn, table_name))
+        )
+        if not stats:
+            return
+        conn.exec_driver_sql(
+            f"INSERT INTO {COLUMN_STATS_TABLE} (table_name, column_name, count, null_count, total, mean, m2, "
+            "minimum, maximum, sketch, distinct_sketch, histogram, top_values) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    table_name, column, s.count, s.null_count, s.total, s.mean, s.m2, s.minimum, s.maximum,
+                    s.sketch.to_bytes(), s.distinct.to_bytes(), s.histogram.to_bytes() if s.numeric else None,
+                    s.frequent.to_bytes()
+                )
+                for column, s in stats.items()
+            ]
+        )
+
+    @staticmethod
+    def row_count(conn, table_name: str, version: int) -> Optional[int]:
+        """
+        Returns the number of rows of ``table_name`` recorded by statistics that
+        describe ``version`` of it and its current rowid range, or None when there
+        are none. Every row counts in each column, as a value or as a null.
+        """
+        if SchemaManager._object_type(conn, COLUMN_STATS_TABLE) != "table":
+            return None
+        min_rowid, max_rowid = SchemaManager.rowid_range(conn, table_name)
+        try:
+            row = conn.exec_driver_sql(
+                f"SELECT columns.count + columns.null_count FROM {TABLE_STATS_TABLE} AS tables "
+                f"JOIN {COLUMN_STATS_TABLE} AS columns ON columns.table_name = tables.table_name "
+                "WHERE tables.table_name = ? AND tables.version = ? "
+                "AND tables.min_rowid IS ? AND tables.max_rowid IS ? LIMIT 1",
+                (table_name, version, min_rowid, max_rowid)
+            ).fetchone()
+        except OperationalError:
+            return None
+        return row[0] if row else None
+
+    @staticmethod
+    def delete(conn, table_name: str) -> None:
+        SchemaManager.delete_table_stats(conn, table_name)
+
+    @staticmethod
+    def current(conn, table_name: str) -> Optional[Dict[str, ColumnStats]]:
+        """
+        Returns the stored statistics when they describe the current version of
+        ``table_name``, an empty dict when the table does not exist yet, and None
+        when they are stale.
+        """
+        if SchemaManager._object_type(conn, table_name) is None:
+            return {}
+        stored_version, stats = ColumnStatsStore.load(conn, table_name)
+        return stats if stored_version == SchemaManager.get_table_version(conn, table_name) else None
+
+    @staticmethod
+    def record_append(
+        conn,
+        table_name: str,
+        stored: Optional[Dict[str, ColumnStats]],
+        batch: Dict[str, ColumnStats],
+        version: int
+    ) -> bool:
+        """
+        Merges the statistics of an appended batch into ``stored``, the result of
+        ``current`` before the append, using only the batch. Returns False, leaving
+        the statistics stale for ``refresh``, when there was nothing to merge into.
+        """
+        if stored is None:
+            return False
+        ColumnStatsStore.save(conn, table_name, ColumnStatsStore.merge_into(stored, batch), version)
+        return True
+
+    @staticmethod
+    def rebuild(conn, table_name: str) -> Dict[str, ColumnStats]:
+        """
+        Computes the statistics of ``table_name`` from scratch with one streaming
+        scan, feeding each batch of rows to NumPy.
+        """
+        quote = SchemaManager.quote_identifier
+        column_types = SchemaManager.get_column_types(conn, table_name)
+        numeric = set(ColumnStatsStore.numeric_columns(column_types))
+        columns = list(column_types)
+        stats = {column: ColumnStats(numeric=column in numeric) for column in columns}
+        if not columns:
+            return stats
+
+        # Text stored through type affinity is not a number and counts as null
+        select_sql = ", ".join(
+            f"CASE WHEN typeof({quote(column)}) IN ('integer', 'real') THEN {quote(column)} END"
+            if column in numeric else f"CAST({quote(column)} AS TEXT)"
+            for column in columns
+        )
+        batch_size = EnvManager.get_ingest_chunk_size()
+        result = conn.exec_driver_sql(f"SELECT {select_sql} FROM {quote(table_name)}")
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            # Plain tuples convert an order of magnitude faster than Row objects
+            values = np.array([tuple(row) for row in rows], dtype=object).reshape(len(rows), len(columns))
+            for index, column in enumerate(columns):
+                if column in numeric:
+                    batch = ColumnStats.from_values(values[:, index].astype(np.float64))
+                else:
+                    batch = ColumnStats.from_text(values[:, index])
+                stats[column].merge(batch)
+        return stats
+
+    @staticmethod
+    def stored(db_manager, table_name: str) -> Optional[Dict[str, ColumnStats]]:
+        """
+        Returns the stored statistics of ``table_name`` when they describe its
+        current version, None otherwise. Never scans the table.
+        """
+        with db_manager.engine.connect() as conn:
+            version = SchemaManager.get_table_version(conn, table_name)
+            stored_version, stats = ColumnStatsStore.load(conn, table_name)
+        return stats if stored_version == version else None
+
+    @staticmethod
+    def estimate(conn, table_name: str, row_count: int) -> Tuple[Dict[str, ColumnStats], bool]:
+        """
+        Computes statistics of ``table_name`` without storing them, for tables whose
+        stored ones are stale. Tables up to STATS_EXACT_MAX_ROWS rows are scanned;
+        larger ones are summarized from a uniform rowid sample of STATS_SAMPLE_SIZE
+        rows scaled to ``row_count``. Returns the statistics and whether they were
+        sampled.
+        """
+        if row_count <= EnvManager.get_stats_exact_max_rows():
+            return ColumnStatsStore.rebuild(conn, table_name), False
+
+        # A fixed seed keeps the estimates stable between requests for one table version
+        rowids = SamplingManager.sample_rowids(conn, table_name, EnvManager.get_stats_sample_size(), random.Random(0))
+        columns, rows = SamplingManager.fetch_rows(conn, table_name, rowids)
+        stats = ColumnStatsStore.collect(
+            pd.DataFrame(rows, columns=columns), SchemaManager.get_column_types(conn, table_name)
+        )
+        for column_stats in stats.values():
+            column_stats.scale(row_count / len(rows) if rows else 0)
+        return stats, True
+
+    @staticmethod
+    def refresh(db_manager, table_name: str) -> Dict[str, ColumnStats]:
+        """
+        Returns the statistics of ``table_name``, rebuilding and storing them first
+        when they do not describe the table's current version. Called by ingest
+        after a write; the scan runs on a read connection, so the write lock is
+        only taken for the short transaction that stores the result.
+        """
+        with db_manager.engine.connect() as conn:
+            version = SchemaManager.get_table_version(conn, table_name)
+            stored_version, stats = ColumnStatsStore.load(conn, table_name)
+            if stored_version == version:
+                return stats
+            rowids = SchemaManager.rowid_range(conn, table_name)
+            stats = ColumnStatsStore.rebuild(conn, table_name)
+
+        with db_manager.write_engine.begin() as conn:
+            # Another write may have moved the table on during the scan
+            moved = SchemaManager.get_table_version(conn, table_name) != version
+            if not moved and SchemaManager.rowid_range(conn, table_name) == rowids:
+                ColumnStatsStore.save(conn, table_name, stats, version)
+        return stats
@@ -0,0 +1,176 @@
+import logging
+import os
+import uuid
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.env_manager import EnvManager
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FOLDER = "columnar"
+# Parquet schema metadata key holding the fingerprint of the table a sidecar was exported from
+FINGERPRINT_KEY = b"table_fingerprint"
+
+SQLITE_TO_ARROW_TYPES = {
+    "INTEGER": pa.int64(),
+    "INT": pa.int64(),
+    "REAL": pa.float64(),
+    "TIMESTAMP": pa.timestamp("us"),
+    "DATE": pa.date32(),
+}
+INTEGER_ARROW_TYPES = (pa.int8(), pa.int16(), pa.int32(), pa.int64())
+
+
+class ColumnarStore:
+    """
+    Keeps a Parquet copy of every analytics table under ``data/columnar/`` so that
+    DataFrame consumers can memory-map typed columns instead of re-parsing the
+    original CSV or Excel upload.
+
+    Exporting costs a scan of the whole table, so writes only mark a sidecar
+    stale (``mark_stale``). Each sidecar records the fingerprint of the table it
+    was exported from, and ``current_path`` rebuilds it once for its next reader,
+    typically the dataset cache warm-up at the end of an upload job.
+    """
+
+    @staticmethod
+    def sidecar_path(table_name: str, data_dir: str) -> str:
+        return os.path.join(data_dir, COLUMNAR_FOLDER, f"{table_name}.parquet")
+
+    @staticmethod
+    def arrow_type(sql_type: str) -> pa.DataType:
+        return SQLITE_TO_ARROW_TYPES.get(sql_type.upper(), pa.string())
+
+    @staticmethod
+    def narrow_integer_type(min_value, max_value) -> pa.DataType:
+        """
+        Returns the narrowest signed integer type that holds every value of a column.
+        """
+        if not isinstance(min_value, int) or not isinstance(max_value, int):
+            return pa.int64()
+        for arrow_type in INTEGER_ARROW_TYPES:
+            bits = arrow_type.bit_width - 1
+            if -(2 ** bits) <= min_value and max_value < 2 ** bits:
+                return arrow_type
+        return pa.int64()
+
+    @staticmethod
+    def _to_array(values: list, arrow_type: pa.DataType) -> pa.Array:
+        if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+            return pa.array([None if value is None else str(value) for value in values], pa.string()).cast(arrow_type)
+        if pa.types.is_string(arrow_type):
+            return pa.array([None if value is None else str(value) for value in values], arrow_type)
+        return pa.array(values, arrow_type)
+
+    @staticmethod
+    def write_table(table_name: str, db_manager, chunksize: Optional[int] = None) -> Optional[str]:
+        """
+        Exports ``table_name`` to its Parquet sidecar in bounded row groups and returns
+        the sidecar path. The file is written under a temporary name and renamed into
+        place, so readers never see a partial sidecar. Failures are logged and leave
+        no sidecar behind, since readers fall back to the source file.
+        """
+        schema = db_manager.get_table_schema(table_name)
+        path = ColumnarStore.sidecar_path(table_name, db_manager.data_dir)
+        if not schema:
+            ColumnarStore.delete_table(table_name, db_manager.data_dir)
+            return None
+        # Taken before the rows are read, so a concurrent write leaves the sidecar stale rather than current
+        fingerprint = db_manager.get_table_fingerprint(table_name)
+
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        columns = {col["column_name"]: ColumnarStore.arrow_type(col["data_type"] or "") for col in schema}
+        quoted_columns = {column: '"' + column.replace('"', '""') + '"' for column in columns}
+        columns_sql = ", ".join(quoted_columns.values())
+        temp_path = f"{path}.{uuid.uuid4().hex}.part"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        try:
+            with db_manager.engine.connect() as conn:
+                # Integer columns are stored with the narrowest type that fits their range
+                integer_columns = [column for column, arrow_type in columns.items() if arrow_type == pa.int64()]
+                if integer_columns:
+                    ranges_sql = ", ".join(
+                        f"MIN({quoted_columns[column]}), MAX({quoted_columns[column]})" for column in integer_columns
+                    )
+                    ranges = conn.exec_driver_sql(f'SELECT {ranges_sql} FROM "{table_name}"').fetchone()
+                    for index, column in enumerate(integer_columns):
+                        columns[column] = ColumnarStore.narrow_integer_type(ranges[2 * index], ranges[2 * index + 1])
+                arrow_schema = pa.schema(list(columns.items()), metadata={FINGERPRINT_KEY: fingerprint.encode()})
+
+                with pq.ParquetWriter(temp_path, arrow_schema) as writer:
+                    result = conn.exec_driver_sql(f'SELECT {columns_sql} FROM "{table_name}"')
+                    while True:
+                        rows = result.fetchmany(chunksize)
+                        if not rows:
+                            break
+                        arrays = [
+                            ColumnarStore._to_array(list(values), field.type)
+                            for values, field in zip(zip(*rows), arrow_schema)
+                        ]
+                        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=arrow_schema))
+            os.replace(temp_path, path)
+            return path
+        except Exception as e:
+            logger.warning(f"Could not write columnar sidecar for table '{table_name}': {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            ColumnarStore.delete_table(table_name, db_manager.data_dir)
+            return None
+
+    @staticmethod
+    def mark_stale(table_name: str, db_manager) -> None:
+        """
+        Records a write to ``table_name``. A missing sidecar is exported right away;
+        an existing one is only touched, so it stays newer than the upload it
+        mirrors, and is rebuilt by ``current_path`` since its fingerprint no
+        longer matches the table.
+        """
+        path = ColumnarStore.sidecar_path(table_name, db_manager.data_dir)
+        if not os.path.exists(path):
+            ColumnarStore.write_table(table_name, db_manager)
+            return
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"Could not mark columnar sidecar for table '{table_name}' stale: {str(e)}")
+            ColumnarStore.delete_table(table_name, db_manager.data_dir)
+
+    @staticmethod
+    def current_path(table_name: str, db_manager) -> Optional[str]:
+        """
+        Returns the path of the sidecar of ``table_name``, exporting the table again
+        first when the sidecar was exported from an earlier state of it. Returns None
+        when no sidecar can be written.
+        """
+        path = ColumnarStore.sidecar_path(table_name, db_manager.data_dir)
+        if os.path.exists(path):
+            try:
+                metadata = pq.read_schema(path).metadata or {}
+            except (OSError, pa.ArrowException):
+                metadata = {}
+            fingerprint = db_manager.get_table_fingerprint(table_name)
+            if fingerprint is not None and metadata.get(FINGERPRINT_KEY) == fingerprint.encode():
+                return path
+        return ColumnarStore.write_table(table_name, db_manager)
+
+    @staticmethod
+    def read_table(table_name: str, data_dir: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Memory-maps the sidecar of ``table_name`` and returns it as a DataFrame, or None
+        when the table has no sidecar.
+        """
+        path = ColumnarStore.sidecar_path(table_name, data_dir)
+        if not os.path.exists(path):
+            return None
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    @staticmethod
+    def delete_table(table_name: str, data_dir: str) -> None:
+        path = ColumnarStore.sidecar_path(table_name, data_dir)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.columnar_store import COLUMNAR_FOLDER
+from utils.env_manager import EnvManager
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FOLDER = "__snapshots__"
+SNAPSHOT_MTIME_KEY = b"source_mtime_ns"
+SNAPSHOT_SIZE_KEY = b"source_size"
+
+
+class DatasetCache:
+    """
+    Keeps parsed dataset files in memory, keyed by path, modification time and
+    size, so dashboard requests stop re-parsing the same upload. The cache is a
+    LRU bounded by entry count and by the in-memory size of its DataFrames.
+
+    Files that have no columnar sidecar are also persisted as a Parquet snapshot
+    under ``data/columnar/__snapshots__/``, which a cold process memory-maps
+    instead of parsing the CSV or Excel file again.
+
+    Cached DataFrames are shared between callers and must not be modified.
+    """
+    _cache: "OrderedDict[Tuple[str, int, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+    _cached_bytes = 0
+    _lock = threading.Lock()
+    _load_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def file_key(path: str) -> Tuple[str, int, int]:
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def snapshot_path(file_path: str) -> str:
+        data_dir, file_name = os.path.split(os.path.abspath(file_path))
+        return os.path.join(data_dir, COLUMNAR_FOLDER, SNAPSHOT_FOLDER, f"{file_name}.parquet")
+
+    @staticmethod
+    def _read_snapshot(key: Tuple[str, int, int]) -> Optional[pd.DataFrame]:
+        path = DatasetCache.snapshot_path(key[0])
+        if not os.path.exists(path):
+            return None
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+            if metadata.get(SNAPSHOT_MTIME_KEY) != str(key[1]).encode() or metadata.get(SNAPSHOT_SIZE_KEY) != str(key[2]).encode():
+                return None
+            return pq.read_table(path, memory_map=True).to_pandas()
+        except Exception as e:
+            logger.warning(f"Could not read dataset snapshot '{path}': {str(e)}")
+            return None
+
+    @staticmethod
+    def _write_snapshot(key: Tuple[str, int, int], df: pd.DataFrame) -> None:
+        """
+        Writes the snapshot under a temporary name and renames it into place. Frames
+        Arrow cannot represent (e.g. object columns mixing types) are skipped.
+        """
+        path = DatasetCache.snapshot_path(key[0])
+        temp_path = f"{path}.part"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            table = pa.Table.from_pandas(df)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                SNAPSHOT_MTIME_KEY: str(key[1]).encode(),
+                SNAPSHOT_SIZE_KEY: str(key[2]).encode(),
+            })
+            pq.write_table(table, temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write dataset snapshot for '{key[0]}': {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _store(key: Tuple[str, int, int], df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        max_bytes = EnvManager.get_dataset_cache_max_mb() * 1024 * 1024
+        max_entries = EnvManager.get_dataset_cache_size()
+        with DatasetCache._lock:
+            # Older versions of the same file can no longer be hit
+            for stale_key in [cached for cached in DatasetCache._cache if cached[0] == key[0]]:
+                DatasetCache._cached_bytes -= DatasetCache._cache.pop(stale_key)[1]
+            if size > max_bytes or max_entries <= 0:
+                return
+            DatasetCache._cache[key] = (df, size)
+            DatasetCache._cached_bytes += size
+            while len(DatasetCache._cache) > max_entries or DatasetCache._cached_bytes > max_bytes:
+                DatasetCache._cached_bytes -= DatasetCache._cache.popitem(last=False)[1][1]
+
+    @staticmethod
+    def _lookup(key: Tuple[str, int, int]) -> Optional[pd.DataFrame]:
+        with DatasetCache._lock:
+            entry = DatasetCache._cache.get(key)
+            if entry is None:
+                return None
+            DatasetCache._cache.move_to_end(key)
+            return entry[0]
+
+    @staticmethod
+    def get(path: str, loader: Callable[[], pd.DataFrame], snapshot: bool = False) -> pd.DataFrame:
+        """
+        Returns the DataFrame of ``path``, calling ``loader`` only when neither the
+        memory cache nor, with ``snapshot``, a persisted snapshot of the same file
+        version is available. Concurrent requests for one file share a single load.
+        """
+        key = DatasetCache.file_key(path)
+        df = DatasetCache._lookup(key)
+        if df is not None:
+            return df
+
+        with DatasetCache._lock:
+            load_lock = DatasetCache._load_locks.setdefault(key[0], threading.Lock())
+        with load_lock:
+            df = DatasetCache._lookup(key)
+            if df is not None:
+                return df
+
+            snapshots = snapshot and EnvManager.get_dataset_snapshots()
+            df = DatasetCache._read_snapshot(key) if snapshots else None
+            if df is None:
+                df = loader()
+                if snapshots:
+                    DatasetCache._write_snapshot(key, df)
+            DatasetCache._store(key, df)
+            return df
+
+    @staticmethod
+    def warm(db_manager) -> None:
+        """
+        Loads the dataset the dashboard reads into the cache. Called once an upload
+        finishes, so the first dashboard view after it does not pay for parsing.
+        """
+        try:
+            db_manager.get_dataframe()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not warm the dataset cache: {str(e)}")
+
+    @staticmethod
+    def clear_cache() -> None:
+        with DatasetCache._lock:
+            DatasetCache._cache.clear()
+            DatasetCache._cached_bytes = 0
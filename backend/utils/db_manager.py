@@ -1,102 +1,158 @@
+import hashlib
+import json
 import os
 
 import pandas as pd
-from langchain_community.utilities import SQLDatabase
-from sqlalchemy import create_engine
 from sqlalchemy.sql import text
 
+from utils.columnar_store import ColumnarStore
+from utils.dataset_cache import DatasetCache
+from utils.engine_registry import EngineRegistry, write_engine
 from utils.i18n import _
+from utils.metadata_cache import MetadataCache
+from utils.result_encoder import ColumnarResult
+from utils.sampling_manager import SamplingManager
+from utils.schema_manager import SchemaManager
 
 
 class DBManager:
     def __init__(self):
         db_path = os.path.abspath("data/db.sqlite")
         self.data_dir = os.path.abspath("data")
-        engine = create_engine(f"sqlite:///{db_path}")
-        self.engine = engine
-        self.db = SQLDatabase(engine=self.engine)
+        # Engines are shared process-wide, so constructing a DBManager per request is cheap
+        self.engine = EngineRegistry().get_engine(db_path)
+        # Same pool; transactions take the write lock up front (see write_engine)
+        self.write_engine = write_engine(self.engine)
+
+    @property
+    def db(self):
+        # Bookkeeping and staging tables are hidden from the agent
+        return EngineRegistry().get_sql_database(self.engine, self.get_internal_table_names)
 
     def get_connection(self):
         return self.db
 
     def get_table_names(self):
-        query = "SELECT name FROM sqlite_master WHERE type='table';"
+        query = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view');"
         with self.engine.connect() as conn:
             result = conn.execute(text(query)).fetchall()
-        return [row[0] for row in result]
-
-    def get_sample_data(self, table_name: str, limit: int):
-        query = text(f"SELECT * FROM {table_name} ORDER BY RANDOM() LIMIT {limit}")
-        with self.engine.connect() as conn:
-            result = conn.execute(query).fetchall()
-
-        return [dict(row._mapping) for row in result] if result else None
+        return [row[0] for row in result if not SchemaManager.is_internal_table(row[0])]
 
-    def get_sample_data_in_rows(self, table_name: str, limit: int):
-        query = text(f"SELECT * FROM {table_name} ORDER BY RANDOM() LIMIT {limit}")
+    def get_internal_table_names(self):
+        query = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND substr(name, 1, 2) = '__';"
         with self.engine.connect() as conn:
-            result = conn.execute(query).fetchall()
-
-        if result:
-            columns = [col['column_name'] for col in self.get_table_schema(table_name)]
+            result = conn.execute(text(query)).fetchall()
+        return [row[0] for row in result]
 
-            column_data = {column: [] for column in columns}
+    def get_sample_data(self, table_name: str, limit: int, stratify_by: str = None):
+        columns, rows = SamplingManager.sample(self, table_name, limit, stratify_by)
+        return [dict(zip(columns, row)) for row in rows] if rows else None
 
-            for row in result:
-                for i, column in enumerate(columns):
-                    column_data[column].append(row[i])
+    def get_sample_data_in_rows(self, table_name: str, limit: int, stratify_by: str = None):
+        columns, rows = SamplingManager.sample(self, table_name, limit, stratify_by)
 
-            return column_data
-        else:
-            return None
+        return ColumnarResult.from_rows(columns, rows).to_dict() if rows else None
 
     def delete_table(self, table_name: str) -> bool:
-        with self.db_manager.engine.connect() as conn:
-            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-            conn.commit()
+        with self.write_engine.begin() as conn:
+            SchemaManager.drop_table(conn, table_name)
+        ColumnarStore.delete_table(table_name, self.data_dir)
         return True
 
     def get_table_schema(self, table_name: str):
-        query = text(f"PRAGMA table_info({table_name})")
-        with self.engine.connect() as conn:
-            result = conn.execute(query).fetchall()
+        metadata = MetadataCache.get_table_metadata(self, table_name, with_row_count=False)
+        return metadata["columns"] if metadata else None
 
-        if not result:
-            return None
+    def get_table_metadata(self, table_name: str):
+        return MetadataCache.get_table_metadata(self, table_name)
 
-        schema = []
-        for row in result:
-            schema.append(
-                {
-                    "column_name": row[1],
-                    "data_type": row[2],
-                    "nullable": row[3] == 1,
-                    "primary_key": row[5] == 1,
-                }
-            )
+    def get_all_table_metadata(self):
+        return MetadataCache.get_all_metadata(self)
 
-        return schema
+    def get_table_version(self, table_name: str) -> int:
+        with self.engine.connect() as conn:
+            return SchemaManager.get_table_version(conn, table_name)
+
+    def get_table_fingerprint(self, table_name: str):
+        """
+        Cheap identity of a table's current contents: its schema, the version counter
+        every write through the ingest pipeline bumps (see SchemaManager) and the
+        rowid range, which also catches most writes made outside the pipeline. Only
+        index lookups are needed instead of a full scan.
+        """
+        schema = self.get_table_schema(table_name)
+        if not schema:
+            return None
 
-    def get_dataframe(self):
-        allowed_extensions = (".csv", ".xlsx")
-        files = [f for f in os.listdir(
-            self.data_dir) if f.endswith(allowed_extensions)]
+        with self.engine.connect() as conn:
+            min_rowid, max_rowid = SchemaManager.rowid_range(conn, table_name)
+            version = SchemaManager.get_table_version(conn, table_name)
+
+        payload = json.dumps(
+            {"schema": schema, "version": version, "rowids": [min_rowid, max_rowid]}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _latest_dataset(self):
+        """
+        Locates the most recently modified dataset file of ``data_dir`` and returns
+        the path to read it from, its file name, a loader and whether it deserves a
+        snapshot (see DatasetCache).
+        """
+        allowed_extensions = (".csv", ".xlsx", ".parquet", ".arrow", ".feather")
+        with os.scandir(self.data_dir) as entries:
+            files = [
+                (entry.stat().st_mtime, entry.name)
+                for entry in entries if entry.name.endswith(allowed_extensions) and entry.is_file()
+            ]
 
         if not files:
             raise FileNotFoundError(_("error_no_csv_xlsx_found"))
 
-        files.sort(key=lambda f: os.path.getmtime(os.path.join(self.data_dir, f)), reverse=True)
-        file_name = files[0]
-
+        file_mtime, file_name = max(files)
         file_path = os.path.join(self.data_dir, file_name)
 
+        # Uploads are stored as '<table_name>.<ext>'; prefer the table's columnar
+        # sidecar when it is at least as recent as the uploaded file, rebuilding
+        # it first if the table was written since it was exported
+        table_name = os.path.splitext(file_name)[0]
+        sidecar_path = ColumnarStore.sidecar_path(table_name, self.data_dir)
+        if os.path.exists(sidecar_path) and os.path.getmtime(sidecar_path) >= file_mtime:
+            sidecar_path = ColumnarStore.current_path(table_name, self)
+            if sidecar_path:
+                return sidecar_path, file_name, lambda: ColumnarStore.read_table(table_name, self.data_dir), False
+
+        # Text and spreadsheet formats are the slow ones to parse, so they get a snapshot
+        snapshot = file_path.endswith((".csv", ".xlsx"))
+        return file_path, file_name, lambda: DBManager._read_file(file_path), snapshot
+
+    def get_dataframe(self):
+        """
+        Returns the most recently modified dataset file of ``data_dir`` as a
+        DataFrame, parsed at most once per file version (see DatasetCache).
+        """
+        path, file_name, loader, snapshot = self._latest_dataset()
+        return DatasetCache.get(path, loader, snapshot=snapshot), file_name
+
+    def get_dataset_version(self):
+        """
+        Identifies the version of the DataFrame ``get_dataframe`` would return, by
+        file name, path, modification time and size, without reading the file.
+        """
+        path, file_name, _, _ = self._latest_dataset()
+        return (file_name, *DatasetCache.file_key(path))
+
+    @staticmethod
+    def _read_file(file_path: str) -> pd.DataFrame:
         if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(".xlsx"):
-            df = pd.read_excel(file_path)
-        else:
-            raise ValueError(_("error_unsupported_file_format"))
-        return df, file_name
+            return pd.read_csv(file_path)
+        if file_path.endswith(".xlsx"):
+            return pd.read_excel(file_path)
+        if file_path.endswith(".parquet"):
+            return pd.read_parquet(file_path)
+        if file_path.endswith((".arrow", ".feather")):
+            return pd.read_feather(file_path)
+        raise ValueError(_("error_unsupported_file_format"))
 
     def get_all_data_from_table(self, table_name: str):
         query = text(f"SELECT * FROM {table_name}")
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from utils.env_manager import EnvManager
+
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+SQLITE_TEMP_STORES = {"DEFAULT", "FILE", "MEMORY"}
+# Execution option marking the connections of a write_engine
+WRITE_OPTION = "sqlite_begin_immediate"
+
+
+def _pragma_choice(name: str, value: str, allowed: set) -> str:
+    value = value.upper()
+    if value not in allowed:
+        raise ValueError(f"Invalid value '{value}' for PRAGMA {name}; expected one of {sorted(allowed)}")
+    return value
+
+
+def sqlite_profile_pragmas() -> List[str]:
+    """
+    Builds the PRAGMAs run on every new analytics connection. The busy timeout and
+    the ANALYZE row limit always apply; the rest form the performance profile:
+    WAL journaling so readers are not blocked by an ingest, NORMAL synchronous
+    (safe under WAL), and a large page cache, memory map and in-memory temp store.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {EnvManager.get_sqlite_busy_timeout_ms()}",
+        f"PRAGMA analysis_limit = {EnvManager.get_sqlite_analysis_limit()}",
+    ]
+    if not EnvManager.get_sqlite_performance_profile():
+        return pragmas
+
+    return pragmas + [
+        f"PRAGMA journal_mode = {_pragma_choice('journal_mode', EnvManager.get_sqlite_journal_mode(), SQLITE_JOURNAL_MODES)}",
+        f"PRAGMA synchronous = {_pragma_choice('synchronous', EnvManager.get_sqlite_synchronous(), SQLITE_SYNCHRONOUS_MODES)}",
+        # A negative cache_size is a size in KiB rather than a number of pages
+        f"PRAGMA cache_size = -{EnvManager.get_sqlite_cache_size_mb() * 1024}",
+        f"PRAGMA mmap_size = {EnvManager.get_sqlite_mmap_size_mb() * 1024 * 1024}",
+        f"PRAGMA temp_store = {_pragma_choice('temp_store', EnvManager.get_sqlite_temp_store(), SQLITE_TEMP_STORES)}",
+    ]
+
+
+def apply_sqlite_profile(engine, pragmas: List[str]) -> None:
+    """
+    Runs ``pragmas`` on every connection the engine opens.
+    """
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def enable_transactional_ddl(engine) -> None:
+    """
+    The sqlite3 driver only opens a transaction before INSERT/UPDATE/DELETE, so
+    DROP/CREATE/ALTER statements would autocommit in the middle of a load. Let
+    SQLAlchemy emit BEGIN itself so every statement runs in the connection's
+    transaction. Connections of a ``write_engine`` emit BEGIN IMMEDIATE.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get(WRITE_OPTION) else "BEGIN")
+
+
+def write_engine(engine: Engine) -> Engine:
+    """
+    Returns a view of ``engine`` whose transactions take SQLite's write lock when
+    they begin. Write transactions read before they write (table types, versions,
+    stored statistics); a deferred BEGIN would then have to upgrade its read lock,
+    which under WAL fails at once with "database is locked" while another writer
+    is active, whereas BEGIN IMMEDIATE waits for it up to the busy timeout.
+    """
+    return engine.execution_options(**{WRITE_OPTION: True})
+
+
+class EngineRegistry:
+    """
+    Keeps one pooled engine per analytics database file for the whole process, so
+    request handlers share connections instead of opening a new engine each time.
+    The langchain ``SQLDatabase`` wrapper, which reflects every table, is built on
+    first use and only rebuilt once the database schema has changed.
+    """
+    _instance = None
+    _engines: Dict[str, Engine]
+    _databases: Dict[str, Tuple[int, SQLDatabase]]
+    _read_only_engines: Dict[str, Engine]
+    _counters: Dict[str, Dict[str, int]]
+    _lock: threading.Lock
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EngineRegistry, cls).__new__(cls)
+            cls._instance._engines = {}
+            cls._instance._databases = {}
+            cls._instance._read_only_engines = {}
+            cls._instance._counters = {}
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _create_engine(self, db_path: str) -> Engine:
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            poolclass=QueuePool,
+            pool_size=EnvManager.get_analytics_pool_size(),
+            max_overflow=EnvManager.get_analytics_pool_max_overflow(),
+            pool_timeout=EnvManager.get_analytics_pool_timeout(),
+            # Pooled connections move between request threads, one at a time
+            connect_args={"check_same_thread": False},
+        )
+        enable_transactional_ddl(engine)
+        apply_sqlite_profile(engine, sqlite_profile_pragmas())
+
+        counters = {"connections_opened": 0, "checkouts": 0, "sql_database_builds": 0}
+        self._counters[db_path] = counters
+
+        @event.listens_for(engine, "connect")
+        def _count_connect(dbapi_connection, connection_record):
+            counters["connections_opened"] += 1
+
+        @event.listens_for(engine, "checkout")
+        def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+            counters["checkouts"] += 1
+
+        return engine
+
+    def get_engine(self, db_path: str) -> Engine:
+        """
+        Returns the shared engine of the database at ``db_path``. A database file that
+        was removed after its engine connected gets a fresh engine, so pooled
+        connections never keep reading a deleted file.
+        """
+        db_path = os.path.abspath(db_path)
+        with self._lock:
+            engine = self._engines.get(db_path)
+            connected = self._counters.get(db_path, {}).get("connections_opened", 0) > 0
+            if engine is not None and connected and not os.path.exists(db_path):
+                engine.dispose()
+                self._databases.pop(db_path, None)
+                read_only_engine = self._read_only_engines.pop(db_path, None)
+                if read_only_engine is not None:
+                    read_only_engine.dispose()
+                engine = None
+            if engine is None:
+                engine = self._create_engine(db_path)
+                self._engines[db_path] = engine
+            return engine
+
+    def get_read_only_engine(self, db_path: str) -> Engine:
+        """
+        Returns a pooled engine whose connections open the database at ``db_path``
+        with SQLite's ``mode=ro``, which no statement run on them can lift. Used for
+        SQL written by the agent (see SQLSandbox).
+        """
+        db_path = os.path.abspath(db_path)
+        with self._lock:
+            engine = self._read_only_engines.get(db_path)
+            if engine is None:
+                uri = f"file:{pathname2url(db_path)}?mode=ro"
+                engine = create_engine(
+                    "sqlite://",
+                    creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+                    poolclass=QueuePool,
+                    pool_size=EnvManager.get_analytics_pool_size(),
+                    max_overflow=EnvManager.get_analytics_pool_max_overflow(),
+                    pool_timeout=EnvManager.get_analytics_pool_timeout(),
+                )
+                # The journal mode and sync level belong to the writers
+                apply_sqlite_profile(engine, [
+                    pragma for pragma in sqlite_profile_pragmas()
+                    if not pragma.startswith(("PRAGMA journal_mode", "PRAGMA synchronous"))
+                ])
+                self._read_only_engines[db_path] = engine
+            return engine
+
+    def get_sql_database(self, engine: Engine, ignore_tables: Callable[[], List[str]]) -> SQLDatabase:
+        """
+        Returns the ``SQLDatabase`` of ``engine``, building it when the schema version
+        of the database moved since the last build. ``ignore_tables`` is only called
+        on a rebuild.
+        """
+        db_path = engine.url.database
+        with engine.connect() as conn:
+            schema_version = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+
+        with self._lock:
+            cached = self._databases.get(db_path)
+            if cached and cached[0] == schema_version:
+                return cached[1]
+
+            database = SQLDatabase(
+                engine=engine,
+                view_support=True,
+                ignore_tables=ignore_tables(),
+                lazy_table_reflection=True,
+            )
+            self._databases[db_path] = (schema_version, database)
+            self._counters.setdefault(db_path, {}).setdefault("sql_database_builds", 0)
+            self._counters[db_path]["sql_database_builds"] += 1
+            return database
+
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        """
+        Reports the pool occupancy and usage counters of every registered engine.
+        """
+        with self._lock:
+            engines = list(self._engines.items())
+
+        stats = []
+        for db_path, engine in engines:
+            pool = engine.pool
+            stats.append({
+                "database": db_path,
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                **self._counters.get(db_path, {}),
+            })
+        return stats
+
+    def dispose(self) -> None:
+        """
+        Closes every pooled connection and forgets all engines.
+        """
+        with self._lock:
+            for engine in [*self._engines.values(), *self._read_only_engines.values()]:
+                engine.dispose()
+            self._engines.clear()
+            self._read_only_engines.clear()
+            self._databases.clear()
+            self._counters.clear()
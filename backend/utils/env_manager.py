@@ -20,6 +20,11 @@ class EnvManager:
             raise ValueError(f"Missing environment variable: {key}")
         return value
 
+    @classmethod
+    def _get_env_var_or_default(cls, key: str, default: str) -> str:
+        cls._ensure_initialized()
+        return os.getenv(key, default)
+
     @staticmethod
     def get_openai_api_key() -> str:
         return EnvManager._get_env_var("OPENAI_API_KEY")
@@ -39,3 +44,151 @@ class EnvManager:
     @staticmethod
     def get_jwt_expiration_time() -> int:
         return int(EnvManager._get_env_var("JWT_EXPIRATION_TIME"))
+
+    @staticmethod
+    def get_ingest_chunk_size() -> int:
+        return int(EnvManager._get_env_var_or_default("INGEST_CHUNK_SIZE", "50000"))
+
+    @staticmethod
+    def get_max_upload_size_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("MAX_UPLOAD_SIZE_MB", "2048"))
+
+    @staticmethod
+    def get_ingest_workers() -> int:
+        return int(EnvManager._get_env_var_or_default("INGEST_WORKERS", "2"))
+
+    @staticmethod
+    def get_sheets_refresh_concurrency() -> int:
+        return int(EnvManager._get_env_var_or_default("SHEETS_REFRESH_CONCURRENCY", "4"))
+
+    @staticmethod
+    def get_sheets_request_timeout() -> int:
+        return int(EnvManager._get_env_var_or_default("SHEETS_REQUEST_TIMEOUT", "30"))
+
+    @staticmethod
+    def get_excel_sheet_workers() -> int:
+        return int(EnvManager._get_env_var_or_default("EXCEL_SHEET_WORKERS", "4"))
+
+    @staticmethod
+    def get_sample_cache_size() -> int:
+        return int(EnvManager._get_env_var_or_default("SAMPLE_CACHE_SIZE", "256"))
+
+    @staticmethod
+    def get_analytics_pool_size() -> int:
+        return int(EnvManager._get_env_var_or_default("ANALYTICS_POOL_SIZE", "5"))
+
+    @staticmethod
+    def get_analytics_pool_max_overflow() -> int:
+        return int(EnvManager._get_env_var_or_default("ANALYTICS_POOL_MAX_OVERFLOW", "10"))
+
+    @staticmethod
+    def get_analytics_pool_timeout() -> int:
+        return int(EnvManager._get_env_var_or_default("ANALYTICS_POOL_TIMEOUT", "30"))
+
+    @staticmethod
+    def get_sqlite_performance_profile() -> bool:
+        return EnvManager._get_env_var_or_default("SQLITE_PERFORMANCE_PROFILE", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_sqlite_journal_mode() -> str:
+        return EnvManager._get_env_var_or_default("SQLITE_JOURNAL_MODE", "WAL")
+
+    @staticmethod
+    def get_sqlite_synchronous() -> str:
+        return EnvManager._get_env_var_or_default("SQLITE_SYNCHRONOUS", "NORMAL")
+
+    @staticmethod
+    def get_sqlite_cache_size_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("SQLITE_CACHE_SIZE_MB", "64"))
+
+    @staticmethod
+    def get_sqlite_mmap_size_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("SQLITE_MMAP_SIZE_MB", "256"))
+
+    @staticmethod
+    def get_sqlite_temp_store() -> str:
+        return EnvManager._get_env_var_or_default("SQLITE_TEMP_STORE", "MEMORY")
+
+    @staticmethod
+    def get_sqlite_busy_timeout_ms() -> int:
+        return int(EnvManager._get_env_var_or_default("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+
+    @staticmethod
+    def get_sqlite_analysis_limit() -> int:
+        return int(EnvManager._get_env_var_or_default("SQLITE_ANALYSIS_LIMIT", "1000"))
+
+    @staticmethod
+    def get_export_batch_size() -> int:
+        return int(EnvManager._get_env_var_or_default("EXPORT_BATCH_SIZE", "5000"))
+
+    @staticmethod
+    def get_dataset_cache_size() -> int:
+        return int(EnvManager._get_env_var_or_default("DATASET_CACHE_SIZE", "8"))
+
+    @staticmethod
+    def get_dataset_cache_max_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("DATASET_CACHE_MAX_MB", "512"))
+
+    @staticmethod
+    def get_stats_exact_max_rows() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_EXACT_MAX_ROWS", "50000"))
+
+    @staticmethod
+    def get_stats_sample_size() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_SAMPLE_SIZE", "20000"))
+
+    @staticmethod
+    def get_stats_sketch_k() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_SKETCH_K", "200"))
+
+    @staticmethod
+    def get_stats_hll_precision() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_HLL_PRECISION", "14"))
+
+    @staticmethod
+    def get_stats_histogram_bins() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_HISTOGRAM_BINS", "64"))
+
+    @staticmethod
+    def get_stats_frequent_items() -> int:
+        return int(EnvManager._get_env_var_or_default("STATS_FREQUENT_ITEMS", "64"))
+
+    @staticmethod
+    def get_dataset_snapshots() -> bool:
+        return EnvManager._get_env_var_or_default("DATASET_SNAPSHOTS", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_answer_cache_size() -> int:
+        return int(EnvManager._get_env_var_or_default("ANSWER_CACHE_SIZE", "256"))
+
+    @staticmethod
+    def get_answer_cache_max_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("ANSWER_CACHE_MAX_MB", "64"))
+
+    @staticmethod
+    def get_agent_max_concurrency() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_MAX_CONCURRENCY", "4"))
+
+    @staticmethod
+    def get_agent_max_concurrency_per_user() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_MAX_CONCURRENCY_PER_USER", "1"))
+
+    @staticmethod
+    def get_agent_queue_size() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_QUEUE_SIZE", "32"))
+
+    @staticmethod
+    def get_agent_queue_size_per_user() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_QUEUE_SIZE_PER_USER", "4"))
+
+    @staticmethod
+    def get_agent_sql_max_rows() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_SQL_MAX_ROWS", "10000"))
+
+    @staticmethod
+    def get_agent_sql_timeout_ms() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_SQL_TIMEOUT_MS", "15000"))
+
+    @staticmethod
+    def get_agent_sql_max_mb() -> int:
+        return int(EnvManager._get_env_var_or_default("AGENT_SQL_MAX_MB", "64"))
@@ -1,11 +1,17 @@
+import hashlib
 import os
+import tempfile
 
 import pandas as pd
-from fastapi import UploadFile
-from sqlalchemy import inspect
-from sqlalchemy.sql import text
+from fastapi import HTTPException, UploadFile
 
+from utils.columnar_store import ColumnarStore
 from utils.db_manager import DBManager
+from utils.env_manager import EnvManager
+from utils.ingest_manager import IngestManager
+from utils.schema_manager import SchemaManager
+
+UPLOAD_BLOCK_SIZE = 1024 * 1024
 
 
 class FileManager:
@@ -27,17 +33,18 @@ class FileManager:
     @staticmethod
     def clear_db_except_titanic(db_manager: DBManager):
         """
-        Removes all tables from the database except for 'titanic'.
+        Removes all tables from the database except for 'titanic', together with
+        their columnar sidecars.
         This ensures that only one additional dataset exists at any time.
         """
-        inspector = inspect(db_manager.engine)
-        tables = inspector.get_table_names()
+        tables = [table for table in db_manager.get_table_names() if table != "titanic"]
 
-        with db_manager.engine.connect() as conn:
+        with db_manager.write_engine.connect() as conn:
             for table in tables:
-                if table != "titanic":
-                    conn.execute(text(f"DROP TABLE {table}"))
+                SchemaManager.drop_table(conn, table)
             conn.commit()
+        for table in tables:
+            ColumnarStore.delete_table(table, db_manager.data_dir)
 
     @staticmethod
     def save_to_csv(df, file_path):
@@ -59,29 +66,30 @@ class FileManager:
         """
         Inserts a pandas DataFrame into a database table.
         """
-        df.to_sql(
-            table_name,
-            db_manager.engine,
-            if_exists="replace",
-            index=False)
+        with db_manager.write_engine.begin() as conn:
+            df.to_sql(
+                table_name,
+                conn,
+                if_exists="replace",
+                index=False)
+            SchemaManager.bump_table_version(conn, table_name)
 
     @staticmethod
     def csv_to_db(csv_file_path, table_name):
         """
-        Reads a CSV file and inserts it into a database table.
+        Streams a CSV file into a database table in bounded chunks.
         Before inserting, it removes any existing tables except 'titanic'.
         """
         db_manager = DBManager()
         FileManager.clear_db_except_titanic(
             db_manager
         )  # Remove tables before inserting
-        df = pd.read_csv(csv_file_path)
-        FileManager.insert_dataframe_to_table(df, table_name, db_manager)
+        return IngestManager.stream_csv(csv_file_path, table_name, db_manager)
 
     @staticmethod
     def excel_to_db(excel_file_path, table_name, sheet_name=0):
         """
-        Reads an Excel file and inserts it into a database table.
+        Streams one sheet of an Excel file into a database table in read-only mode.
         Before inserting, it removes any existing tables except 'titanic'.
         """
         db_manager = DBManager()
@@ -92,22 +100,48 @@ class FileManager:
         except ValueError:
             pass
 
-        df = pd.read_excel(excel_file_path, sheet_name=sheet_name)
-        FileManager.insert_dataframe_to_table(df, table_name, db_manager)
+        return IngestManager.stream_excel(excel_file_path, table_name, db_manager, sheet_name=sheet_name)
 
     @staticmethod
-    def save_upload_file(upload_file: UploadFile, table_name: str) -> str:
+    def save_upload_file(upload_file: UploadFile, table_name: str) -> dict:
         """
-        Saves an uploaded file to the 'data' directory while ensuring that only 'titanic.csv'
-        and the latest uploaded file remain in the directory.
+        Streams an uploaded file into the 'data' directory in fixed-size blocks.
+        The SHA-256 digest and byte size are computed while copying, uploads over
+        the configured maximum size are rejected, and the file is written to a
+        temporary name that is atomically renamed into place.
         """
         data_folder = "data"
         os.makedirs(data_folder, exist_ok=True)
 
         file_extension = upload_file.filename.split(".")[-1]
         destination = os.path.join(data_folder, f"{table_name}.{file_extension}")
+        max_size = EnvManager.get_max_upload_size_mb() * 1024 * 1024
 
-        with open(destination, "wb+") as file_object:
-            file_object.write(upload_file.file.read())
-
-        return destination
+        digest = hashlib.sha256()
+        size = 0
+        file_descriptor, temp_path = tempfile.mkstemp(dir=data_folder, prefix=f".{table_name}.", suffix=".part")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_object:
+                while True:
+                    block = upload_file.file.read(UPLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > max_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File exceeds the maximum upload size of {EnvManager.get_max_upload_size_mb()} MB"
+                        )
+                    digest.update(block)
+                    file_object.write(block)
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return {
+            "path": destination,
+            "sha256": digest.hexdigest(),
+            "size": size
+        }
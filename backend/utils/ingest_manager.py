@@ -0,0 +1,541 @@
+import datetime
+import itertools
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+from pandas.api import types as ptypes
+from sqlalchemy import create_engine
+
+from utils.columnar_store import ColumnarStore
+from utils.db_manager import DBManager
+from utils.column_stats import ColumnStats, ColumnStatsStore
+from utils.env_manager import EnvManager
+from utils.schema_manager import SchemaManager
+
+logger = logging.getLogger(__name__)
+
+
+class NoDataError(ValueError):
+    """Raised when a source to ingest holds no rows and no header."""
+
+
+def _ingest_sheet_to_file(excel_path: str, sheet_name: str, target_path: str, chunksize: int) -> Dict[str, Any]:
+    """
+    Process-pool worker: parses one worksheet into a private SQLite file, so sheets
+    are parsed in parallel without contending for the analytics database lock.
+    """
+    engine = create_engine(f"sqlite:///{target_path}")
+    try:
+        with engine.begin() as conn:
+            chunks = IngestManager.iter_excel_chunks(excel_path, sheet_name, chunksize)
+            return IngestManager.write_chunks(conn, chunks, "__sheet__")
+    finally:
+        engine.dispose()
+
+
+class IngestManager:
+    """
+    Streams tabular data into the analytics database in bounded chunks.
+
+    The schema is inferred from the first chunk and every chunk is bulk-inserted
+    with ``executemany`` inside a single transaction, so peak memory depends on
+    the chunk size and not on the size of the source file.
+    """
+
+    @staticmethod
+    def quote_identifier(name: Any) -> str:
+        return SchemaManager.quote_identifier(name)
+
+    @staticmethod
+    def to_records(df: pd.DataFrame) -> List[tuple]:
+        """
+        Converts a DataFrame chunk into DB-API parameter tuples, mapping NaN/NaT to NULL.
+        """
+        df = df.copy()
+        for column in df.columns:
+            if ptypes.is_datetime64_any_dtype(df[column].dtype):
+                df[column] = df[column].map(lambda value: None if pd.isna(value) else value.isoformat(sep=" "))
+            elif ptypes.is_object_dtype(df[column].dtype):
+                # Excel cells can hold date/time objects that sqlite3 cannot bind
+                df[column] = df[column].map(
+                    lambda value: value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value
+                )
+
+        values = df.astype(object).where(df.notna(), None)
+        return list(values.itertuples(index=False, name=None))
+
+    @staticmethod
+    def insert_chunk(conn, table_name: str, df: pd.DataFrame) -> int:
+        """
+        Bulk-inserts a chunk with a single ``executemany`` call and returns the number of rows written.
+        """
+        if df.empty:
+            return 0
+
+        columns_sql = ", ".join(IngestManager.quote_identifier(column) for column in df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        insert_sql = f"INSERT INTO {IngestManager.quote_identifier(table_name)} ({columns_sql}) VALUES ({placeholders})"
+
+        conn.exec_driver_sql(insert_sql, IngestManager.to_records(df))
+        return len(df)
+
+    @staticmethod
+    def write_chunks(
+        conn,
+        chunks: Iterable[pd.DataFrame],
+        table_name: str,
+        if_exists: str = "replace",
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Writes DataFrame chunks into ``table_name`` on an open connection and
+        returns, besides the row count and columns, the ColumnStats of the rows
+        written.
+
+        Column types are chosen from the first chunk with ``SchemaManager.compact_frame``
+        (or taken from the existing table when appending) and later chunks are converted
+        to them. When the first chunk is the whole dataset the table is created STRICT,
+        since every value is then known to fit its declared type. An append with
+        values that do not fit a STRICT table turns it into an ordinary one first.
+        """
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            raise NoDataError(f"No data found to ingest into table '{table_name}'")
+        second_chunk = next(chunks, None)
+        remaining_chunks = chunks if second_chunk is None else itertools.chain([second_chunk], chunks)
+
+        first_chunk.columns = [str(column) for column in first_chunk.columns]
+        columns = first_chunk.columns.tolist()
+
+        existing_types = {}
+        if if_exists != "replace":
+            existing_types = SchemaManager.get_column_types(conn, table_name)
+
+        strict = False
+        if existing_types:
+            column_types = existing_types
+            first_chunk = SchemaManager.apply_column_types(first_chunk, column_types)
+            strict = IngestManager._keep_strict(conn, table_name, first_chunk, column_types)
+        else:
+            first_chunk, column_types = SchemaManager.compact_frame(first_chunk)
+            SchemaManager.create_table(conn, table_name, column_types, if_exists, strict=second_chunk is None)
+
+        column_stats = ColumnStatsStore.collect(first_chunk, column_types)
+        row_count = IngestManager.insert_chunk(conn, table_name, first_chunk)
+        if progress_callback:
+            progress_callback(row_count)
+
+        for chunk in remaining_chunks:
+            chunk.columns = columns
+            chunk = SchemaManager.apply_column_types(chunk, column_types)
+            if strict:
+                strict = IngestManager._keep_strict(conn, table_name, chunk, column_types)
+            ColumnStatsStore.merge_into(column_stats, ColumnStatsStore.collect(chunk, column_types))
+            row_count += IngestManager.insert_chunk(conn, table_name, chunk)
+            if progress_callback:
+                progress_callback(row_count)
+
+        return {"row_count": row_count, "columns": columns, "column_stats": column_stats}
+
+    @staticmethod
+    def _keep_strict(conn, table_name: str, chunk: pd.DataFrame, column_types: Dict[str, str]) -> bool:
+        """
+        Returns whether ``table_name`` is still STRICT once ``chunk`` can be
+        written to it, relaxing the table when the chunk does not fit.
+        """
+        if not SchemaManager.is_strict(conn, table_name):
+            return False
+        if SchemaManager.fits_strict(chunk, column_types):
+            return True
+        SchemaManager.relax_table(conn, table_name)
+        return False
+
+    @staticmethod
+    def ingest_chunks(
+        chunks: Iterable[pd.DataFrame],
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        if_exists: str = "replace",
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Writes an iterable of DataFrame chunks into ``table_name`` and refreshes the
+        table's columnar sidecar once the rows are committed.
+
+        ``if_exists`` follows the ``to_sql`` convention. 'replace' loads the rows into a
+        staging table and swaps it in with a short drop-and-rename transaction, so the
+        live table stays readable for the whole load. 'append' writes into the live
+        table in one transaction, creating it only when it does not exist yet.
+        """
+        db_manager = db_manager or DBManager()
+
+        if if_exists != "replace":
+            with db_manager.write_engine.begin() as conn:
+                stored_stats = ColumnStatsStore.current(conn, table_name)
+                result = IngestManager.write_chunks(conn, chunks, table_name, if_exists, progress_callback)
+                column_stats = result.pop("column_stats")
+                version = SchemaManager.bump_table_version(conn, table_name)
+                # Appended rows are merged into the table's statistics using only this batch
+                ColumnStatsStore.record_append(conn, table_name, stored_stats, column_stats, version)
+        else:
+            staging_table = SchemaManager.staging_table_name(table_name)
+            try:
+                with db_manager.write_engine.begin() as conn:
+                    result = IngestManager.write_chunks(conn, chunks, staging_table, "replace", progress_callback)
+                    column_stats = result.pop("column_stats")
+                with db_manager.write_engine.begin() as conn:
+                    SchemaManager.swap_table(conn, staging_table, table_name)
+                    ColumnStatsStore.save(
+                        conn, table_name, column_stats, SchemaManager.get_table_version(conn, table_name)
+                    )
+            except BaseException:
+                with db_manager.write_engine.begin() as conn:
+                    SchemaManager.drop_table(conn, staging_table)
+                raise
+
+        IngestManager.after_write(table_name, db_manager)
+        return result
+
+    @staticmethod
+    def after_write(table_name: str, db_manager: DBManager) -> None:
+        """
+        Post-commit maintenance of a table whose rows changed: refreshes the query
+        planner statistics and the column statistics when the write did not
+        maintain them, and marks the columnar sidecar stale. Failures only cost
+        performance, so they are logged instead of failing the write that already
+        committed.
+        """
+        try:
+            with db_manager.write_engine.begin() as conn:
+                SchemaManager.analyze_table(conn, table_name)
+        except Exception as e:
+            logger.warning(f"Could not analyze table '{table_name}': {str(e)}")
+        try:
+            ColumnStatsStore.refresh(db_manager, table_name)
+        except Exception as e:
+            logger.warning(f"Could not refresh column statistics of table '{table_name}': {str(e)}")
+        ColumnarStore.mark_stale(table_name, db_manager)
+
+    @staticmethod
+    def stream_csv(
+        csv_path,
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        if_exists: str = "replace",
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reads a CSV file (path, URL or file-like object) in bounded chunks and ingests it into ``table_name``.
+        """
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        with pd.read_csv(csv_path, chunksize=chunksize) as reader:
+            return IngestManager.ingest_chunks(reader, table_name, db_manager, if_exists, progress_callback)
+
+    @staticmethod
+    def iter_record_batch_chunks(
+        batches: Iterable[pa.RecordBatch],
+        schema: pa.Schema,
+        chunksize: int,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Converts Arrow record batches into DataFrame chunks of at most ``chunksize`` rows.
+        A source without rows still yields one empty chunk so the table is created.
+        """
+        yielded = False
+        for batch in batches:
+            for offset in range(0, batch.num_rows, chunksize):
+                yield batch.slice(offset, chunksize).to_pandas()
+                yielded = True
+
+        if not yielded:
+            yield schema.empty_table().to_pandas()
+
+    @staticmethod
+    def stream_parquet(
+        parquet_path: str,
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        if_exists: str = "replace",
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reads a Parquet file batch by batch and ingests it into ``table_name``.
+        """
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        with pq.ParquetFile(parquet_path, memory_map=True) as parquet_file:
+            chunks = IngestManager.iter_record_batch_chunks(
+                parquet_file.iter_batches(batch_size=chunksize), parquet_file.schema_arrow, chunksize
+            )
+            return IngestManager.ingest_chunks(chunks, table_name, db_manager, if_exists, progress_callback)
+
+    @staticmethod
+    def stream_arrow_ipc(
+        arrow_path: str,
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        if_exists: str = "replace",
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reads an Arrow IPC file (file or stream format, including Feather v2) batch by
+        batch and ingests it into ``table_name``. The file is memory-mapped, so batches
+        are sliced without copying the whole file into memory.
+        """
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        with pa.memory_map(arrow_path) as source:
+            try:
+                reader = pa.ipc.open_file(source)
+                batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+            except pa.ArrowInvalid:
+                source.seek(0)
+                reader = pa.ipc.open_stream(source)
+                batches = iter(reader)
+
+            chunks = IngestManager.iter_record_batch_chunks(batches, reader.schema, chunksize)
+            return IngestManager.ingest_chunks(chunks, table_name, db_manager, if_exists, progress_callback)
+
+    @staticmethod
+    def get_sheet_names(excel_path: str) -> List[str]:
+        workbook = load_workbook(excel_path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def header_columns(header: Iterable[Any]) -> List[str]:
+        """
+        Names the columns of a header row the way pandas does: empty cells become
+        'Unnamed: <position>' and repeated names get a '.<n>' suffix ('col', 'col.1').
+        """
+        names = [
+            str(value) if value not in (None, "") else f"Unnamed: {index}"
+            for index, value in enumerate(header)
+        ]
+        # A suffixed name never collides with a name the header already has
+        taken = set(names)
+        columns, seen = [], {}
+        for name in names:
+            column, count = name, seen.get(name, 0)
+            while count:
+                seen[name] = count + 1
+                column = f"{name}.{count}"
+                count = count + 1 if column in taken else seen.get(column, 0)
+            seen[column] = count + 1
+            columns.append(column)
+        return columns
+
+    @staticmethod
+    def iter_worksheet_chunks(worksheet, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields a read-only worksheet as DataFrame chunks. The first row is the header
+        (see header_columns); completely empty rows are skipped.
+        """
+        worksheet.reset_dimensions()
+
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = IngestManager.header_columns(header)
+
+        buffer = []
+        yielded = False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append(row[:len(columns)] + (None,) * (len(columns) - len(row)))
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=columns)
+                yielded = True
+                buffer = []
+
+        if buffer or not yielded:
+            yield pd.DataFrame(buffer, columns=columns)
+
+    @staticmethod
+    def iter_excel_chunks(
+        excel_path: str,
+        sheet_name: Union[int, str] = 0,
+        chunksize: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields a worksheet as DataFrame chunks using openpyxl's read-only mode, which
+        streams rows from the file instead of building the whole workbook in memory.
+        """
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            if isinstance(sheet_name, int):
+                worksheet = workbook.worksheets[sheet_name]
+            else:
+                worksheet = workbook[sheet_name]
+            yield from IngestManager.iter_worksheet_chunks(worksheet, chunksize)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def stream_excel(
+        excel_path: str,
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        if_exists: str = "replace",
+        sheet_name: Union[int, str] = 0,
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Streams one worksheet into ``table_name`` in bounded chunks.
+        """
+        chunks = IngestManager.iter_excel_chunks(excel_path, sheet_name, chunksize)
+        return IngestManager.ingest_chunks(chunks, table_name, db_manager, if_exists, progress_callback)
+
+    @staticmethod
+    def sheet_table_name(table_name: str, sheet_name: str) -> str:
+        slug = re.sub(r"[^0-9a-zA-Z]+", "_", sheet_name).strip("_").lower()
+        return f"{table_name}_{slug or 'sheet'}"
+
+    @staticmethod
+    def stream_excel_workbook(
+        excel_path: str,
+        table_name: str,
+        db_manager: Optional[DBManager] = None,
+        chunksize: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Loads every worksheet into its own table named ``<table_name>_<sheet>``.
+
+        Sheets are parsed in a process pool, each into a private SQLite file, and then
+        copied into the analytics database with a single INSERT ... SELECT per sheet.
+        The pool is capped at the number of CPUs; with a single worker the sheets are
+        streamed one after another in this process instead.
+        """
+        db_manager = db_manager or DBManager()
+        chunksize = chunksize or EnvManager.get_ingest_chunk_size()
+        max_workers = max_workers or EnvManager.get_excel_sheet_workers()
+        sheet_names = IngestManager.get_sheet_names(excel_path)
+        max_workers = min(max_workers, len(sheet_names), os.cpu_count() or 1)
+
+        tables = {}
+        row_count = 0
+
+        def record_sheet(sheet: str, sheet_table: str, result: Dict[str, Any]) -> None:
+            nonlocal row_count
+            tables[sheet] = {"table_name": sheet_table, **result}
+            row_count += result["row_count"]
+            if progress_callback:
+                progress_callback(row_count)
+
+        if max_workers <= 1:
+            # Open the workbook once so the shared strings are parsed a single time
+            workbook = load_workbook(excel_path, read_only=True, data_only=True)
+            try:
+                for sheet in sheet_names:
+                    sheet_table = IngestManager.sheet_table_name(table_name, sheet)
+                    chunks = IngestManager.iter_worksheet_chunks(workbook[sheet], chunksize)
+                    try:
+                        result = IngestManager.ingest_chunks(chunks, sheet_table, db_manager)
+                    except NoDataError:
+                        continue  # empty worksheet
+                    record_sheet(sheet, sheet_table, result)
+            finally:
+                workbook.close()
+        else:
+            with tempfile.TemporaryDirectory(dir=db_manager.data_dir) as workdir:
+                with ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    futures = {
+                        sheet: executor.submit(
+                            _ingest_sheet_to_file,
+                            os.path.abspath(excel_path),
+                            sheet,
+                            os.path.join(workdir, f"sheet_{index}.sqlite"),
+                            chunksize
+                        )
+                        for index, sheet in enumerate(sheet_names)
+                    }
+
+                    for index, (sheet, future) in enumerate(futures.items()):
+                        try:
+                            result = future.result()
+                        except NoDataError:
+                            continue  # empty worksheet
+
+                        sheet_table = IngestManager.sheet_table_name(table_name, sheet)
+                        IngestManager._copy_from_attached(
+                            db_manager, os.path.join(workdir, f"sheet_{index}.sqlite"), "__sheet__", sheet_table,
+                            result.pop("column_stats")
+                        )
+                        IngestManager.after_write(sheet_table, db_manager)
+                        record_sheet(sheet, sheet_table, result)
+
+        if not tables:
+            raise ValueError(f"No data found in workbook '{excel_path}'")
+
+        return {"row_count": row_count, "tables": tables}
+
+    @staticmethod
+    def _copy_from_attached(
+        db_manager: DBManager,
+        source_path: str,
+        source_table: str,
+        table_name: str,
+        column_stats: Optional[Dict[str, ColumnStats]] = None
+    ) -> None:
+        """
+        Copies a table from another SQLite file into a staging table and swaps it in
+        as ``table_name``, together with the column statistics computed while the
+        source was written.
+        """
+        quoted_source = IngestManager.quote_identifier(source_table)
+        staging_table = SchemaManager.staging_table_name(table_name)
+        with db_manager.write_engine.connect() as conn:
+            # ATTACH is not allowed inside a transaction, so run it on the driver
+            # connection, which is in autocommit mode until SQLAlchemy emits BEGIN
+            dbapi_connection = conn.connection.dbapi_connection
+            dbapi_connection.execute("ATTACH DATABASE ? AS source_db", (source_path,))
+            try:
+                column_types = {
+                    row[1]: row[2] for row in conn.exec_driver_sql(f"PRAGMA source_db.table_info({quoted_source})")
+                }
+                SchemaManager.create_table(
+                    conn, staging_table, column_types, "replace",
+                    strict=SchemaManager.is_strict(conn, source_table, schema="source_db")
+                )
+                conn.exec_driver_sql(
+                    f"INSERT INTO main.{IngestManager.quote_identifier(staging_table)} "
+                    f"SELECT * FROM source_db.{quoted_source}"
+                )
+                conn.commit()
+
+                SchemaManager.swap_table(conn, staging_table, table_name)
+                if column_stats is not None:
+                    ColumnStatsStore.save(
+                        conn, table_name, column_stats, SchemaManager.get_table_version(conn, table_name)
+                    )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                SchemaManager.drop_table(conn, staging_table)
+                conn.commit()
+                raise
+            finally:
+                conn.rollback()
+                dbapi_connection.execute("DETACH DATABASE source_db")
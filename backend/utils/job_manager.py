@@ -0,0 +1,193 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from database.models.ingestion_job import IngestionJob
+from database.session import SessionLocal
+from services.file_manager_service import FileManagerService
+from utils.dataset_cache import DatasetCache
+from utils.db_manager import DBManager
+from utils.env_manager import EnvManager
+
+logger = logging.getLogger(__name__)
+
+QUEUED_PHASE = "queued"
+RUNNING_PHASES = ("parsing", "inserting")
+TERMINAL_PHASES = ("completed", "failed")
+
+
+class JobManager:
+    """
+    Runs dataset ingestion on a bounded worker pool and tracks every job in the
+    metadata database, so uploads return immediately and progress survives restarts.
+    """
+    _instance = None
+    executor: ThreadPoolExecutor
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(JobManager, cls).__new__(cls)
+            cls._instance.executor = ThreadPoolExecutor(
+                max_workers=EnvManager.get_ingest_workers(),
+                thread_name_prefix="ingestion-job"
+            )
+        return cls._instance
+
+    @staticmethod
+    def _serialize(job: IngestionJob) -> Dict[str, Any]:
+        throughput = None
+        if job.startedAt:
+            elapsed = ((job.finishedAt or datetime.now()) - job.startedAt).total_seconds()
+            throughput = round(job.rows_processed / elapsed, 2) if elapsed > 0 else None
+
+        return {
+            "job_id": job.id,
+            "table_name": job.table_name,
+            "operation": job.operation,
+            "file_format": job.file_format,
+            "phase": job.phase,
+            "rows_processed": job.rows_processed,
+            "rows_per_second": throughput,
+            "error": job.error,
+            "result": job.result,
+            "created_at": job.createdAt,
+            "started_at": job.startedAt,
+            "finished_at": job.finishedAt,
+        }
+
+    def _update_job(self, job_id: int, **fields) -> None:
+        with SessionLocal() as db:
+            job = db.get(IngestionJob, job_id)
+            for key, value in fields.items():
+                setattr(job, key, value)
+            db.commit()
+
+    def submit(
+        self,
+        table_name: str,
+        source: str,
+        file_format: str,
+        operation: str = "upload",
+        replace: bool = True,
+        content_hash: Optional[str] = None,
+        file_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Records a new job and queues it on the worker pool.
+        """
+        with SessionLocal() as db:
+            job = IngestionJob(
+                table_name=table_name,
+                source=source,
+                file_format=file_format,
+                operation=operation,
+                replace=replace,
+                content_hash=content_hash,
+                file_size=file_size,
+                phase=QUEUED_PHASE,
+                rows_processed=0,
+                createdAt=datetime.now(),
+                updatedAt=datetime.now()
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            job_info = self._serialize(job)
+
+        self.executor.submit(self._run_job, job_info["job_id"])
+        return job_info
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with SessionLocal() as db:
+            job = db.get(IngestionJob, job_id)
+            return self._serialize(job) if job else None
+
+    def resume_pending_jobs(self) -> int:
+        """
+        Re-queues jobs left behind by a previous process. Queued jobs and interrupted
+        replacements are safe to run again; interrupted appends are marked as failed
+        because part of their rows may already be in the table.
+        """
+        resumed = []
+        with SessionLocal() as db:
+            jobs = db.query(IngestionJob).filter(
+                IngestionJob.phase.in_((QUEUED_PHASE,) + RUNNING_PHASES)
+            ).all()
+            for job in jobs:
+                if job.phase == QUEUED_PHASE or job.replace:
+                    job.phase = QUEUED_PHASE
+                    job.rows_processed = 0
+                    resumed.append(job.id)
+                else:
+                    job.phase = "failed"
+                    job.error = "Interrupted by a server restart"
+                    job.finishedAt = datetime.now()
+            db.commit()
+
+        for job_id in resumed:
+            self.executor.submit(self._run_job, job_id)
+
+        logger.info(f"Resumed {len(resumed)} pending ingestion jobs")
+        return len(resumed)
+
+    def _dispatch(self, job: Dict[str, Any], progress_callback: Callable[[int], None]) -> Dict[str, Any]:
+        service = FileManagerService()
+        table_name = job["table_name"]
+        source = job["source"]
+        file_format = job["file_format"]
+
+        if file_format == "google_sheet":
+            return service.upload_google_sheet(table_name, source, progress_callback)
+
+        if job["operation"] == "update":
+            return service.update_table_from_file(file_format, table_name, source, job["replace"], progress_callback)
+        if file_format == "excel_workbook":
+            return service.upload_excel_workbook(
+                source, table_name, job["content_hash"], job["file_size"], progress_callback
+            )
+        return service.upload_file(
+            file_format, source, table_name, job["content_hash"], job["file_size"], progress_callback
+        )
+
+    def _run_job(self, job_id: int) -> None:
+        with SessionLocal() as db:
+            job = db.get(IngestionJob, job_id)
+            if job is None or job.phase != QUEUED_PHASE:
+                return
+            job_spec = {
+                "table_name": job.table_name,
+                "source": job.source,
+                "file_format": job.file_format,
+                "operation": job.operation,
+                "replace": job.replace,
+                "content_hash": job.content_hash,
+                "file_size": job.file_size,
+            }
+
+        self._update_job(job_id, phase="parsing", startedAt=datetime.now(), rows_processed=0, error=None)
+
+        def progress_callback(rows_processed: int) -> None:
+            self._update_job(job_id, phase="inserting", rows_processed=rows_processed)
+
+        try:
+            result = self._dispatch(job_spec, progress_callback)
+            if result.get("success", True):
+                # Parse the new dataset now rather than on the next dashboard view
+                DatasetCache.warm(DBManager())
+                self._update_job(
+                    job_id,
+                    phase="completed",
+                    rows_processed=result.get("row_count", 0),
+                    result=result,
+                    finishedAt=datetime.now()
+                )
+            else:
+                self._update_job(job_id, phase="failed", error=result.get("message"), finishedAt=datetime.now())
+        except HTTPException as e:
+            self._update_job(job_id, phase="failed", error=str(e.detail), finishedAt=datetime.now())
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            self._update_job(job_id, phase="failed", error=str(e), finishedAt=datetime.now())
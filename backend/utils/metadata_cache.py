@@ -0,0 +1,130 @@
+import copy
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.column_stats import ColumnStatsStore
+from utils.schema_manager import TABLE_VERSIONS_TABLE, SchemaManager
+
+
+class MetadataCache:
+    """
+    Caches the columns, row count and indexes of analytics tables. An entry is
+    reused until the table's version counter moves, which every ingest, append,
+    replace, sheet diff and drop does in its own transaction, until the database
+    schema version moves, which catches DDL issued outside those paths, or until
+    the table's rowid range moves, which catches most rows written outside them.
+
+    Reading the schema never counts rows. The row count is added to an entry the
+    first time metadata is asked for, from the column statistics ingest stores
+    with every write, and only counted with a scan when those are stale.
+    """
+    _cache: Dict[Tuple[str, str], Tuple[tuple, Optional[Dict[str, Any]]]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _table_versions(conn) -> Dict[str, int]:
+        if SchemaManager._object_type(conn, TABLE_VERSIONS_TABLE) != "table":
+            return {}
+        return dict(conn.exec_driver_sql(f"SELECT table_name, version FROM {TABLE_VERSIONS_TABLE}").fetchall())
+
+    @staticmethod
+    def _load(conn, table_name: str, version: int) -> Optional[Dict[str, Any]]:
+        quote = SchemaManager.quote_identifier
+        columns = [
+            {
+                "column_name": row[1],
+                "data_type": row[2],
+                "nullable": row[3] == 1,
+                "primary_key": row[5] == 1,
+            }
+            for row in conn.exec_driver_sql(f"PRAGMA table_info({quote(table_name)})")
+        ]
+        if not columns:
+            return None
+
+        indexes = []
+        for index_row in conn.exec_driver_sql(f"PRAGMA index_list({quote(table_name)})").fetchall():
+            index_name, unique = index_row[1], index_row[2]
+            index_columns = [row[2] for row in conn.exec_driver_sql(f"PRAGMA index_info({quote(index_name)})")]
+            indexes.append({"name": index_name, "unique": bool(unique), "columns": index_columns})
+
+        return {
+            "table_name": table_name,
+            "version": version,
+            "columns": columns,
+            "indexes": indexes,
+        }
+
+    @staticmethod
+    def _row_count(conn, table_name: str, version: int) -> int:
+        row_count = ColumnStatsStore.row_count(conn, table_name, version)
+        if row_count is None:
+            row_count = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {SchemaManager.quote_identifier(table_name)}").scalar()
+        return row_count
+
+    @staticmethod
+    def _get(
+        conn,
+        db_path: str,
+        table_name: str,
+        version: int,
+        schema_version: int,
+        with_row_count: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        key = (db_path, table_name)
+        state = (version, schema_version, SchemaManager.rowid_range(conn, table_name))
+        with MetadataCache._lock:
+            cached = MetadataCache._cache.get(key)
+        if cached and cached[0] == state:
+            metadata = cached[1]
+        else:
+            metadata = MetadataCache._load(conn, table_name, version)
+            with MetadataCache._lock:
+                MetadataCache._cache[key] = (state, metadata)
+
+        if with_row_count and metadata is not None and "row_count" not in metadata:
+            row_count = MetadataCache._row_count(conn, table_name, version)
+            with MetadataCache._lock:
+                metadata["row_count"] = row_count
+        return metadata
+
+    @staticmethod
+    def get_table_metadata(db_manager, table_name: str, with_row_count: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached metadata of ``table_name``, or None when the
+        table does not exist. Without ``with_row_count`` the entry may lack
+        ``row_count``, which spares a count of a table that was written outside
+        ingest.
+        """
+        with db_manager.engine.connect() as conn:
+            schema_version = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+            version = SchemaManager.get_table_version(conn, table_name)
+            metadata = MetadataCache._get(
+                conn, db_manager.engine.url.database, table_name, version, schema_version, with_row_count
+            )
+        with MetadataCache._lock:
+            return copy.deepcopy(metadata)
+
+    @staticmethod
+    def get_all_metadata(db_manager) -> List[Dict[str, Any]]:
+        """
+        Returns the metadata of every user-visible table, reading all version
+        counters in one query.
+        """
+        table_names = db_manager.get_table_names()
+        with db_manager.engine.connect() as conn:
+            schema_version = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+            versions = MetadataCache._table_versions(conn)
+            metadata = [
+                MetadataCache._get(
+                    conn, db_manager.engine.url.database, table_name, versions.get(table_name, 0), schema_version
+                )
+                for table_name in table_names
+            ]
+        with MetadataCache._lock:
+            return copy.deepcopy([entry for entry in metadata if entry is not None])
+
+    @staticmethod
+    def clear_cache() -> None:
+        with MetadataCache._lock:
+            MetadataCache._cache.clear()
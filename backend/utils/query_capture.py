@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from langchain_community.utilities.sql_database import truncate_word
+from langchain_core.tools import BaseTool
+
+from utils.sql_sandbox import SQLSandbox
+
+_captures: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("query_captures", default=None)
+
+
+class QueryCapture:
+    """
+    Collects the result sets the agent's SQL tool produces during one agent run, so
+    the caller can return the rows the agent actually saw instead of running its
+    SQL a second time. Captures are scoped with a context variable: concurrent runs
+    sharing one agent never see each other's queries, and langchain copies the
+    context into the executor threads it runs tools on.
+    """
+
+    @staticmethod
+    @contextmanager
+    def collect() -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the list the SQL tool appends a capture to for every query it runs
+        in this context: ``{"query", "error"}``, or ``{"query", "result",
+        "total_rows", "truncated"}`` as returned by SQLSandbox.execute.
+        """
+        captures: List[Dict[str, Any]] = []
+        token = _captures.set(captures)
+        try:
+            yield captures
+        finally:
+            _captures.reset(token)
+
+    @staticmethod
+    def record(capture: Dict[str, Any]) -> None:
+        captures = _captures.get()
+        if captures is not None:
+            captures.append(capture)
+
+    @staticmethod
+    def final(captures: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the last query that succeeded, the one the answer is based on, or the
+        last failure when none did.
+        """
+        for capture in reversed(captures):
+            if "result" in capture:
+                return capture
+        return captures[-1] if captures else None
+
+
+class CapturingQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """
+    ``sql_db_query`` that runs the agent's SQL in the SQLSandbox, records the
+    result with QueryCapture and renders the LLM's observation from the same
+    columns, noting when rows were left out.
+    """
+
+    def _run(self, query: str, run_manager=None) -> str:
+        try:
+            executed = SQLSandbox.execute(self.db._engine.url.database, query)
+        except Exception as e:
+            QueryCapture.record({"query": query, "error": str(e)})
+            # Same message SQLDatabase.run_no_throw gives the agent
+            return f"Error: {e}"
+
+        QueryCapture.record({"query": query, **executed})
+        captured = executed["result"]
+        max_length = self.db._max_string_length
+        rows = list(zip(*[[truncate_word(value, length=max_length) for value in column] for column in captured.values]))
+        observation = str(rows) if rows else ""
+        if executed["truncated"]:
+            total = executed["total_rows"] if executed["total_rows"] is not None else "more"
+            observation += f"\n(Showing the first {len(rows)} of {total} rows. Aggregate or filter to see the rest.)"
+        return observation
+
+
+class CapturingSQLDatabaseToolkit(SQLDatabaseToolkit):
+    """
+    SQLDatabaseToolkit whose query tool is a CapturingQuerySQLDatabaseTool.
+    """
+
+    def get_tools(self) -> List[BaseTool]:
+        return [
+            CapturingQuerySQLDatabaseTool(db=self.db, description=tool.description)
+            if isinstance(tool, QuerySQLDatabaseTool) else tool
+            for tool in super().get_tools()
+        ]
@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import Response
+
+from utils.env_manager import EnvManager
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+SUPPORTED_MEDIA_TYPES = (JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE)
+# Arrow schema metadata key that carries the response fields besides the rows
+ARROW_METADATA_KEY = b"metadata"
+# Text columns with at most this share of distinct values are dictionary-encoded in Arrow
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+
+class ColumnarResult:
+    """
+    A query result held column by column. Rows are transposed batch by batch as
+    they come off the cursor, so no per-row dict is ever built.
+    """
+
+    def __init__(self, columns: List[str], values: List[list]):
+        self.columns = columns
+        self.values = values
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence], skip: int = 0) -> "ColumnarResult":
+        """
+        Transposes ``rows`` into columns, dropping the first ``skip`` columns.
+        """
+        columns = list(columns)[skip:]
+        if not rows:
+            return cls(columns, [[] for _ in columns])
+        return cls(columns, [list(values) for values in list(zip(*rows))[skip:]])
+
+    @classmethod
+    def from_cursor(cls, result, skip: int = 0, batch_size: Optional[int] = None) -> "ColumnarResult":
+        """
+        Drains a SQLAlchemy result with ``fetchmany`` and appends each batch to the
+        column buffers, dropping the first ``skip`` columns.
+        """
+        batch_size = batch_size or EnvManager.get_export_batch_size()
+        columns = list(result.keys())[skip:]
+        values = [[] for _ in columns]
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            for buffer, column_values in zip(values, list(zip(*rows))[skip:]):
+                buffer.extend(column_values)
+        return cls(columns, values)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> "ColumnarResult":
+        return cls(list(data), [list(values) for values in data.values()])
+
+    def to_dict(self) -> Dict[str, list]:
+        return dict(zip(self.columns, self.values))
+
+    @staticmethod
+    def _to_arrow_array(values: list) -> pa.Array:
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            # SQLite columns may mix types; fall back to their text form
+            array = pa.array([None if value is None else str(value) for value in values], pa.string())
+        if pa.types.is_string(array.type) and len(array):
+            # Repetitive text (categories, dates) is sent once per distinct value
+            if pc.count_distinct(array).as_py() <= len(array) * DICTIONARY_MAX_DISTINCT_RATIO:
+                return array.dictionary_encode()
+        return array
+
+    def to_arrow(self, metadata: Optional[Dict[str, Any]] = None) -> pa.Table:
+        arrays = [ColumnarResult._to_arrow_array(values) for values in self.values]
+        schema_metadata = {ARROW_METADATA_KEY: orjson.dumps(metadata, default=str)} if metadata else None
+        return pa.Table.from_arrays(arrays, names=self.columns, metadata=schema_metadata)
+
+
+class ResultEncoder:
+    """
+    Serializes columnar results as Arrow IPC or compact JSON depending on the
+    client's Accept header. JSON bodies are ``{**metadata, "columns": [...],
+    "data": {column: values}}``; Arrow bodies carry the metadata in the schema.
+    """
+
+    @staticmethod
+    def negotiate(accept: Optional[str]) -> str:
+        """
+        Picks the supported media type with the highest quality in ``accept``,
+        defaulting to JSON.
+        """
+        best, best_quality = JSON_MEDIA_TYPE, 0.0
+        for item in (accept or "").split(","):
+            media_type, *params = [part.strip() for part in item.split(";")]
+            if media_type not in SUPPORTED_MEDIA_TYPES:
+                continue
+            quality = 1.0
+            for param in params:
+                if param.startswith("q="):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        quality = 0.0
+            if quality > best_quality:
+                best, best_quality = media_type, quality
+        return best
+
+    @staticmethod
+    def to_json(result: ColumnarResult, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+        return ResultEncoder.dumps({**(metadata or {}), "columns": result.columns, "data": result.to_dict()})
+
+    @staticmethod
+    def dumps(payload: Any) -> bytes:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+    @staticmethod
+    def to_arrow_ipc(
+        result: ColumnarResult,
+        metadata: Optional[Dict[str, Any]] = None,
+        media_type: str = ARROW_STREAM_MEDIA_TYPE
+    ) -> bytes:
+        table = result.to_arrow(metadata)
+        sink = pa.BufferOutputStream()
+        open_writer = pa.ipc.new_file if media_type == ARROW_FILE_MEDIA_TYPE else pa.ipc.new_stream
+        with open_writer(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def response(
+        result: ColumnarResult,
+        accept: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Response:
+        media_type = ResultEncoder.negotiate(accept)
+        if media_type == JSON_MEDIA_TYPE:
+            content = ResultEncoder.to_json(result, metadata)
+        else:
+            content = ResultEncoder.to_arrow_ipc(result, metadata, media_type)
+        return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+    @staticmethod
+    def json_response(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(
+            content=ResultEncoder.dumps(payload), media_type=JSON_MEDIA_TYPE, status_code=status_code, headers=headers
+        )
@@ -0,0 +1,279 @@
+import heapq
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.env_manager import EnvManager
+from utils.schema_manager import SchemaManager
+
+# Tables whose rowid range is at most this many times the sample size are sampled
+# from their full rowid list, which is cheaper than probing for gaps
+SMALL_TABLE_FACTOR = 4
+MAX_PROBE_ROUNDS = 8
+MIN_HIT_RATE = 0.05
+PROBE_MARGIN = 1.25
+SQL_VARIABLE_BATCH = 500
+
+
+class SamplingManager:
+    """
+    Draws random rows from analytics tables without sorting the whole table.
+
+    Uniform samples probe random rowids between MIN(rowid) and MAX(rowid) and fetch
+    the ones that exist by key, so a sample of k rows costs O(k) lookups whatever
+    the table size. Gaps left by deleted rows are handled by rejection: each round
+    draws enough new candidates for the hit rate observed so far. Samples are cached
+    per table and invalidated when the table's version or rowid range changes.
+    """
+    _cache: "OrderedDict[Tuple, Tuple[Tuple, Any]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _existing_rowids(conn, table_name: str, candidates: List[int], column: Optional[str] = None) -> List[tuple]:
+        quote = SchemaManager.quote_identifier
+        selected = "rowid" if column is None else f"rowid, {quote(column)}"
+        rows = []
+        for offset in range(0, len(candidates), SQL_VARIABLE_BATCH):
+            batch = candidates[offset:offset + SQL_VARIABLE_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            rows.extend(conn.exec_driver_sql(
+                f"SELECT {selected} FROM {quote(table_name)} WHERE rowid IN ({placeholders})", tuple(batch)
+            ).fetchall())
+        return rows
+
+    @staticmethod
+    def _probe(
+        conn,
+        table_name: str,
+        rowid_range: Tuple[int, int],
+        rng: random.Random,
+        wanted: int,
+        accept: Callable[[tuple], bool],
+        column: Optional[str] = None
+    ) -> bool:
+        """
+        Probes random rowids until ``accept`` has taken ``wanted`` rows or the probe
+        rounds run out. ``accept`` receives each existing row in random order and
+        returns whether it was kept. Returns False when the probing gave up.
+        """
+        low, high = rowid_range
+        span = high - low + 1
+        probed = set()
+        hit_rate = 1.0
+        for _ in range(MAX_PROBE_ROUNDS):
+            if wanted <= 0:
+                return True
+            draws = min(math.ceil(wanted / hit_rate * PROBE_MARGIN) + 8, span - len(probed))
+            # Once most of the range has been probed, random draws mostly collide
+            if draws <= 0 or len(probed) + draws > span // 2:
+                return False
+
+            candidates = set()
+            while len(candidates) < draws:
+                rowid = rng.randint(low, high)
+                if rowid not in probed:
+                    candidates.add(rowid)
+            probed.update(candidates)
+
+            rows = SamplingManager._existing_rowids(conn, table_name, list(candidates), column)
+            hit_rate = max(len(rows) / draws, MIN_HIT_RATE)
+            rng.shuffle(rows)
+            for row in rows:
+                if wanted <= 0:
+                    break
+                if accept(row):
+                    wanted -= 1
+        return wanted <= 0
+
+    @staticmethod
+    def sample_rowids(conn, table_name: str, k: int, rng: random.Random) -> List[int]:
+        """
+        Returns up to ``k`` distinct rowids of ``table_name`` chosen uniformly at random.
+        """
+        low, high = SchemaManager.rowid_range(conn, table_name)
+        if low is None or k <= 0:
+            return []
+
+        if high - low + 1 > k * SMALL_TABLE_FACTOR:
+            sampled = []
+            if SamplingManager._probe(
+                conn, table_name, (low, high), rng, k, lambda row: sampled.append(row[0]) or True
+            ):
+                return sampled
+
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        rowids = [row[0] for row in conn.exec_driver_sql(f"SELECT rowid FROM {quoted_table}")]
+        return rng.sample(rowids, min(k, len(rowids)))
+
+    @staticmethod
+    def stratum_quotas(counts: Dict[Any, int], k: int) -> Dict[Any, int]:
+        """
+        Splits ``k`` rows across strata in proportion to their sizes using the largest
+        remainder method. When there are no more strata than rows, every stratum
+        gets at least one row so that rare values are represented; the rows this
+        guarantees are taken back from the strata that got the most above their
+        share, so the quotas always add up to ``k``.
+        """
+        total = sum(counts.values())
+        if total <= k:
+            return dict(counts)
+
+        minimum = 1 if len(counts) <= k else 0
+        shares = {value: k * count / total for value, count in counts.items()}
+        quotas = {value: max(minimum, int(share)) for value, share in shares.items()}
+        by_remainder = sorted(shares, key=lambda value: shares[value] - int(shares[value]), reverse=True)
+
+        leftover = k - sum(quotas.values())
+        for value in by_remainder:
+            if leftover <= 0:
+                break
+            if quotas[value] < counts[value]:
+                quotas[value] += 1
+                leftover -= 1
+        # Rows guaranteed to small strata are taken back, one at a time, from the
+        # stratum furthest above its share. Only strata above the minimum give rows
+        # back, and those always cover the excess since len(counts) * minimum <= k
+        above_share = [
+            (shares[value] - quota, index, value)
+            for index, (value, quota) in enumerate(quotas.items()) if quota > minimum
+        ]
+        heapq.heapify(above_share)
+        while leftover < 0:
+            _, index, value = heapq.heappop(above_share)
+            quotas[value] -= 1
+            leftover += 1
+            if quotas[value] > minimum:
+                heapq.heappush(above_share, (shares[value] - quotas[value], index, value))
+        return quotas
+
+    @staticmethod
+    def stratified_rowids(conn, table_name: str, column: str, k: int, rng: random.Random) -> List[int]:
+        """
+        Returns up to ``k`` rowids sampled uniformly within each value of ``column``,
+        with per-value quotas proportional to the value counts. Counting the values
+        is one aggregate pass; the rows themselves are found by rowid probing, and
+        the strata probing cannot fill, typically the rare ones, are completed
+        together in one more pass that numbers their rows in random order.
+        """
+        quote = SchemaManager.quote_identifier
+        low, high = SchemaManager.rowid_range(conn, table_name)
+        if low is None or k <= 0:
+            return []
+
+        counts = dict(conn.exec_driver_sql(
+            f"SELECT {quote(column)}, COUNT(*) FROM {quote(table_name)} GROUP BY {quote(column)}"
+        ).fetchall())
+        quotas = {value: quota for value, quota in SamplingManager.stratum_quotas(counts, k).items() if quota > 0}
+        picked = {value: [] for value in quotas}
+
+        def accept(row) -> bool:
+            rowid, value = row
+            if value in picked and len(picked[value]) < quotas[value]:
+                picked[value].append(rowid)
+                return True
+            return False
+
+        if high - low + 1 > k * SMALL_TABLE_FACTOR:
+            SamplingManager._probe(conn, table_name, (low, high), rng, sum(quotas.values()), accept, column)
+
+        unfilled = [value for value, quota in quotas.items() if len(picked[value]) < quota]
+        if unfilled:
+            condition, params = "", ()
+            if len(unfilled) < len(counts):
+                values = [value for value in unfilled if value is not None]
+                clauses = [f"{quote(column)} IN ({', '.join('?' for _ in values)})"] if values else []
+                if None in unfilled:
+                    clauses.append(f"{quote(column)} IS NULL")
+                condition, params = f"WHERE {' OR '.join(clauses)}", tuple(values)
+            # The first ``quota`` rows of a stratum in random order are a uniform pick
+            # of it, so rows probing already took are skipped and the rest fill up
+            rows = conn.exec_driver_sql(
+                f"SELECT row_id, value FROM (SELECT rowid AS row_id, {quote(column)} AS value, "
+                f"ROW_NUMBER() OVER (PARTITION BY {quote(column)} ORDER BY RANDOM()) AS position "
+                f"FROM {quote(table_name)} {condition}) WHERE position <= ?",
+                params + (max(quotas[value] for value in unfilled),)
+            ).fetchall()
+            chosen = {value: set(picked[value]) for value in unfilled}
+            for rowid, value in rows:
+                if value in chosen and len(picked[value]) < quotas[value] and rowid not in chosen[value]:
+                    picked[value].append(rowid)
+
+        rowids = [rowid for values in picked.values() for rowid in values]
+        rng.shuffle(rowids)
+        return rowids
+
+    @staticmethod
+    def fetch_rows(conn, table_name: str, rowids: List[int]) -> Tuple[List[str], List[tuple]]:
+        """
+        Reads the rows with the given rowids in the order given.
+        """
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        columns, by_rowid = None, {}
+        for offset in range(0, len(rowids), SQL_VARIABLE_BATCH):
+            batch = rowids[offset:offset + SQL_VARIABLE_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            result = conn.exec_driver_sql(
+                f"SELECT rowid, * FROM {quoted_table} WHERE rowid IN ({placeholders})", tuple(batch)
+            )
+            columns = list(result.keys())[1:]
+            for row in result:
+                by_rowid[row[0]] = tuple(row[1:])
+
+        if columns is None:
+            result = conn.exec_driver_sql(f"SELECT * FROM {quoted_table} LIMIT 0")
+            columns = list(result.keys())
+        return columns, [by_rowid[rowid] for rowid in rowids if rowid in by_rowid]
+
+    @staticmethod
+    def sample(
+        db_manager,
+        table_name: str,
+        limit: int,
+        stratify_by: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> Tuple[List[str], List[tuple]]:
+        """
+        Returns the column names and up to ``limit`` random rows of ``table_name``,
+        optionally stratified by the values of ``stratify_by``. Repeated calls return
+        the cached sample until the table changes.
+        """
+        fingerprint = db_manager.get_table_fingerprint(table_name)
+        if fingerprint is None:
+            return [], []
+
+        with db_manager.engine.connect() as conn:
+            version = (SchemaManager.get_table_version(conn, table_name), fingerprint)
+            key = (str(db_manager.engine.url), table_name, limit, stratify_by, seed)
+            with SamplingManager._lock:
+                cached = SamplingManager._cache.get(key)
+                if cached and cached[0] == version:
+                    SamplingManager._cache.move_to_end(key)
+                    return cached[1]
+
+            rng = random.Random(seed)
+            if SchemaManager._object_type(conn, table_name) != "table":
+                # Plain views have no rowid to probe
+                result = conn.exec_driver_sql(
+                    f"SELECT * FROM {SchemaManager.quote_identifier(table_name)} ORDER BY RANDOM() LIMIT ?", (limit,)
+                )
+                sample = (list(result.keys()), [tuple(row) for row in result])
+            else:
+                if stratify_by is None:
+                    rowids = SamplingManager.sample_rowids(conn, table_name, limit, rng)
+                else:
+                    rowids = SamplingManager.stratified_rowids(conn, table_name, stratify_by, limit, rng)
+                sample = SamplingManager.fetch_rows(conn, table_name, rowids)
+
+        with SamplingManager._lock:
+            SamplingManager._cache[key] = (version, sample)
+            SamplingManager._cache.move_to_end(key)
+            while len(SamplingManager._cache) > EnvManager.get_sample_cache_size():
+                SamplingManager._cache.popitem(last=False)
+        return sample
+
+    @staticmethod
+    def clear_cache() -> None:
+        with SamplingManager._lock:
+            SamplingManager._cache.clear()
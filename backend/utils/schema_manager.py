@@ -0,0 +1,320 @@
+import datetime
+import sqlite3
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api import types as ptypes
+
+ISO_DATE_PATTERN = r"\d{4}-\d{2}-\d{2}"
+ISO_DATETIME_PATTERN = r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?"
+# Identifiers such as zip codes or card numbers look numeric but lose information as numbers
+NUMERIC_IDENTIFIER_PATTERN = r"[+-]?0\d+|[+-]?\d{16,}"
+MAX_EXACT_FLOAT_INTEGER = 2 ** 53
+
+STRICT_COLUMN_TYPES = {"INT", "INTEGER", "REAL", "TEXT", "BLOB", "ANY"}
+STRICT_MIN_SQLITE_VERSION = (3, 37, 0)
+
+# Bookkeeping and staging tables start with a double underscore
+INTERNAL_PREFIX = "__"
+STAGING_TABLE_PREFIX = "__staging__"
+TABLE_VERSIONS_TABLE = "__table_versions__"
+TABLE_STATS_TABLE = "__table_stats__"
+COLUMN_STATS_TABLE = "__column_stats__"
+
+
+class SchemaManager:
+    """
+    Chooses compact SQLite column types for incoming data and maintains the
+    physical layout of analytics tables: STRICT tables when every value is
+    known to fit its column, staged replaces and per-table version counters.
+    """
+
+    @staticmethod
+    def quote_identifier(name) -> str:
+        return '"' + str(name).replace('"', '""') + '"'
+
+    @staticmethod
+    def _compact_float(series: pd.Series) -> Tuple[pd.Series, str]:
+        values = series.dropna()
+        if ((values % 1 == 0) & (values.abs() <= MAX_EXACT_FLOAT_INTEGER)).all():
+            return series.astype("Int64"), "INTEGER"
+        return series, "REAL"
+
+    @staticmethod
+    def compact_column(series: pd.Series) -> Tuple[pd.Series, str]:
+        """
+        Returns the column converted to its tightest representation and the SQLite
+        type to declare for it. Floats holding only integers become INTEGER,
+        numeric-looking text becomes numbers, ISO date strings become DATE and ISO
+        timestamps become TIMESTAMP.
+        """
+        dtype = series.dtype
+        if ptypes.is_bool_dtype(dtype):
+            return series, "INTEGER"
+        if ptypes.is_integer_dtype(dtype):
+            return pd.to_numeric(series, downcast="integer"), "INTEGER"
+        if ptypes.is_float_dtype(dtype):
+            return SchemaManager._compact_float(series)
+        if ptypes.is_datetime64_any_dtype(dtype):
+            return series, "TIMESTAMP"
+        if not ptypes.is_object_dtype(dtype) and not ptypes.is_string_dtype(dtype):
+            return series, "TEXT"
+
+        values = series.dropna()
+        if values.empty:
+            return series, "TEXT"
+
+        kinds = set(values.map(type))
+        if kinds <= {bool}:
+            return series.astype("boolean"), "INTEGER"
+        if kinds <= {datetime.datetime, pd.Timestamp}:
+            return pd.to_datetime(series), "TIMESTAMP"
+        if kinds <= {datetime.date}:
+            return series.map(lambda value: None if pd.isna(value) else value.isoformat()), "DATE"
+        if kinds != {str}:
+            return series, "TEXT"
+
+        stripped = values.str.strip()
+        if stripped.str.fullmatch(ISO_DATE_PATTERN).all():
+            return series.str.strip(), "DATE"
+        if stripped.str.fullmatch(ISO_DATETIME_PATTERN).all():
+            parsed = pd.to_datetime(series, format="ISO8601", errors="coerce")
+            if parsed.notna().sum() == len(values):
+                return parsed, "TIMESTAMP"
+            return series, "TEXT"
+        if stripped.str.fullmatch(NUMERIC_IDENTIFIER_PATTERN).any():
+            return series, "TEXT"
+
+        numeric = pd.to_numeric(stripped, errors="coerce")
+        if numeric.isna().any():
+            return series, "TEXT"
+        numeric = numeric.reindex(series.index)
+        if ptypes.is_integer_dtype(numeric.dtype) and not numeric.isna().any():
+            return pd.to_numeric(numeric, downcast="integer"), "INTEGER"
+        return SchemaManager._compact_float(numeric.astype(float))
+
+    @staticmethod
+    def compact_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        Compacts every column of ``df`` and returns the converted frame together
+        with the column types to declare.
+        """
+        df = df.copy()
+        column_types = {}
+        for column in df.columns:
+            df[column], column_types[str(column)] = SchemaManager.compact_column(df[column])
+        return df, column_types
+
+    @staticmethod
+    def apply_column_types(df: pd.DataFrame, column_types: Dict[str, str]) -> pd.DataFrame:
+        """
+        Converts a later chunk to the types chosen for the table. Conversion is
+        best-effort: a column whose values do not all fit its type is left as is and
+        stored through SQLite's type affinity.
+        """
+        df = df.copy()
+        for column in df.columns:
+            sql_type = column_types.get(str(column), "TEXT").upper()
+            series = df[column]
+            if sql_type in ("INTEGER", "INT", "REAL") and not ptypes.is_bool_dtype(series.dtype):
+                if not ptypes.is_numeric_dtype(series.dtype):
+                    numeric = pd.to_numeric(series, errors="coerce")
+                    if numeric.notna().sum() != series.notna().sum():
+                        continue
+                    series = numeric
+                if sql_type != "REAL" and ptypes.is_float_dtype(series.dtype):
+                    series = SchemaManager._compact_float(series)[0]
+                df[column] = series
+            elif sql_type == "TIMESTAMP" and not ptypes.is_datetime64_any_dtype(series.dtype):
+                parsed = pd.to_datetime(series, format="ISO8601", errors="coerce")
+                if parsed.notna().sum() == series.notna().sum():
+                    df[column] = parsed
+            elif sql_type == "DATE" and ptypes.is_datetime64_any_dtype(series.dtype):
+                df[column] = series.dt.strftime("%Y-%m-%d").where(series.notna(), None)
+        return df
+
+    @staticmethod
+    def can_be_strict(column_types: Dict[str, str]) -> bool:
+        return (
+            sqlite3.sqlite_version_info >= STRICT_MIN_SQLITE_VERSION
+            and all(sql_type.upper() in STRICT_COLUMN_TYPES for sql_type in column_types.values())
+        )
+
+    @staticmethod
+    def fits_strict(df: pd.DataFrame, column_types: Dict[str, str]) -> bool:
+        """
+        Tells whether a chunk converted with ``apply_column_types`` can be inserted
+        into a STRICT table with these column types. Numeric columns must have kept
+        a numeric dtype; a value left as is by the conversion does not fit.
+        """
+        for column in df.columns:
+            sql_type = column_types.get(str(column), "TEXT").upper()
+            series = df[column]
+            if sql_type not in ("INT", "INTEGER", "REAL") or series.isna().all():
+                continue
+            if ptypes.is_bool_dtype(series.dtype) or ptypes.is_integer_dtype(series.dtype):
+                continue
+            if sql_type == "REAL" and ptypes.is_float_dtype(series.dtype):
+                continue
+            return False
+        return True
+
+    @staticmethod
+    def relax_table(conn, table_name: str) -> None:
+        """
+        Rebuilds a STRICT table as an ordinary one with the same columns, so rows
+        that do not fit the declared types can be stored through type affinity as in
+        any other table. Runs in the caller's transaction and keeps the version and
+        statistics of the table.
+        """
+        quote = SchemaManager.quote_identifier
+        staging_table = SchemaManager.staging_table_name(table_name)
+        SchemaManager.create_table(conn, staging_table, SchemaManager.get_column_types(conn, table_name), "replace")
+        conn.exec_driver_sql(f"INSERT INTO {quote(staging_table)} SELECT * FROM {quote(table_name)}")
+        conn.exec_driver_sql(f"DROP TABLE {quote(table_name)}")
+        SchemaManager.rename_table(conn, staging_table, table_name)
+
+    @staticmethod
+    def is_strict(conn, table_name: str, schema: str = "main") -> bool:
+        if sqlite3.sqlite_version_info < STRICT_MIN_SQLITE_VERSION:
+            return False
+        row = conn.exec_driver_sql(
+            "SELECT strict FROM pragma_table_list WHERE schema = ? AND name = ?", (schema, table_name)
+        ).fetchone()
+        return bool(row and row[0])
+
+    @staticmethod
+    def get_column_types(conn, table_name: str) -> Dict[str, str]:
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        return {row[1]: row[2] for row in conn.exec_driver_sql(f"PRAGMA table_info({quoted_table})")}
+
+    @staticmethod
+    def rowid_range(conn, table_name: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Returns the lowest and highest rowid of ``table_name``, (None, None) when it
+        is empty or a view. Rows written without moving the version counter (see
+        bump_table_version) usually move one of them.
+        """
+        if SchemaManager._object_type(conn, table_name) != "table":
+            return None, None
+        # SQLite answers MIN/MAX from the b-tree only when each is the sole aggregate of its SELECT
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        return tuple(conn.exec_driver_sql(
+            f"SELECT (SELECT MIN(rowid) FROM {quoted_table}), (SELECT MAX(rowid) FROM {quoted_table})"
+        ).fetchone())
+
+    @staticmethod
+    def is_internal_table(table_name: str) -> bool:
+        return table_name.startswith(INTERNAL_PREFIX) or table_name.startswith("sqlite_")
+
+    @staticmethod
+    def _object_type(conn, name: str):
+        row = conn.exec_driver_sql("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def drop_table(conn, table_name: str) -> None:
+        """
+        Drops a table or view, bumping its version and removing its column statistics.
+        """
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        object_type = SchemaManager._object_type(conn, table_name)
+        if object_type == "view":
+            conn.exec_driver_sql(f"DROP VIEW {quoted_table}")
+        elif object_type == "table":
+            conn.exec_driver_sql(f"DROP TABLE {quoted_table}")
+        if object_type and not SchemaManager.is_internal_table(table_name):
+            SchemaManager.bump_table_version(conn, table_name)
+            SchemaManager.delete_table_stats(conn, table_name)
+
+    @staticmethod
+    def create_table(
+        conn,
+        table_name: str,
+        column_types: Dict[str, str],
+        if_exists: str = "replace",
+        strict: bool = False
+    ) -> None:
+        quoted_table = SchemaManager.quote_identifier(table_name)
+        if if_exists == "replace":
+            SchemaManager.drop_table(conn, table_name)
+
+        columns_sql = ", ".join(
+            f"{SchemaManager.quote_identifier(column)} {sql_type}" for column, sql_type in column_types.items()
+        )
+        options = " STRICT" if strict and SchemaManager.can_be_strict(column_types) else ""
+        conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {quoted_table} ({columns_sql}){options}")
+
+    @staticmethod
+    def staging_table_name(table_name: str) -> str:
+        """
+        Returns a new staging table name for one load into ``table_name``. Names are
+        unique per call, so concurrent replaces of the same table never write into,
+        swap in or clean up each other's staging table.
+        """
+        return f"{STAGING_TABLE_PREFIX}{uuid.uuid4().hex}__{table_name}"
+
+    @staticmethod
+    def rename_table(conn, source_table: str, target_table: str) -> None:
+        quote = SchemaManager.quote_identifier
+        conn.exec_driver_sql(f"ALTER TABLE {quote(source_table)} RENAME TO {quote(target_table)}")
+
+    @staticmethod
+    def swap_table(conn, staging_table: str, table_name: str) -> None:
+        """
+        Replaces ``table_name`` with a fully loaded staging table. Run inside one
+        transaction, readers see either the old or the new table, never neither.
+        """
+        SchemaManager.drop_table(conn, table_name)
+        SchemaManager.rename_table(conn, staging_table, table_name)
+        SchemaManager.bump_table_version(conn, table_name)
+
+    @staticmethod
+    def analyze_table(conn, table_name: str) -> None:
+        """
+        Refreshes the planner statistics of a table, then lets SQLite re-analyze
+        anything else that went stale. The connection's analysis_limit bounds how
+        many rows each index scan reads.
+        """
+        conn.exec_driver_sql(f"ANALYZE {SchemaManager.quote_identifier(table_name)}")
+        conn.exec_driver_sql("PRAGMA optimize")
+
+    @staticmethod
+    def bump_table_version(conn, table_name: str) -> int:
+        """
+        Increments the version counter of ``table_name`` in the caller's transaction,
+        so caches keyed by the version are invalidated exactly when the change commits.
+        """
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {TABLE_VERSIONS_TABLE} "
+            "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        conn.exec_driver_sql(
+            f"INSERT INTO {TABLE_VERSIONS_TABLE} (table_name, version) VALUES (?, 1) "
+            "ON CONFLICT (table_name) DO UPDATE SET version = version + 1",
+            (table_name,)
+        )
+        return SchemaManager.get_table_version(conn, table_name)
+
+    @staticmethod
+    def delete_table_stats(conn, table_name: str) -> None:
+        """
+        Removes the column statistics stored for ``table_name`` (see ColumnStatsStore).
+        """
+        for stats_table in (TABLE_STATS_TABLE, COLUMN_STATS_TABLE):
+            if SchemaManager._object_type(conn, stats_table) == "table":
+                conn.exec_driver_sql(f"DELETE FROM {stats_table} WHERE table_name = ?", (table_name,))
+
+    @staticmethod
+    def get_table_version(conn, table_name: str) -> int:
+        """
+        Returns the number of committed changes made to ``table_name`` through the
+        ingest pipeline, or 0 for tables that were never changed through it.
+        """
+        if SchemaManager._object_type(conn, TABLE_VERSIONS_TABLE) != "table":
+            return 0
+        row = conn.exec_driver_sql(
+            f"SELECT version FROM {TABLE_VERSIONS_TABLE} WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        return row[0] if row else 0
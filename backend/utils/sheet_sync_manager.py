@@ -0,0 +1,126 @@
+import hashlib
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import requests
+from sqlalchemy import text
+
+from utils.db_manager import DBManager
+from utils.env_manager import EnvManager
+from utils.ingest_manager import IngestManager
+from utils.schema_manager import SchemaManager
+
+
+class SheetSyncManager:
+    """
+    Keeps tables loaded from remote CSV exports (Google Sheets) in sync using
+    conditional requests and row-level diffs instead of full table rewrites.
+    """
+
+    @staticmethod
+    def fetch(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Downloads a CSV export, sending the stored validators so unchanged sources
+        can answer 304 Not Modified without a body.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response = requests.get(url, headers=headers, timeout=EnvManager.get_sheets_request_timeout())
+        if response.status_code == 304:
+            return {"modified": False, "etag": etag, "last_modified": last_modified}
+
+        response.raise_for_status()
+        return {
+            "modified": True,
+            "content": response.content,
+            "content_hash": hashlib.sha256(response.content).hexdigest(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    @staticmethod
+    def _unique_keys(rows: List[tuple]) -> Optional[Dict[Any, tuple]]:
+        by_key = {row[0]: row for row in rows}
+        if len(by_key) != len(rows) or None in by_key:
+            return None
+        return by_key
+
+    @staticmethod
+    def apply_diff(table_name: str, incoming: pd.DataFrame, db_manager: Optional[DBManager] = None) -> Dict[str, Any]:
+        """
+        Applies the difference between the table and ``incoming`` in one transaction.
+
+        When the first column is a unique, non-null key in both versions, rows are
+        matched by key and changed rows are updated in place. Otherwise rows are
+        matched as a multiset of whole rows. A change of columns or column types
+        falls back to a full replacement.
+        """
+        db_manager = db_manager or DBManager()
+        incoming.columns = [str(column) for column in incoming.columns]
+        columns = incoming.columns.tolist()
+
+        schema = db_manager.get_table_schema(table_name)
+        compacted, column_types = SchemaManager.compact_frame(incoming)
+        if not schema or [(col["column_name"], col["data_type"]) for col in schema] != list(column_types.items()):
+            result = IngestManager.ingest_chunks([incoming], table_name, db_manager)
+            return {"replaced": True, "inserted": result["row_count"], "updated": 0, "deleted": 0}
+        incoming = compacted
+
+        quoted_table = IngestManager.quote_identifier(table_name)
+        quoted_columns = [IngestManager.quote_identifier(column) for column in columns]
+        with db_manager.engine.connect() as conn:
+            current = pd.read_sql(text(f"SELECT rowid AS __rowid__, {', '.join(quoted_columns)} FROM {quoted_table}"), conn)
+
+        # Both sides go through the table's column types, so a value SQLite returns
+        # as text or float compares equal to the same value parsed from the sheet
+        current_rows = IngestManager.to_records(SchemaManager.apply_column_types(current[columns], column_types))
+        incoming_rows = IngestManager.to_records(SchemaManager.apply_column_types(incoming, column_types))
+
+        current_by_key = SheetSyncManager._unique_keys(current_rows)
+        incoming_by_key = SheetSyncManager._unique_keys(incoming_rows)
+
+        if current_by_key is not None and incoming_by_key is not None:
+            delete_sql = f"DELETE FROM {quoted_table} WHERE {quoted_columns[0]} = ?"
+            deletes = [(key,) for key in current_by_key if key not in incoming_by_key]
+            inserts = [row for key, row in incoming_by_key.items() if key not in current_by_key]
+            updates = [
+                row[1:] + (key,) for key, row in incoming_by_key.items()
+                if key in current_by_key and current_by_key[key] != row
+            ]
+        else:
+            delete_sql = f"DELETE FROM {quoted_table} WHERE rowid = ?"
+            remaining = Counter(incoming_rows)
+            deletes = []
+            for rowid, row in zip(current["__rowid__"].tolist(), current_rows):
+                if remaining[row] > 0:
+                    remaining[row] -= 1
+                else:
+                    deletes.append((rowid,))
+            inserts = [row for row, count in remaining.items() for _ in range(count)]
+            updates = []
+
+        with db_manager.write_engine.begin() as conn:
+            if deletes:
+                conn.exec_driver_sql(delete_sql, deletes)
+            if updates and len(columns) > 1:
+                assignments = ", ".join(f"{column} = ?" for column in quoted_columns[1:])
+                conn.exec_driver_sql(
+                    f"UPDATE {quoted_table} SET {assignments} WHERE {quoted_columns[0]} = ?", updates
+                )
+            if inserts:
+                placeholders = ", ".join("?" for _ in columns)
+                conn.exec_driver_sql(
+                    f"INSERT INTO {quoted_table} ({', '.join(quoted_columns)}) VALUES ({placeholders})", inserts
+                )
+            if deletes or updates or inserts:
+                SchemaManager.bump_table_version(conn, table_name)
+
+        if deletes or updates or inserts:
+            IngestManager.after_write(table_name, db_manager)
+
+        return {"replaced": False, "inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
@@ -0,0 +1,440 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+import pandas as pd
+
+DEFAULT_KLL_K = 200
+# Compactor capacities shrink geometrically from the top level down, but never below this
+KLL_MIN_CAPACITY = 8
+KLL_CAPACITY_DECAY = 2 / 3
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_HISTOGRAM_BINS = 64
+DEFAULT_FREQUENT_ITEMS_CAPACITY = 64
+# Doubles represent integers exactly up to 2 ** 53, which bounds how fine a bin may be
+FLOAT_MANTISSA_BITS = 52
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang and Liberty, 2016). Values are kept
+    in a stack of compactors; an item in level ``h`` stands for ``2 ** h`` input
+    values. When a level overflows it is sorted and every other item, starting
+    at a random offset, is promoted to the next level.
+
+    With ``k`` = 200 the rank error is about 1.7% with high probability while at
+    most about 3 * k values are retained, whatever the number of inputs. Until
+    the first compaction every value is kept and quantiles are exact. Updates and
+    merges work on whole NumPy arrays, so chunks are absorbed in vectorized passes.
+    """
+
+    def __init__(self, k: int = DEFAULT_KLL_K, levels: Optional[List[np.ndarray]] = None, n: int = 0):
+        self.k = k
+        self.levels = levels or [np.empty(0, dtype=np.float64)]
+        self.n = n
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    @property
+    def num_retained(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(KLL_MIN_CAPACITY, math.ceil(self.k * KLL_CAPACITY_DECAY ** depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind so the promoted weight is exact
+            kept = items[:1] if len(items) % 2 else items[:0]
+            items = items[len(kept):]
+            # Seeded by the stream length, so equal inputs always give equal sketches
+            offset = np.random.default_rng(self.n + level).integers(2)
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+            level = 0
+
+    def update(self, values) -> "KLLSketch":
+        """
+        Adds an array of values; NaNs are ignored.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Absorbs ``other`` into this sketch, as if its values had been added here.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, fractions: Sequence[float]) -> List[Optional[float]]:
+        """
+        Returns the values at the given fractions of the ranks. Exact sketches
+        interpolate linearly between closest ranks, like pandas and NumPy.
+        """
+        if not self.n:
+            return [None for _ in fractions]
+        if self.is_exact:
+            return [float(value) for value in np.quantile(self.levels[0], fractions)]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** index, dtype=np.float64) for index, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(fractions) * cumulative[-1], side="left")
+        return [float(items[min(position, len(items) - 1)]) for position in positions]
+
+    def rank(self, value: float) -> float:
+        """
+        Returns the estimated fraction of values less than or equal to ``value``.
+        """
+        if not self.n:
+            return 0.0
+        total = 0.0
+        for index, level in enumerate(self.levels):
+            total += np.count_nonzero(level <= value) * 2 ** index
+        return total / sum(len(level) * 2 ** index for index, level in enumerate(self.levels))
+
+    def to_bytes(self) -> bytes:
+        header = np.array([self.k, self.n, len(self.levels)] + [len(level) for level in self.levels], dtype=np.int64)
+        return header.tobytes() + np.concatenate(self.levels).astype(np.float64).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KLLSketch":
+        k, n, num_levels = np.frombuffer(data, dtype=np.int64, count=3)
+        sizes = np.frombuffer(data, dtype=np.int64, count=int(num_levels), offset=3 * 8)
+        items = np.frombuffer(data, dtype=np.float64, offset=(3 + int(num_levels)) * 8)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        levels = [items[bounds[index]:bounds[index + 1]].copy() for index in range(int(num_levels))]
+        return cls(int(k), levels, int(n))
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch (Flajolet et al., 2007). Every value is hashed to 64
+    bits; the first ``precision`` bits pick one of ``2 ** precision`` registers,
+    which keeps the longest run of leading zeros seen in the remaining bits.
+    Counts are read with Ertl's estimator, accurate over the whole range.
+
+    With the default precision of 14 the sketch takes 16 KB and the standard
+    error is 1.04 / sqrt(2 ** 14), about 0.8%, whatever the number of values.
+    Merging is a register-wise maximum.
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    @staticmethod
+    def _bit_length(values: np.ndarray) -> np.ndarray:
+        # Read from the float exponent. Doubles hold 53 bits exactly, so the top
+        # 53 bits of a 64-bit value are converted apart from the rest
+        shift = 64 - (FLOAT_MANTISSA_BITS + 1)
+        high = values >> np.uint64(shift)
+        return np.where(
+            high > 0,
+            np.frexp(high.astype(np.float64))[1] + shift,
+            np.frexp(values.astype(np.float64))[1]
+        )
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """
+        Adds values given as 64-bit hashes.
+        """
+        suffix_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffixes = hashes & np.uint64((1 << suffix_bits) - 1)
+        ranks = (suffix_bits + 1 - self._bit_length(suffixes)).astype(np.uint8)
+        np.maximum.at(self.registers, indexes, ranks)
+        return self
+
+    def update(self, values) -> "HyperLogLog":
+        """
+        Adds an array of non-null values. Numbers must be passed as float64 and
+        everything else as strings, so that the same value always hashes alike.
+        """
+        values = np.asarray(values)
+        if len(values):
+            self.update_hashes(pd.util.hash_array(values))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @staticmethod
+    def _sigma(x: float) -> float:
+        if x == 1.0:
+            return math.inf
+        y, z = 1.0, x
+        while True:
+            x *= x
+            previous, z = z, z + x * y
+            y += y
+            if z == previous:
+                return z
+
+    @staticmethod
+    def _tau(x: float) -> float:
+        if x in (0.0, 1.0):
+            return 0.0
+        y, z = 1.0, 1.0 - x
+        while True:
+            x = math.sqrt(x)
+            y *= 0.5
+            previous, z = z, z - (1 - x) ** 2 * y
+            if z == previous:
+                return z / 3
+
+    def estimate(self) -> int:
+        """
+        Ertl's improved estimator (2017), which stays unbiased from empty to
+        saturated sketches without the empirical bias tables of HyperLogLog++.
+        """
+        size = len(self.registers)
+        suffix_bits = 64 - self.precision
+        counts = np.bincount(self.registers, minlength=suffix_bits + 2)
+        z = size * self._tau(1 - counts[suffix_bits + 1] / size)
+        for rank in range(suffix_bits, 0, -1):
+            z = 0.5 * (z + counts[rank])
+        z += size * self._sigma(counts[0] / size)
+        return round(size * size / (2 * math.log(2) * z))
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(data[0], np.frombuffer(data, dtype=np.uint8, offset=1).copy())
+
+
+class FixedBinHistogram:
+    """
+    Mergeable histogram with a fixed number of equal-width bins. Bin widths are
+    powers of two and bin edges multiples of the width, so histograms built over
+    different chunks line up: merging re-bins the finer one to the coarser width
+    and doubles the width until the union of their ranges fits.
+
+    Counts are exact; only the resolution is bounded, every bin being narrower
+    than twice the range of the values divided by the number of bins. Memory is
+    one counter per bin.
+    """
+
+    def __init__(
+        self,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        exponent: int = 0,
+        offset: int = 0,
+        counts: Optional[np.ndarray] = None
+    ):
+        self.bins = bins
+        self.exponent = exponent
+        self.offset = offset
+        self.counts = counts if counts is not None else np.zeros(bins, dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def width(self) -> float:
+        return math.ldexp(1.0, self.exponent)
+
+    def _span(self) -> int:
+        occupied = np.flatnonzero(self.counts)
+        return int(occupied[-1] - occupied[0] + 1) if len(occupied) else 0
+
+    def _coarsen(self, exponent: int) -> None:
+        """
+        Re-bins to ``2 ** exponent`` wide bins, aligning the first occupied bin to
+        the start of the array.
+        """
+        occupied = np.flatnonzero(self.counts)
+        if not len(occupied):
+            self.exponent = max(self.exponent, exponent)
+            return
+        indexes = (self.offset + occupied) >> (exponent - self.exponent)
+        self.offset = int(indexes[0])
+        self.counts = np.bincount(indexes - self.offset, weights=self.counts[occupied], minlength=self.bins)
+        self.counts = self.counts[:self.bins].astype(np.int64)
+        self.exponent = exponent
+
+    def update(self, values) -> "FixedBinHistogram":
+        """
+        Adds an array of values; NaNs and infinities are ignored.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        low, high = float(values.min()), float(values.max())
+        magnitude = max(abs(low), abs(high))
+        exponent = math.frexp(magnitude)[1] - FLOAT_MANTISSA_BITS if magnitude else -FLOAT_MANTISSA_BITS
+        if high > low:
+            exponent = max(exponent, math.ceil(math.log2((high - low) / self.bins)))
+        while math.floor(math.ldexp(high, -exponent)) - math.floor(math.ldexp(low, -exponent)) >= self.bins:
+            exponent += 1
+
+        indexes = np.floor(np.ldexp(values, -exponent)).astype(np.int64)
+        offset = int(indexes.min())
+        batch = FixedBinHistogram(self.bins, exponent, offset, np.bincount(indexes - offset, minlength=self.bins))
+        return self.merge(batch)
+
+    def merge(self, other: "FixedBinHistogram") -> "FixedBinHistogram":
+        if not other.total:
+            return self
+        if not self.total:
+            self.exponent, self.offset, self.counts = other.exponent, other.offset, other.counts.copy()
+            return self
+        other = FixedBinHistogram(other.bins, other.exponent, other.offset, other.counts.copy())
+        exponent = max(self.exponent, other.exponent)
+        while True:
+            self._coarsen(exponent)
+            other._coarsen(exponent)
+            start = min(self.offset, other.offset)
+            end = max(self.offset + self._span(), other.offset + other._span())
+            if end - start <= self.bins:
+                break
+            exponent += 1
+        counts = np.zeros(self.bins, dtype=np.int64)
+        for histogram in (self, other):
+            span = histogram._span()
+            counts[histogram.offset - start:histogram.offset - start + span] += histogram.counts[:span]
+        self.offset, self.counts = start, counts
+        return self
+
+    def to_bins(self, max_bins: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the occupied range of bins as ``start``/``end``/``count`` dicts,
+        coarsened until there are at most ``max_bins`` of them.
+        """
+        histogram = FixedBinHistogram(self.bins, self.exponent, self.offset, self.counts.copy())
+        while max_bins and histogram._span() > max_bins:
+            histogram._coarsen(histogram.exponent + 1)
+        width = histogram.width
+        occupied = np.flatnonzero(histogram.counts)
+        if not len(occupied):
+            return []
+        return [
+            {
+                "start": (histogram.offset + index) * width,
+                "end": (histogram.offset + index + 1) * width,
+                "count": int(histogram.counts[index]),
+            }
+            for index in range(occupied[0], occupied[-1] + 1)
+        ]
+
+    def to_bytes(self) -> bytes:
+        header = np.array([self.bins, self.exponent, self.offset], dtype=np.int64)
+        return header.tobytes() + self.counts.astype(np.int64).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FixedBinHistogram":
+        bins, exponent, offset = (int(value) for value in np.frombuffer(data, dtype=np.int64, count=3))
+        return cls(bins, exponent, offset, np.frombuffer(data, dtype=np.int64, offset=3 * 8).copy())
+
+
+class FrequentItems:
+    """
+    Mergeable Misra-Gries summary of the most frequent values (Agarwal et al.,
+    2012). At most ``capacity`` counters are kept; whenever there are more, the
+    (capacity + 1)-th largest count is subtracted from all of them and those
+    that drop to zero are evicted.
+
+    Counts are underestimates by at most ``max_error``, the sum of everything
+    subtracted so far, which never exceeds n / (capacity + 1); any value more
+    frequent than that is guaranteed to be kept. While a column has no more
+    distinct values than counters, nothing is subtracted and counts are exact.
+    A chunk is first counted exactly with pandas, so only its survivors are
+    handled in Python.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_FREQUENT_ITEMS_CAPACITY,
+        counters: Optional[Dict[Any, int]] = None,
+        n: int = 0,
+        max_error: int = 0
+    ):
+        self.capacity = capacity
+        self.counters = counters or {}
+        self.n = n
+        self.max_error = max_error
+
+    def _trim(self, values: Sequence, counts: np.ndarray) -> None:
+        if len(counts) <= self.capacity:
+            self.counters = {value: int(count) for value, count in zip(values, counts)}
+            return
+        threshold = int(np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1])
+        kept = np.flatnonzero(counts > threshold)
+        self.counters = {values[index]: int(counts[index] - threshold) for index in kept}
+        self.max_error += threshold
+
+    def update(self, values) -> "FrequentItems":
+        """
+        Adds an array of non-null values, numbers as float64 and everything else
+        as strings.
+        """
+        values = np.asarray(values)
+        if len(values):
+            counts = pd.Series(values).value_counts(sort=False)
+            batch = FrequentItems(self.capacity, n=len(values))
+            batch._trim(counts.index.tolist(), counts.to_numpy())
+            self.merge(batch)
+        return self
+
+    def merge(self, other: "FrequentItems") -> "FrequentItems":
+        counters = dict(self.counters)
+        for value, count in other.counters.items():
+            counters[value] = counters.get(value, 0) + count
+        values = list(counters)
+        self.n += other.n
+        self.max_error += other.max_error
+        self._trim(values, np.array([counters[value] for value in values], dtype=np.int64))
+        return self
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Returns the ``k`` values with the largest counts, most frequent first.
+        """
+        ordered = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{"value": value, "count": count} for value, count in ordered]
+
+    def to_bytes(self) -> bytes:
+        return orjson.dumps({
+            "capacity": self.capacity,
+            "n": self.n,
+            "max_error": self.max_error,
+            "counters": list(self.counters.items()),
+        })
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FrequentItems":
+        payload = orjson.loads(data)
+        counters = {value: count for value, count in payload["counters"]}
+        return cls(payload["capacity"], counters, payload["n"], payload["max_error"])
@@ -0,0 +1,99 @@
+import sqlite3
+import sys
+import time
+from typing import Any, Dict
+
+from utils.engine_registry import EngineRegistry
+from utils.env_manager import EnvManager
+from utils.result_encoder import ColumnarResult
+
+# SQLite virtual machine instructions between two checks of the deadline
+PROGRESS_HANDLER_INSTRUCTIONS = 10_000
+# Pragmas that only read the schema; any other pragma could change settings that
+# outlive the query on the pooled connection (cache_size, query_only, ...)
+READ_ONLY_PRAGMAS = frozenset({
+    "table_info", "table_xinfo", "table_list", "index_list", "index_info", "index_xinfo",
+    "foreign_key_list", "database_list", "collation_list", "function_list", "pragma_list",
+})
+
+
+class SQLSandbox:
+    """
+    Runs SQL written by the agent under per-deployment limits:
+
+    * the connection opens the database read-only, may not ATTACH other files
+      and may only run the pragmas that read the schema (READ_ONLY_PRAGMAS)
+    * at most AGENT_SQL_MAX_ROWS rows are kept; the remaining rows are still
+      counted, so the caller learns the true size of the result
+    * the rows kept may take at most AGENT_SQL_MAX_MB of memory, which also bounds
+      the length of any single string or blob SQLite builds
+    * a progress handler aborts the statement once it runs longer than
+      AGENT_SQL_TIMEOUT_MS, including the time spent counting
+    """
+
+    @staticmethod
+    def _authorize(action, arg1, arg2, db_name, trigger) -> int:
+        if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+            return sqlite3.SQLITE_DENY
+        if action == sqlite3.SQLITE_PRAGMA and (arg1 or "").lower() not in READ_ONLY_PRAGMAS:
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+
+    @staticmethod
+    def execute(db_path: str, query: str) -> Dict[str, Any]:
+        """
+        Runs ``query`` on the database at ``db_path`` and returns the kept rows as
+        ``result`` (a ColumnarResult), the number of rows the query produced as
+        ``total_rows`` and why rows were left out as ``truncated`` ("rows",
+        "memory" or None). Raises TimeoutError when the time limit is reached
+        before the rows to keep were read; a timeout while counting the rest
+        reports ``total_rows`` as None.
+        """
+        max_rows = EnvManager.get_agent_sql_max_rows()
+        max_bytes = EnvManager.get_agent_sql_max_mb() * 1024 * 1024
+        timeout_ms = EnvManager.get_agent_sql_timeout_ms()
+        batch_size = EnvManager.get_export_batch_size()
+        deadline = time.monotonic() + timeout_ms / 1000
+
+        connection = EngineRegistry().get_read_only_engine(db_path).raw_connection()
+        dbapi_connection = connection.driver_connection
+        length_limit = dbapi_connection.getlimit(sqlite3.SQLITE_LIMIT_LENGTH)
+        dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, min(length_limit, max_bytes))
+        dbapi_connection.set_authorizer(SQLSandbox._authorize)
+        dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_INSTRUCTIONS)
+        cursor = dbapi_connection.cursor()
+        columns, rows, total, size, truncated = [], [], 0, 0, None
+        try:
+            cursor.execute(query)
+            columns = [description[0] for description in cursor.description or []]
+            while columns:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                total += len(batch)
+                if truncated:
+                    continue
+                for row in batch:
+                    if len(rows) >= max_rows:
+                        truncated = "rows"
+                        break
+                    size += sum(map(sys.getsizeof, row))
+                    if size > max_bytes:
+                        truncated = "memory"
+                        break
+                    rows.append(row)
+        except sqlite3.OperationalError as e:
+            if time.monotonic() <= deadline or str(e) != "interrupted":
+                raise
+            if not truncated:
+                raise TimeoutError(f"Query exceeded the time limit of {timeout_ms} ms") from None
+            total = None
+        finally:
+            cursor.close()
+            dbapi_connection.set_progress_handler(None, 0)
+            dbapi_connection.set_authorizer(None)
+            dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, length_limit)
+            connection.close()
+
+        values = [list(column) for column in zip(*rows)] if rows else [[] for _ in columns]
+        return {"result": ColumnarResult(columns, values), "total_rows": total, "truncated": truncated}
@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.env_manager import EnvManager
+from utils.result_encoder import ColumnarResult
+from utils.schema_manager import SchemaManager
+
+ROWID_COLUMN = "__rowid__"
+FILTER_OPERATORS = {
+    "eq": "=",
+    "ne": "!=",
+    "lt": "<",
+    "le": "<=",
+    "gt": ">",
+    "ge": ">=",
+    "contains": "LIKE",
+    "null": "IS NULL",
+    "notnull": "IS NOT NULL",
+}
+VALUELESS_OPERATORS = ("null", "notnull")
+
+
+class TableDataManager:
+    """
+    Reads analytics tables in rowid order. Pages resume after the last rowid a
+    client saw (keyset pagination), so every page is an index seek whatever its
+    position, and exports stream rows from a server-side cursor in fixed-size
+    batches so memory stays constant for tables of any size.
+    """
+
+    @staticmethod
+    def parse_columns(columns: Optional[str], available: Sequence[str]) -> List[str]:
+        """
+        Parses a comma-separated projection. An empty projection selects every column.
+        """
+        if not columns:
+            return list(available)
+        selected = [column.strip() for column in columns.split(",") if column.strip()]
+        unknown = [column for column in selected if column not in available]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        return selected
+
+    @staticmethod
+    def parse_filters(filters: Optional[List[str]], available: Sequence[str]) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Parses filters written as ``column:operator:value`` (``column:null`` and
+        ``column:notnull`` take no value). Filters are combined with AND.
+        """
+        parsed = []
+        for expression in filters or []:
+            parts = expression.split(":", 2)
+            if len(parts) < 2 or parts[1] not in FILTER_OPERATORS:
+                raise ValueError(
+                    f"Invalid filter '{expression}', expected column:operator:value with operator in "
+                    f"{', '.join(FILTER_OPERATORS)}"
+                )
+            column, operator = parts[0], parts[1]
+            value = parts[2] if len(parts) == 3 else None
+            if column not in available:
+                raise ValueError(f"Unknown filter column: {column}")
+            if (value is None) != (operator in VALUELESS_OPERATORS):
+                raise ValueError(f"Invalid filter '{expression}'")
+            parsed.append((column, operator, value))
+        return parsed
+
+    @staticmethod
+    def build_query(
+        conn,
+        table_name: str,
+        columns: List[str],
+        filters: List[Tuple[str, str, Optional[str]]],
+        after: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[str, list]:
+        """
+        Builds a SELECT of ``columns`` in rowid order, with the rowid as first column.
+        SQLite flattens the subquery into the outer query, so the rowid bound and
+        the ORDER BY are answered from the table's b-tree.
+        """
+        quote = SchemaManager.quote_identifier
+        source_sql = f"SELECT rowid AS {ROWID_COLUMN}, * FROM {quote(table_name)}"
+
+        conditions, params = [], []
+        if after is not None:
+            conditions.append(f"{ROWID_COLUMN} > ?")
+            params.append(after)
+        for column, operator, value in filters:
+            if operator in VALUELESS_OPERATORS:
+                conditions.append(f"{quote(column)} {FILTER_OPERATORS[operator]}")
+            elif operator == "contains":
+                escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                conditions.append(f"{quote(column)} LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+            else:
+                conditions.append(f"{quote(column)} {FILTER_OPERATORS[operator]} ?")
+                params.append(value)
+
+        query = f"SELECT {ROWID_COLUMN}, {', '.join(quote(column) for column in columns)} FROM ({source_sql}) AS source"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {ROWID_COLUMN}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _prepare(db_manager, table_name: str, columns: Optional[str], filters: Optional[List[str]]):
+        schema = db_manager.get_table_schema(table_name)
+        if not schema:
+            raise LookupError(f"Table '{table_name}' does not exist")
+        available = [col["column_name"] for col in schema]
+        return (
+            TableDataManager.parse_columns(columns, available),
+            TableDataManager.parse_filters(filters, available),
+        )
+
+    @staticmethod
+    def get_page(
+        db_manager,
+        table_name: str,
+        after: Optional[int] = None,
+        limit: int = 1000,
+        columns: Optional[str] = None,
+        filters: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns up to ``limit`` rows with a rowid greater than ``after`` as a
+        ColumnarResult, and the cursor of the next page, which is None on the last page.
+        """
+        selected, parsed_filters = TableDataManager._prepare(db_manager, table_name, columns, filters)
+        with db_manager.engine.connect() as conn:
+            query, params = TableDataManager.build_query(conn, table_name, selected, parsed_filters, after, limit + 1)
+            rows = conn.exec_driver_sql(query, tuple(params)).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "result": ColumnarResult.from_rows([ROWID_COLUMN] + selected, rows, skip=1),
+            "next_after": rows[-1][0] if has_more else None,
+        }
+
+    @staticmethod
+    def stream_rows(
+        db_manager,
+        table_name: str,
+        columns: Optional[str] = None,
+        filters: Optional[List[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """
+        Validates the request and returns the selected columns together with a lazy
+        iterator of row batches. The query only runs, and the connection is only
+        held, while the iterator is being consumed.
+        """
+        selected, parsed_filters = TableDataManager._prepare(db_manager, table_name, columns, filters)
+        batch_size = batch_size or EnvManager.get_export_batch_size()
+
+        def batches() -> Iterator[List[tuple]]:
+            with db_manager.engine.connect() as conn:
+                query, params = TableDataManager.build_query(conn, table_name, selected, parsed_filters)
+                result = conn.execution_options(stream_results=True).exec_driver_sql(query, tuple(params))
+                while True:
+                    rows = result.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [tuple(row[1:]) for row in rows]
+
+        return selected, batches()
+
+    @staticmethod
+    def to_ndjson(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        for batch in batches:
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n" for row in batch
+            ).encode("utf-8")
+
+    @staticmethod
+    def to_csv(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
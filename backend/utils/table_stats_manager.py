@@ -0,0 +1,383 @@
+import copy
+import math
+import random
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.column_stats import QUANTILES, ColumnStats, ColumnStatsStore
+from utils.env_manager import EnvManager
+from utils.sampling_manager import SamplingManager
+from utils.schema_manager import SchemaManager
+
+STAT_KEYS = ("count", "mean", "std", "min", "25%", "50%", "75%", "max")
+
+
+class TableStatsManager:
+    """
+    Serves the dashboard's descriptive statistics (count, mean, std, min,
+    quartiles, max) of the numeric columns of an analytics table, its histograms,
+    distinct counts and summaries, without loading any table into pandas.
+
+    They come from the ColumnStatsStore, which ingest keeps current: count, mean,
+    std, min and max are exact, and quartiles are exact until a column's quantile
+    sketch first compacts and estimates within its rank error afterwards.
+
+    Requests never rebuild the store. While a table's stored statistics are stale
+    (cold, or written outside ingest), descriptive statistics are computed inside
+    SQLite: tables up to STATS_EXACT_MAX_ROWS rows get exact values from one
+    aggregate scan and one window query per column, larger ones are summarized
+    from a uniform rowid sample of STATS_SAMPLE_SIZE rows, with min/max exact only
+    for columns that lead an index. Histograms, distinct counts and top values use
+    ColumnStatsStore.estimate under the same bounds. Results are cached until the
+    table's fingerprint (see DBManager.get_table_fingerprint) changes, so rows
+    written without moving the version counter are noticed too.
+    """
+    _cache: Dict[Tuple[str, str, str], Tuple[str, Any]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, float]:
+        return {key: 0 for key in STAT_KEYS}
+
+    @staticmethod
+    def _clean(value) -> float:
+        # Keeps the payload JSON-safe, as the file-based analysis did with fillna(0)
+        if value is None or (isinstance(value, float) and not math.isfinite(value)):
+            return 0
+        return value
+
+    @staticmethod
+    def _interpolate(values_at, count: int) -> Dict[str, float]:
+        """
+        Linear interpolation between closest ranks, as pandas and numpy do by default.
+        ``values_at`` maps a zero-based rank to its value.
+        """
+        quantiles = {}
+        for key, fraction in QUANTILES.items():
+            position = (count - 1) * fraction
+            low, high = math.floor(position), math.ceil(position)
+            quantiles[key] = values_at[low] + (values_at[high] - values_at[low]) * (position - low)
+        return quantiles
+
+    @staticmethod
+    def _quantile_ranks(count: int) -> List[int]:
+        ranks = set()
+        for fraction in QUANTILES.values():
+            position = (count - 1) * fraction
+            ranks.update((math.floor(position), math.ceil(position)))
+        return sorted(ranks)
+
+    @staticmethod
+    def _exact_stats(conn, table_name: str, columns: List[str]) -> Dict[str, Dict[str, float]]:
+        quote = SchemaManager.quote_identifier
+        quoted_table = quote(table_name)
+        # Text stored through type affinity is not a number and counts as null in
+        # every aggregate, as it does in the quantiles and in ColumnStatsStore
+        numbers = {
+            column: f"CASE WHEN typeof({quote(column)}) IN ('integer', 'real') THEN {quote(column)} END"
+            for column in columns
+        }
+        # Sums are taken around a value of each column, which keeps the variance
+        # accurate for columns whose mean is far from zero (ids, timestamps)
+        shift_sql = ", ".join(
+            f"(SELECT {numbers[column]} FROM {quoted_table} WHERE {numbers[column]} IS NOT NULL LIMIT 1)"
+            for column in columns
+        )
+        shifts = conn.exec_driver_sql(f"SELECT {shift_sql}").fetchone()
+        shifts = [float(shift) if isinstance(shift, (int, float)) else 0.0 for shift in shifts]
+
+        aggregates = []
+        for column in columns:
+            number = numbers[column]
+            aggregates += [
+                f"COUNT({number})", f"MIN({number})", f"MAX({number})",
+                f"TOTAL({number} - ?)", f"TOTAL(({number} - ?) * ({number} - ?))",
+            ]
+        params = tuple(param for shift in shifts for param in (shift, shift, shift))
+        totals = conn.exec_driver_sql(f"SELECT {', '.join(aggregates)} FROM {quoted_table}", params).fetchone()
+
+        statistics = {}
+        for index, column in enumerate(columns):
+            count, minimum, maximum, shifted_sum, shifted_squares = totals[5 * index:5 * index + 5]
+            stats = TableStatsManager._empty_stats()
+            if count:
+                mean_offset = shifted_sum / count
+                variance = (shifted_squares - shifted_sum * mean_offset) / (count - 1) if count > 1 else None
+                stats.update({
+                    "count": count,
+                    "mean": shifts[index] + mean_offset,
+                    "std": math.sqrt(max(variance, 0.0)) if variance is not None else None,
+                    "min": minimum,
+                    "max": maximum,
+                })
+                ranks = TableStatsManager._quantile_ranks(count)
+                quoted = quote(column)
+                rows = conn.exec_driver_sql(
+                    f"SELECT rank, {quoted} FROM ("
+                    f"SELECT {quoted}, ROW_NUMBER() OVER (ORDER BY {quoted}) - 1 AS rank FROM {quoted_table} "
+                    f"WHERE typeof({quoted}) IN ('integer', 'real')"
+                    f") WHERE rank IN ({', '.join('?' for _ in ranks)})",
+                    tuple(ranks)
+                ).fetchall()
+                values_at = dict(rows)
+                if all(rank in values_at for rank in ranks):
+                    stats.update(TableStatsManager._interpolate(values_at, count))
+            statistics[column] = {key: TableStatsManager._clean(value) for key, value in stats.items()}
+        return statistics
+
+    @staticmethod
+    def _indexed_extremes(conn, table_name: str, columns: List[str], indexes: List[Dict[str, Any]]) -> Dict[str, tuple]:
+        """
+        Reads MIN and MAX of the numeric values of the columns that lead an index,
+        which SQLite answers with one b-tree seek each: numbers sort before any
+        text, so "< ''" leaves out text stored through type affinity.
+        """
+        quote = SchemaManager.quote_identifier
+        leading = {index["columns"][0] for index in indexes if index["columns"]}
+        extremes = {}
+        for column in columns:
+            if column in leading:
+                extremes[column] = conn.exec_driver_sql(
+                    f"SELECT (SELECT MIN({quote(column)}) FROM {quote(table_name)} WHERE {quote(column)} < ''), "
+                    f"(SELECT MAX({quote(column)}) FROM {quote(table_name)} WHERE {quote(column)} < '')"
+                ).fetchone()
+        return extremes
+
+    @staticmethod
+    def _sampled_stats(
+        conn,
+        table_name: str,
+        columns: List[str],
+        row_count: int,
+        indexes: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, float]]:
+        # A fixed seed keeps the estimates stable between requests for one table version
+        rowids = SamplingManager.sample_rowids(
+            conn, table_name, EnvManager.get_stats_sample_size(), random.Random(0)
+        )
+        sample_columns, rows = SamplingManager.fetch_rows(conn, table_name, rowids)
+        extremes = TableStatsManager._indexed_extremes(conn, table_name, columns, indexes)
+
+        statistics = {}
+        for column in columns:
+            position = sample_columns.index(column)
+            values = np.array(
+                [row[position] for row in rows if isinstance(row[position], (int, float))], dtype=float
+            )
+            stats = TableStatsManager._empty_stats()
+            if len(values):
+                stats.update({
+                    "count": round(row_count * len(values) / len(rows)),
+                    "mean": float(values.mean()),
+                    "std": float(values.std(ddof=1)) if len(values) > 1 else None,
+                    "min": float(values.min()),
+                    "max": float(values.max()),
+                })
+                stats.update(TableStatsManager._interpolate(np.sort(values), len(values)))
+            if column in extremes:
+                stats["min"], stats["max"] = extremes[column]
+            statistics[column] = {key: TableStatsManager._clean(value) for key, value in stats.items()}
+        return statistics
+
+    @staticmethod
+    def _aggregate(db_manager, table_name: str, metadata: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+        """
+        Computes the descriptive statistics of ``columns`` inside SQLite (see the class docstring).
+        """
+        row_count = metadata["row_count"]
+        approximate = row_count > EnvManager.get_stats_exact_max_rows()
+        if not columns or not row_count:
+            statistics = {column: TableStatsManager._empty_stats() for column in columns}
+        else:
+            with db_manager.engine.connect() as conn:
+                if approximate:
+                    statistics = TableStatsManager._sampled_stats(
+                        conn, table_name, columns, row_count, metadata["indexes"]
+                    )
+                else:
+                    statistics = TableStatsManager._exact_stats(conn, table_name, columns)
+        return {"approximate": approximate, "descriptive_statistics": statistics}
+
+    @staticmethod
+    def _cached(db_manager, table_name: str, kind: str, compute: Callable[[], Any]) -> Any:
+        """
+        Returns ``compute()``, reusing the result computed for the same table fingerprint.
+        """
+        key = (db_manager.engine.url.database, table_name, kind)
+        fingerprint = db_manager.get_table_fingerprint(table_name)
+        with TableStatsManager._lock:
+            cached = TableStatsManager._cache.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        result = compute()
+        with TableStatsManager._lock:
+            TableStatsManager._cache[key] = (fingerprint, result)
+        return result
+
+    @staticmethod
+    def _column_stats(db_manager, table_name: str, metadata: Dict[str, Any]) -> Tuple[Dict[str, ColumnStats], bool]:
+        """
+        Returns the ColumnStats of ``table_name`` and whether they were estimated
+        from a sample: the stored ones when current, an estimate otherwise.
+        """
+        stats = ColumnStatsStore.stored(db_manager, table_name)
+        if stats is not None:
+            return stats, False
+        return TableStatsManager._estimated(db_manager, table_name, metadata)
+
+    @staticmethod
+    def _estimated(db_manager, table_name: str, metadata: Dict[str, Any]) -> Tuple[Dict[str, ColumnStats], bool]:
+        def estimate():
+            with db_manager.engine.connect() as conn:
+                return ColumnStatsStore.estimate(conn, table_name, metadata["row_count"])
+
+        return TableStatsManager._cached(db_manager, table_name, "estimate", estimate)
+
+    @staticmethod
+    def _descriptive_statistics(
+        db_manager,
+        table_name: str,
+        metadata: Dict[str, Any],
+        columns: List[str],
+        stats: Optional[Dict[str, ColumnStats]]
+    ) -> Dict[str, Any]:
+        """
+        Describes ``columns`` from current stored statistics ``stats``, or from
+        SQL aggregates when there are none.
+        """
+        if stats is None:
+            return copy.deepcopy(TableStatsManager._cached(
+                db_manager, table_name, "aggregate",
+                lambda: TableStatsManager._aggregate(db_manager, table_name, metadata, columns)
+            ))
+        column_stats = {column: stats.get(column) or ColumnStats() for column in columns}
+        return {
+            "approximate": any(not column.sketch.is_exact for column in column_stats.values()),
+            "descriptive_statistics": {column: value.describe() for column, value in column_stats.items()},
+        }
+
+    @staticmethod
+    def describe(db_manager, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the descriptive statistics of the numeric columns of ``table_name``,
+        or None when the table does not exist.
+        """
+        metadata = db_manager.get_table_metadata(table_name)
+        if metadata is None:
+            return None
+
+        columns = [
+            column["column_name"] for column in metadata["columns"]
+            if ColumnStatsStore.is_numeric_type(column["data_type"])
+        ]
+        described = TableStatsManager._descriptive_statistics(
+            db_manager, table_name, metadata, columns, ColumnStatsStore.stored(db_manager, table_name)
+        )
+        return {"table_name": table_name, "row_count": metadata["row_count"], **described}
+
+    @staticmethod
+    def histogram(db_manager, table_name: str, column: str, max_bins: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the histogram of a numeric column with at most ``max_bins`` bins,
+        or None when the table or the column does not exist. The outer bins are
+        clipped to the column's exact min and max.
+        """
+        metadata = db_manager.get_table_metadata(table_name)
+        if metadata is None:
+            return None
+        table_stats, sampled = TableStatsManager._column_stats(db_manager, table_name, metadata)
+        stats = table_stats.get(column)
+        if stats is None:
+            return None
+        if not stats.numeric:
+            raise ValueError(f"Column '{column}' is not numeric")
+
+        bins: List[Dict[str, Any]] = stats.histogram.to_bins(max_bins)
+        if bins:
+            bins[0]["start"], bins[-1]["end"] = stats.minimum, stats.maximum
+        return {
+            "table_name": table_name,
+            "column": column,
+            "approximate": sampled,
+            "count": stats.count,
+            "null_count": stats.null_count,
+            "bins": bins,
+        }
+
+    @staticmethod
+    def distinct_counts(db_manager, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the estimated number of distinct non-null values of every column,
+        or None when the table does not exist.
+        """
+        metadata = db_manager.get_table_metadata(table_name)
+        if metadata is None:
+            return None
+        stats, _ = TableStatsManager._column_stats(db_manager, table_name, metadata)
+        columns = [column["column_name"] for column in metadata["columns"]]
+        column_stats = {column: stats.get(column) or ColumnStats(numeric=False) for column in columns}
+        return {
+            "table_name": table_name,
+            "relative_error": next(iter(column_stats.values())).distinct.relative_error if column_stats else None,
+            "distinct_counts": {
+                # An estimate can never exceed the number of values it was taken from
+                column: min(value.distinct.estimate(), value.count) for column, value in column_stats.items()
+            },
+        }
+
+    @staticmethod
+    def _top_values(stats: ColumnStats, sql_type: str, top_k: int) -> List[Dict[str, Any]]:
+        top = stats.frequent.top(top_k)
+        # Numeric sketches count values as floats; integer columns report integers
+        if stats.numeric and "INT" in (sql_type or "").upper():
+            top = [{"value": int(item["value"]), "count": item["count"]} for item in top]
+        return top
+
+    @staticmethod
+    def summarize(db_manager, table_name: str, top_k: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns the schema, descriptive statistics, null ratios and ``top_k`` most
+        frequent values of every column of ``table_name``, or None when the table
+        does not exist. Top-value counts are exact while a column has fewer
+        distinct values than the summary keeps counters, and may be low by at
+        most ``top_values_max_error`` otherwise.
+        """
+        metadata = db_manager.get_table_metadata(table_name)
+        if metadata is None:
+            return None
+
+        stored = ColumnStatsStore.stored(db_manager, table_name)
+        stats, sampled = (stored, False) if stored is not None else TableStatsManager._estimated(
+            db_manager, table_name, metadata
+        )
+        types = {column["column_name"]: column["data_type"] for column in metadata["columns"]}
+        column_stats = {
+            column: stats.get(column) or ColumnStats(numeric=ColumnStatsStore.is_numeric_type(sql_type))
+            for column, sql_type in types.items()
+        }
+        described = TableStatsManager._descriptive_statistics(
+            db_manager, table_name, metadata,
+            [column for column, sql_type in types.items() if ColumnStatsStore.is_numeric_type(sql_type)], stored
+        )
+        return {
+            "table_name": table_name,
+            "row_count": metadata["row_count"],
+            "approximate": described["approximate"] or sampled,
+            "columns": [{"name": column, "type": sql_type} for column, sql_type in types.items()],
+            "descriptive_statistics": described["descriptive_statistics"],
+            "null_ratios": {
+                column: value.null_count / (value.count + value.null_count) if value.count + value.null_count else 0
+                for column, value in column_stats.items()
+            },
+            "top_values": {
+                column: TableStatsManager._top_values(value, types[column], top_k) for column, value in column_stats.items()
+            },
+            "top_values_max_error": {column: value.frequent.max_error for column, value in column_stats.items()},
+        }
+
+    @staticmethod
+    def clear_cache() -> None:
+        with TableStatsManager._lock:
+            TableStatsManager._cache.clear()
@@ -24,11 +24,46 @@ interface ChatMessagesResponse {
   messages: Message[]
 }
 
+interface AgentQueueResponse {
+  running: number
+  queued: number
+  max_concurrency: number
+  max_concurrency_per_user: number
+  positions: number[]
+}
+
 interface AskChatResponse {
   answer: string
   result: any
 }
 
+interface ChatStreamStep {
+  tool: string
+  input: unknown
+  sql_query?: string
+}
+
+interface ChatStreamResult {
+  sql_query: string
+  query_result: any
+  total_rows: number | null
+  truncated: 'rows' | 'memory' | null
+}
+
+interface ChatStreamDone {
+  content: string
+  query_result: any
+  sql_query: string | null
+  response_id: number
+}
+
+export interface ChatStreamHandlers {
+  onQueued?: (position: number) => void
+  onStep?: (step: ChatStreamStep) => void
+  onResult?: (result: ChatStreamResult) => void
+  onToken?: (content: string) => void
+}
+
 class ChatService extends BaseService {
   private static readonly BASE_URL = `${import.meta.env.VITE_API_URL}/chats`
 
@@ -62,6 +97,65 @@ class ChatService extends BaseService {
     })) as AskChatResponse
   }
 
+  async getQueue(): Promise<AgentQueueResponse> {
+    return (await this.makeRequest(`${ChatService.BASE_URL}/queue`, 'get')) as AgentQueueResponse
+  }
+
+  // Server-sent events cannot be read through axios, and EventSource cannot POST
+  async askChatStream(
+    chatId: number,
+    question: string,
+    handlers: ChatStreamHandlers = {},
+  ): Promise<ChatStreamDone> {
+    const token = localStorage.getItem('access_token')
+    const response = await fetch(`${ChatService.BASE_URL}/${chatId}/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify({ question }),
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`Error: ${response.status}`)
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    let done: ChatStreamDone | null = null
+    while (true) {
+      const { value, done: finished } = await reader.read()
+      if (finished) break
+      buffer += value
+
+      let boundary = buffer.indexOf('\n\n')
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf('\n\n')
+
+        let event = 'message'
+        let data = ''
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7)
+          else if (line.startsWith('data: ')) data += line.slice(6)
+        }
+        const payload = data ? JSON.parse(data) : {}
+        if (event === 'queued') handlers.onQueued?.(payload.position)
+        else if (event === 'step') handlers.onStep?.(payload)
+        else if (event === 'result') handlers.onResult?.(payload)
+        else if (event === 'token') handlers.onToken?.(payload.content)
+        else if (event === 'done') done = payload
+        else if (event === 'error') throw new Error(payload.detail)
+      }
+    }
+    if (!done) {
+      throw new Error('The answer stream ended before the answer was complete')
+    }
+    return done
+  }
+
   async updateChatName(
     chatId: number,
     newName: string,
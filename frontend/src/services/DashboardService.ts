@@ -5,11 +5,35 @@ class DashboardService {
 }
 
 export default {
-  getSchema() {
-    return axios.get(`${DashboardService.BASE_URL}/`)
+  // Without a table the dashboard describes the most recently uploaded file
+  getSchema(tableName?: string) {
+    return axios.get(`${DashboardService.BASE_URL}/`, {
+      params: tableName ? { table_name: tableName } : {},
+    })
   },
 
-  getAnalysis() {
-    return axios.get(`${DashboardService.BASE_URL}/analysis`)
+  getAnalysis(tableName?: string) {
+    return axios.get(`${DashboardService.BASE_URL}/analysis`, {
+      params: tableName ? { table_name: tableName } : {},
+    })
+  },
+
+  // Schema, statistics, null ratios and top values in one response with an ETag
+  getSummary(tableName?: string, topK?: number) {
+    return axios.get(`${DashboardService.BASE_URL}/summary`, {
+      params: { ...(tableName ? { table_name: tableName } : {}), ...(topK ? { top_k: topK } : {}) },
+    })
+  },
+
+  getHistogram(tableName: string, column: string, bins?: number) {
+    return axios.get(`${DashboardService.BASE_URL}/histogram`, {
+      params: { table_name: tableName, column, ...(bins ? { bins } : {}) },
+    })
+  },
+
+  getDistinctCounts(tableName: string) {
+    return axios.get(`${DashboardService.BASE_URL}/distinct`, {
+      params: { table_name: tableName },
+    })
   },
 }
@@ -46,16 +46,31 @@ class FileManagerService extends BaseService {
     return ApiClient.post(`${this.BASE_URL}/update/google-sheets`)
   }
 
+  static getJob(jobId: number) {
+    return ApiClient.get(`${this.BASE_URL}/jobs/${jobId}`)
+  }
+
   static getTables() {
     return ApiClient.get(`${this.BASE_URL}/tables/`)
   }
 
+  static getTablesMetadata() {
+    return ApiClient.get(`${this.BASE_URL}/tables/metadata`)
+  }
+
   static getTableInfo(tableName: string) {
     return ApiClient.get(`${this.BASE_URL}/tables/${tableName}/info`)
   }
 
-  static getAllTableData(tableName: string) {
-    return ApiClient.get(`${this.BASE_URL}/tables/${tableName}/data`)
+  static getAllTableData(
+    tableName: string,
+    params: { after?: number; limit?: number; columns?: string; filter?: string[] } = {},
+  ) {
+    // Repeated filters are sent as filter=a&filter=b, the form FastAPI parses into a list
+    return ApiClient.get(`${this.BASE_URL}/tables/${tableName}/data`, {
+      params,
+      paramsSerializer: { indexes: null },
+    })
   }
 
   static deleteTable(tableName: string) {